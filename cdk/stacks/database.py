@@ -16,6 +16,8 @@ class DatabaseStack(Stack):
             sort_key=dynamodb.Attribute(name="sk", type=dynamodb.AttributeType.STRING),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
             stream=dynamodb.StreamViewType.NEW_IMAGE,
+            # Expires LEASE# items that were never released
+            time_to_live_attribute="expires_at",
         )
 
         # GSI1 - ProductTypeIndex
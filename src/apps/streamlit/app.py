@@ -128,7 +128,7 @@ with col1:
                     st.stop()
 
                 # Discovery matching phase
-                match_progress = st.progress(0, text="Starting pairwise matching...")
+                match_progress = st.progress(0, text="Starting block voting...")
                 discovery = BoilerplateDiscovery()
                 match_start = time.perf_counter()
 
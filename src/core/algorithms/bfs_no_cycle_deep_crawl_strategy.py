@@ -1,8 +1,18 @@
-from typing import List, Set, Dict, Tuple, Optional, Iterable, AsyncGenerator
+from typing import (
+    List,
+    Set,
+    Dict,
+    Tuple,
+    Optional,
+    Iterable,
+    AsyncGenerator,
+    Callable,
+)
 import logging
 from urllib.parse import urlparse
 import fnmatch
 from crawl4ai import BFSDeepCrawlStrategy, AsyncWebCrawler, CrawlerRunConfig
+from crawl4ai.async_dispatcher import BaseDispatcher
 from crawl4ai.types import CrawlResult
 from crawl4ai.utils import normalize_url_for_deep_crawl
 
@@ -18,6 +28,10 @@ class BFSNoCycleDeepCrawlStrategy(BFSDeepCrawlStrategy):
     Added features:
     - exclude_extensions: iterable of file extensions (e.g. ['jpg','pdf']) to skip
     - exclude_patterns: iterable of wildcard URL patterns to skip (fnmatch-style)
+    - known urls: URLs already discovered elsewhere (e.g. from sitemaps) are
+      never rendered again, see `add_known_urls`
+    - dispatcher_factory: builds the dispatcher for every BFS level, so the
+      levels share the caller's rate limiting instead of crawl4ai's default
     """
 
     def __init__(
@@ -28,6 +42,7 @@ class BFSNoCycleDeepCrawlStrategy(BFSDeepCrawlStrategy):
         logger: Optional[logging.Logger] = None,
         exclude_extensions: Optional[Iterable[str]] = None,
         exclude_patterns: Optional[Iterable[str]] = None,
+        dispatcher_factory: Optional[Callable[[], BaseDispatcher]] = None,
     ):
         # Reuse parent init for common fields, provide defaults for filters/scorers
         super().__init__(
@@ -44,6 +59,17 @@ class BFSNoCycleDeepCrawlStrategy(BFSDeepCrawlStrategy):
         }
 
         self._exclude_patterns = list(exclude_patterns) if exclude_patterns else []
+        self._known_urls: Set[str] = set()
+        self._dispatcher_factory = dispatcher_factory
+
+    def add_known_urls(self, urls: Iterable[str]) -> None:
+        """Register URLs that were already discovered and must not be crawled again."""
+        for url in urls:
+            self._known_urls.add(normalize_url_for_deep_crawl(url, url))
+
+    def _dispatcher(self) -> Optional[BaseDispatcher]:
+        """Return a fresh dispatcher for one BFS level, if a factory is set."""
+        return self._dispatcher_factory() if self._dispatcher_factory else None
 
     async def can_process_url(self, url: str, depth: int) -> bool:
         """Checks URL against parent filters and the additional extension/pattern filters."""
@@ -145,6 +171,12 @@ class BFSNoCycleDeepCrawlStrategy(BFSDeepCrawlStrategy):
             if normalized in visited:
                 continue
 
+            # Skip URLs that are already known (e.g. from sitemaps)
+            if normalized in self._known_urls:
+                visited.add(normalized)
+                self.stats.urls_skipped += 1
+                continue
+
             # Validate URL using can_process_url (includes extension/pattern filters)
             if not await self.can_process_url(normalized, next_depth):
                 self.stats.urls_skipped += 1
@@ -191,7 +223,9 @@ class BFSNoCycleDeepCrawlStrategy(BFSDeepCrawlStrategy):
 
             # Clone the config to disable deep crawling recursion and enforce batch mode
             batch_config = config.clone(deep_crawl_strategy=None, stream=False)
-            batch_results = await crawler.arun_many(urls=urls, config=batch_config)
+            batch_results = await crawler.arun_many(
+                urls=urls, config=batch_config, dispatcher=self._dispatcher()
+            )
 
             # Update pages crawled counter - count only successful crawls
             successful_results = [r for r in batch_results if r.success]
@@ -240,7 +274,9 @@ class BFSNoCycleDeepCrawlStrategy(BFSDeepCrawlStrategy):
             visited.update(urls)
 
             stream_config = config.clone(deep_crawl_strategy=None, stream=True)
-            stream_gen = await crawler.arun_many(urls=urls, config=stream_config)
+            stream_gen = await crawler.arun_many(
+                urls=urls, config=stream_config, dispatcher=self._dispatcher()
+            )
 
             # Keep track of processed results for this batch
             results_count = 0
@@ -0,0 +1,214 @@
+import logging
+import zlib
+from contextlib import aclosing
+from typing import AsyncGenerator, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _local_name(tag) -> str:
+    """Return the tag name without its XML namespace."""
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _normalize_host(netloc: str) -> str:
+    """Lowercase a host and strip the port and a leading 'www.'."""
+    host = netloc.lower().split(":", 1)[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+class SitemapDiscovery:
+    """
+    Discovers page URLs from a shop's sitemaps using plain HTTP requests.
+
+    The discovery starts at robots.txt, follows every `Sitemap:` entry
+    (falling back to /sitemap.xml), recurses into sitemap indexes and
+    transparently handles gzip-compressed sitemaps. XML is parsed
+    incrementally while the response streams in, so even very large
+    sitemaps are processed with constant memory.
+    """
+
+    DEFAULT_SITEMAP_PATHS = ("/sitemap.xml", "/sitemap_index.xml")
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        max_sitemaps: int = 500,
+        max_urls: int = 1_000_000,
+        chunk_size: int = 64 * 1024,
+        user_agent: str = "Mozilla/5.0 (compatible; AuraHistoriaBot/1.0)",
+    ):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_sitemaps = max_sitemaps
+        self.max_urls = max_urls
+        self.chunk_size = chunk_size
+        self.headers = {"User-Agent": user_agent}
+
+    async def discover(self, start_url: str) -> AsyncGenerator[str, None]:
+        """
+        Yield every unique same-site page URL listed in the shop's sitemaps.
+
+        Args:
+            start_url: The shop's start URL (e.g. https://example.com)
+
+        Yields:
+            Page URLs in the order they appear in the sitemaps.
+        """
+        host = _normalize_host(urlparse(start_url).netloc)
+        seen_urls: Set[str] = set()
+        visited_sitemaps: Set[str] = set()
+
+        async with aiohttp.ClientSession(
+            timeout=self.timeout, headers=self.headers
+        ) as session:
+            pending = await self.sitemaps_from_robots(session, start_url)
+
+            while pending and len(visited_sitemaps) < self.max_sitemaps:
+                sitemap_url = pending.pop(0)
+                if sitemap_url in visited_sitemaps:
+                    continue
+                visited_sitemaps.add(sitemap_url)
+
+                try:
+                    async with aclosing(
+                        self._iter_sitemap(session, sitemap_url)
+                    ) as entries:
+                        async for kind, loc in entries:
+                            if kind == "sitemap":
+                                if loc not in visited_sitemaps:
+                                    pending.append(loc)
+                                continue
+
+                            if loc in seen_urls:
+                                continue
+                            if _normalize_host(urlparse(loc).netloc) != host:
+                                continue
+
+                            seen_urls.add(loc)
+                            yield loc
+
+                            if len(seen_urls) >= self.max_urls:
+                                logger.info(
+                                    f"Sitemap URL limit ({self.max_urls}) reached for {host}"
+                                )
+                                return
+                except Exception as e:
+                    logger.warning(f"Failed to parse sitemap {sitemap_url}: {e}")
+
+        logger.info(
+            f"Sitemap discovery for {host} found {len(seen_urls)} URLs "
+            f"in {len(visited_sitemaps)} sitemap(s)"
+        )
+
+    async def sitemaps_from_robots(
+        self, session: aiohttp.ClientSession, start_url: str
+    ) -> List[str]:
+        """
+        Read the `Sitemap:` directives from robots.txt.
+
+        Falls back to the conventional sitemap locations when robots.txt
+        is missing or does not list any sitemap.
+        """
+        parsed = urlparse(start_url)
+        base_url = f"{parsed.scheme or 'https'}://{parsed.netloc}"
+        robots_text = await self._fetch_text(session, urljoin(base_url, "/robots.txt"))
+
+        sitemaps = self.parse_robots_sitemaps(robots_text or "", base_url)
+        if not sitemaps:
+            sitemaps = [urljoin(base_url, path) for path in self.DEFAULT_SITEMAP_PATHS]
+
+        return sitemaps
+
+    @staticmethod
+    def parse_robots_sitemaps(robots_text: str, base_url: str) -> List[str]:
+        """Extract sitemap URLs from the contents of a robots.txt file."""
+        sitemaps = []
+        for line in robots_text.splitlines():
+            key, _, value = line.partition(":")
+            if key.strip().lower() != "sitemap":
+                continue
+            value = value.split("#", 1)[0].strip()
+            if not value:
+                continue
+            sitemap_url = urljoin(base_url, value)
+            if sitemap_url not in sitemaps:
+                sitemaps.append(sitemap_url)
+        return sitemaps
+
+    async def _fetch_text(
+        self, session: aiohttp.ClientSession, url: str
+    ) -> Optional[str]:
+        """Fetch a small text document, returning None on any failure."""
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    return None
+                return await response.text(errors="replace")
+        except Exception as e:
+            logger.debug(f"Failed to fetch {url}: {e}")
+            return None
+
+    async def _iter_sitemap(
+        self, session: aiohttp.ClientSession, sitemap_url: str
+    ) -> AsyncGenerator[Tuple[str, str], None]:
+        """
+        Stream a sitemap and yield its entries.
+
+        Yields:
+            Tuples of ("sitemap", url) for child sitemaps of an index and
+            ("url", url) for page entries of a urlset.
+        """
+        async with session.get(sitemap_url) as response:
+            if response.status != 200:
+                logger.debug(f"Sitemap {sitemap_url} returned {response.status}")
+                return
+
+            parser = etree.XMLPullParser(events=("end",), recover=True)
+            decompressor = None
+            first_chunk = True
+
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                if first_chunk:
+                    first_chunk = False
+                    if chunk.startswith(GZIP_MAGIC):
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+
+                parser.feed(chunk)
+                for entry in self._drain_events(parser):
+                    yield entry
+
+            if decompressor is not None:
+                parser.feed(decompressor.flush())
+            parser.close()
+            for entry in self._drain_events(parser):
+                yield entry
+
+    @staticmethod
+    def _drain_events(parser: etree.XMLPullParser) -> List[Tuple[str, str]]:
+        """Collect finished <loc> entries and free the parsed elements."""
+        entries = []
+        for _, element in parser.read_events():
+            name = _local_name(element.tag)
+            if name == "loc":
+                parent = element.getparent()
+                kind = _local_name(parent.tag) if parent is not None else ""
+                loc = (element.text or "").strip()
+                if loc and kind in ("sitemap", "url"):
+                    entries.append((kind, loc))
+            elif name in ("url", "sitemap"):
+                # Release finished entries so memory stays flat on huge sitemaps
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+        return entries
@@ -11,6 +11,25 @@ logging.basicConfig(level=logging.INFO)
 load_dotenv()
 
 
+TTL_ATTRIBUTE = "expires_at"
+
+
+def enable_time_to_live(dynamodb, table_name: str) -> None:
+    """Enable TTL on `expires_at` so expired lease items are deleted. Idempotent."""
+    try:
+        description = dynamodb.describe_time_to_live(TableName=table_name)
+        status = description["TimeToLiveDescription"].get("TimeToLiveStatus")
+        if status in ("ENABLED", "ENABLING"):
+            return
+        dynamodb.update_time_to_live(
+            TableName=table_name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": TTL_ATTRIBUTE},
+        )
+        logger.info(f"Enabled TTL on '{TTL_ATTRIBUTE}' for table '{table_name}'.")
+    except ClientError as e:
+        logger.warning(f"Could not enable TTL for table '{table_name}': {e}")
+
+
 def create_tables():
     """
     Create the DynamoDB table required for the application (Single-Table Design).
@@ -25,6 +44,8 @@ def create_tables():
                       core_domain_name
         2. 'URL#<full_url>' - Individual URL data
            Attributes: type (category/product/etc), hash (status+price), url
+        3. 'LEASE#<name>' - Short-lived cross-process lease (e.g. LEASE#BOILERPLATE)
+           Attributes: owner, expires_at (epoch seconds, also the table TTL)
 
     GSIs:
     - GSI1: Product type index (gsi1_pk=SHOP#domain, gsi1_sk=type)
@@ -43,6 +64,7 @@ def create_tables():
         # Check if table exists
         try:
             dynamodb.describe_table(TableName=table_name)
+            enable_time_to_live(dynamodb, table_name)
             logger.info(f"Table '{table_name}' already exists.")
             return
         except ClientError as e:
@@ -118,6 +140,7 @@ def create_tables():
         # Wait for table to be created
         waiter = dynamodb.get_waiter("table_exists")
         waiter.wait(TableName=table_name)
+        enable_time_to_live(dynamodb, table_name)
 
         logger.info(f"Table '{table_name}' created successfully.")
 
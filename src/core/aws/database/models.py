@@ -2,6 +2,7 @@ import re
 from typing import Optional, Dict, Any
 from dataclasses import dataclass, field
 import hashlib
+import json
 import os
 
 import boto3
@@ -9,6 +10,16 @@ import tldextract
 
 from src.core.aws.database.constants import STATE_NEVER, STATE_PROGRESS, STATE_DONE
 
+# Fields of a put_products item that make up its fingerprint
+PRODUCT_FINGERPRINT_FIELDS = (
+    "title",
+    "state",
+    "price",
+    "images",
+    "auctionStart",
+    "auctionEnd",
+)
+
 extract_with_cache = tldextract.TLDExtract(cache_dir="/tmp/.tld_cache")
 
 # Regex to validate state prefixes:
@@ -182,6 +193,10 @@ class URLEntry:
     url: str
     type: Optional[str] = field(default=None)
     hash: Optional[str] = field(default=None)
+    product_fingerprint: Optional[str] = field(default=None)
+    etag: Optional[str] = field(default=None)
+    last_modified: Optional[str] = field(default=None)
+    content_length: Optional[int] = field(default=None)
     pk: Optional[str] = field(default=None)
     sk: Optional[str] = field(default=None)
 
@@ -208,6 +223,15 @@ class URLEntry:
 
         if self.hash is not None:
             item["hash"] = {"S": self.hash}
+        if self.product_fingerprint is not None:
+            item["product_fingerprint"] = {"S": self.product_fingerprint}
+
+        if self.etag is not None:
+            item["etag"] = {"S": self.etag}
+        if self.last_modified is not None:
+            item["last_modified"] = {"S": self.last_modified}
+        if self.content_length is not None:
+            item["content_length"] = {"N": str(self.content_length)}
 
         return item
 
@@ -224,8 +248,18 @@ class URLEntry:
             url=item["url"]["S"],
             type=item.get("type", {}).get("S"),
             hash=item.get("hash", {}).get("S"),
+            product_fingerprint=item.get("product_fingerprint", {}).get("S"),
+            etag=item.get("etag", {}).get("S"),
+            last_modified=item.get("last_modified", {}).get("S"),
+            content_length=(
+                int(item["content_length"]["N"]) if "content_length" in item else None
+            ),
         )
 
+    def has_validators(self) -> bool:
+        """Return True if HTTP validators from a previous scrape are stored."""
+        return bool(self.etag or self.last_modified)
+
     @staticmethod
     def calculate_hash(markdown: str) -> str:
         """
@@ -238,3 +272,22 @@ class URLEntry:
             SHA256 hash string
         """
         return hashlib.sha256(markdown.encode()).hexdigest()
+
+    @staticmethod
+    def calculate_product_fingerprint(product: Dict[str, Any]) -> str:
+        """
+        Calculate a canonical hash of the fields of an extracted product that
+        matter to the backend, to detect products that did not change even
+        though their markdown did.
+
+        Args:
+            product: put_products item (wire dict)
+
+        Returns:
+            SHA256 hash string
+        """
+        fields = {name: product.get(name) for name in PRODUCT_FINGERPRINT_FIELDS}
+        canonical = json.dumps(
+            fields, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
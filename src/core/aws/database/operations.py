@@ -1,6 +1,7 @@
 import logging
 import os
-from typing import List, Optional, Tuple
+import time
+from typing import Dict, List, Optional, Tuple
 import socket
 from iptocc import get_country_code
 
@@ -46,6 +47,7 @@ class DynamoDBOperations:
     URL_ATTR = "#url_attr"
     COUNTRY_PREFIX = "COUNTRY#"
     COUNTRY_KEY_PLACEHOLDER = ":country"
+    LEASE_SK_PREFIX = "LEASE#"
 
     def __init__(self):
         self.client = get_dynamodb_client()
@@ -540,6 +542,258 @@ class DynamoDBOperations:
             )
             raise
 
+    def update_product_fingerprint(
+        self, domain: str, url: str, fingerprint: str
+    ) -> dict:
+        """
+        Store the fingerprint of the product last sent to the backend.
+
+        Args:
+            domain: Shop domain
+            url: Product URL
+            fingerprint: URLEntry.calculate_product_fingerprint of the product
+
+        Returns:
+            UpdateItem response
+        """
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key={
+                    "pk": {"S": f"SHOP#{domain}"},
+                    "sk": {"S": f"URL#{url}"},
+                },
+                UpdateExpression="SET #fp = :fingerprint",
+                ExpressionAttributeNames={"#fp": "product_fingerprint"},
+                ExpressionAttributeValues={":fingerprint": {"S": fingerprint}},
+                ReturnValues="UPDATED_NEW",
+            )
+            return response["Attributes"]
+        except ClientError as e:
+            logger.error(
+                "Couldn't update product fingerprint for %s in %s. Here's why: %s: %s",
+                url,
+                domain,
+                e.response["Error"]["Code"],
+                e.response["Error"]["Message"],
+            )
+            raise
+
+    def update_url_validators(
+        self,
+        domain: str,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_length: Optional[int] = None,
+    ) -> Optional[dict]:
+        """
+        Store the HTTP validators of a URL entry for conditional revalidation.
+
+        Validators that are None are removed, so a stale ETag never outlives
+        a response that no longer sends one.
+
+        Args:
+            domain: Shop domain
+            url: Product URL
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            content_length: Content-Length response header
+
+        Returns:
+            UpdateItem response attributes
+        """
+        validators = {
+            "etag": {"S": etag} if etag else None,
+            "last_modified": {"S": last_modified} if last_modified else None,
+            "content_length": (
+                {"N": str(content_length)} if content_length is not None else None
+            ),
+        }
+        set_parts = []
+        remove_parts = []
+        names = {}
+        values = {}
+        for name, value in validators.items():
+            names[f"#{name}"] = name
+            if value is None:
+                remove_parts.append(f"#{name}")
+            else:
+                set_parts.append(f"#{name} = :{name}")
+                values[f":{name}"] = value
+
+        update_expression = ""
+        if set_parts:
+            update_expression += "SET " + ", ".join(set_parts)
+        if remove_parts:
+            update_expression += " REMOVE " + ", ".join(remove_parts)
+
+        update_args = {
+            "TableName": self.table_name,
+            "Key": {
+                "pk": {"S": f"SHOP#{domain}"},
+                "sk": {"S": f"URL#{url}"},
+            },
+            "UpdateExpression": update_expression.strip(),
+            "ExpressionAttributeNames": names,
+            "ReturnValues": "UPDATED_NEW",
+        }
+        if values:
+            update_args["ExpressionAttributeValues"] = values
+
+        try:
+            response = self.client.update_item(**update_args)
+            return response.get("Attributes")
+        except ClientError as e:
+            logger.error(
+                "Couldn't update validators for %s in %s. Here's why: %s: %s",
+                url,
+                domain,
+                e.response["Error"]["Code"],
+                e.response["Error"]["Message"],
+            )
+            raise
+
+    def _lease_key(self, domain: str, name: str) -> dict:
+        return {
+            "pk": {"S": f"SHOP#{domain}"},
+            "sk": {"S": f"{self.LEASE_SK_PREFIX}{name}"},
+        }
+
+    def acquire_lease(self, domain: str, name: str, owner: str, ttl: int) -> bool:
+        """
+        Try to take a named lease on a shop partition.
+
+        The lease is granted when nobody holds it, when the previous lease
+        expired, or when `owner` already holds it. `expires_at` doubles as the
+        table's TTL attribute, so abandoned leases are eventually deleted.
+
+        Args:
+            domain: Shop domain
+            name: Lease name (e.g. "BOILERPLATE")
+            owner: Unique id of the caller
+            ttl: Lease duration in seconds
+
+        Returns:
+            True if the lease is now held by `owner`
+        """
+        now = int(time.time())
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    **self._lease_key(domain, name),
+                    "owner": {"S": owner},
+                    "expires_at": {"N": str(now + ttl)},
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(pk) OR expires_at < :now OR #owner = :owner"
+                ),
+                ExpressionAttributeNames={"#owner": "owner"},
+                ExpressionAttributeValues={
+                    ":now": {"N": str(now)},
+                    ":owner": {"S": owner},
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            logger.error(
+                "Couldn't acquire lease %s for %s. Here's why: %s: %s",
+                name,
+                domain,
+                e.response["Error"]["Code"],
+                e.response["Error"]["Message"],
+            )
+            raise
+
+    def renew_lease(self, domain: str, name: str, owner: str, ttl: int) -> bool:
+        """
+        Extend a lease held by `owner` by `ttl` seconds from now.
+
+        Returns:
+            False if the lease is no longer held by `owner`
+        """
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key=self._lease_key(domain, name),
+                UpdateExpression="SET expires_at = :expires_at",
+                ConditionExpression="#owner = :owner",
+                ExpressionAttributeNames={"#owner": "owner"},
+                ExpressionAttributeValues={
+                    ":expires_at": {"N": str(int(time.time()) + ttl)},
+                    ":owner": {"S": owner},
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
+
+    def release_lease(self, domain: str, name: str, owner: str) -> None:
+        """Delete a lease if it is still held by `owner`."""
+        try:
+            self.client.delete_item(
+                TableName=self.table_name,
+                Key=self._lease_key(domain, name),
+                ConditionExpression="#owner = :owner",
+                ExpressionAttributeNames={"#owner": "owner"},
+                ExpressionAttributeValues={":owner": {"S": owner}},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+    def batch_get_url_entries(
+        self, domain: str, urls: List[str], max_retries: int = 5
+    ) -> Dict[str, URLEntry]:
+        """
+        Retrieve several URL entries of one domain with BatchGetItem.
+
+        Args:
+            domain: Shop domain
+            urls: Product URLs
+            max_retries: Retries for unprocessed keys
+
+        Returns:
+            Dict mapping url to URLEntry for every entry that exists
+        """
+        entries: Dict[str, URLEntry] = {}
+        unique_urls = list(dict.fromkeys(urls))
+
+        for i in range(0, len(unique_urls), 100):
+            keys = [
+                {"pk": {"S": f"SHOP#{domain}"}, "sk": {"S": f"URL#{url}"}}
+                for url in unique_urls[i : i + 100]
+            ]
+            request = {self.table_name: {"Keys": keys}}
+            retries = 0
+            while request:
+                try:
+                    response = self.client.batch_get_item(RequestItems=request)
+                except Exception as e:
+                    logger.error(f"Error fetching URL entries for {domain}: {e}")
+                    break
+
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    entry = URLEntry.from_dynamodb_item(item)
+                    entries[entry.url] = entry
+
+                request = response.get("UnprocessedKeys") or {}
+                if request:
+                    retries += 1
+                    if retries > max_retries:
+                        logger.warning(
+                            f"Giving up on unprocessed URL entries for {domain}"
+                        )
+                        break
+                    time.sleep(min(2**retries * 0.05, 2.0))
+
+        return entries
+
     def _upsert_item(self, item: dict, context: str) -> None:
         """
         Generic upsert operation for DynamoDB items.
@@ -1,7 +1,7 @@
 import logging
 import os
 import json
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 import boto3
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
@@ -63,6 +63,88 @@ class S3Operations:
             logger.error(f"Error parsing JSON from S3 {key}: {e}")
             return None
 
+    def upload_bytes(
+        self, key: str, data: bytes, content_type: str = "application/octet-stream"
+    ) -> None:
+        """Upload raw bytes to S3."""
+        try:
+            self.client.put_object(
+                Bucket=self.bucket_name, Key=key, Body=data, ContentType=content_type
+            )
+            logger.info(f"Uploaded {key} to S3 bucket {self.bucket_name}")
+        except ClientError as e:
+            logger.error(f"Error uploading to S3: {e}")
+            raise
+
+    def object_exists(self, key: str) -> bool:
+        """Whether an object exists under `key`."""
+        try:
+            self.client.head_object(Bucket=self.bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            logger.error(f"Error checking S3 object {key}: {e}")
+            raise
+
+    def delete_object(self, key: str) -> None:
+        """Delete an object; deleting a missing key is not an error."""
+        try:
+            self.client.delete_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            logger.error(f"Error deleting {key} from S3: {e}")
+            raise
+
+    def download_bytes_if_changed(
+        self, key: str, etag: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str], bool]:
+        """
+        Download raw bytes from S3 unless the object still matches `etag`.
+
+        Returns:
+            Tuple of (data, etag, changed). When the object is unchanged,
+            data is None and changed is False. A missing key is returned as
+            (None, None, True).
+        """
+        kwargs = {"Bucket": self.bucket_name, "Key": key}
+        if etag:
+            kwargs["IfNoneMatch"] = etag
+        try:
+            response = self.client.get_object(**kwargs)
+            return response["Body"].read(), response.get("ETag"), True
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code in ("304", "NotModified"):
+                return None, etag, False
+            if code == "NoSuchKey":
+                return None, None, True
+            logger.error(f"Error downloading from S3: {e}")
+            raise
+
+    def download_json_if_changed(
+        self, key: str, etag: Optional[str] = None
+    ) -> Tuple[Optional[Any], Optional[str], bool]:
+        """
+        Download JSON data from S3 unless it still matches `etag`.
+
+        Args:
+            key: Object key
+            etag: ETag of the copy the caller already has
+
+        Returns:
+            Tuple of (data, etag, changed). When the object is unchanged,
+            data is None and changed is False. A missing key or invalid JSON
+            is returned as (None, None, True).
+        """
+        body, new_etag, changed = self.download_bytes_if_changed(key, etag)
+        if body is None:
+            return None, new_etag, changed
+        try:
+            return json.loads(body.decode("utf-8")), new_etag, True
+        except Exception as e:
+            logger.error(f"Error parsing JSON from S3 {key}: {e}")
+            return None, None, True
+
     def list_objects(self, prefix: str = "") -> list[str]:
         """List object keys with a given prefix."""
         try:
@@ -1,40 +1,118 @@
 import logging
-from typing import List
-from openai import AsyncOpenAI
-from crawl4ai import AsyncWebCrawler
+from typing import AsyncIterator, List, Optional, Type
+from pydantic import BaseModel
+from crawl4ai import AsyncWebCrawler, CrawlResult
 
 from core.scraper.schemas.extracted_product import ExtractedProduct
-from src.core.utils.configs import build_product_scraper_components
+from src.core.scraper.llm_errors import LLMError, classify_error
+from src.core.scraper.llm_pool import LLMEndpointPool
+from src.core.scraper.llm_retry import (
+    LLM_TRUNCATION_MAX_TOKENS,
+    RetryBudget,
+    RetryPolicy,
+)
+from src.core.utils.configs import build_product_scraper_components, crawl_dispatcher
 
 logger = logging.getLogger(__name__)
 logging.getLogger("httpx").setLevel(logging.ERROR)
 
-# Shared async client for OpenAI-compatible vLLM server
-client = AsyncOpenAI(
-    base_url="http://localhost:8003/v1",
-    api_key="dummy",
-)
-MODEL_NAME = "Qwen/Qwen3-8B-AWQ"
+# Shared pool of OpenAI-compatible vLLM servers (LLM_ENDPOINTS)
+llm_pool = LLMEndpointPool.from_env()
+MODEL_NAME = llm_pool.model
+retry_policy = RetryPolicy()
+retry_budget = RetryBudget()
+
+# Guided decoding schema for streamed requests (the parse helper derives it itself)
+PRODUCT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": ExtractedProduct.__name__,
+        "schema": ExtractedProduct.model_json_schema(),
+    },
+}
+
 
+async def chat_completion(
+    task: str,
+    prompt: str,
+    response_format: Type[BaseModel] = ExtractedProduct,
+    max_tokens: int = 2500,
+    domain: Optional[str] = None,
+    truncation_max_tokens: Optional[int] = LLM_TRUNCATION_MAX_TOKENS,
+) -> str:
+    """
+    Send an async chat completion request to the least busy vLLM server.
+
+    Failures are retried according to `retry_policy`, charged to the
+    domain's retry budget. A truncated answer is retried once with
+    `truncation_max_tokens`, or not at all if it is None.
+
+    Raises:
+        LLMError: Typed error of the last attempt if the request failed
+    """
+
+    async def request(tokens: int) -> str:
+        async with llm_pool.lease() as endpoint:
+            response = await endpoint.client.beta.chat.completions.parse(
+                model=llm_pool.model,
+                messages=[
+                    {"role": "system", "content": task},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0,
+                max_tokens=tokens,
+                extra_body={"chat_template_kwargs": {"enable_thinking": False}},
+                response_format=response_format,
+            )
+        return response.choices[0].message.content or ""
 
-async def chat_completion(task: str, prompt: str) -> str:
-    """Send an async chat completion request to the vLLM server."""
     try:
-        response = await client.beta.chat.completions.parse(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": task},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0,
-            max_tokens=2500,
-            extra_body={"chat_template_kwargs": {"enable_thinking": False}},
-            response_format=ExtractedProduct,
+        return await retry_policy.run(
+            request, max_tokens, retry_budget, domain, truncation_max_tokens
         )
-        return response.choices[0].message.content or ""
-    except Exception as e:
+    except LLMError as e:
         logger.error(f"vLLM Error: {type(e).__name__}: {e}")
-        return "{}"
+        raise
+
+
+async def stream_chat_completion(
+    task: str, prompt: str, max_tokens: int = 2500
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion from the least busy vLLM server as content deltas.
+
+    Closing the generator early closes the HTTP stream, which makes vLLM
+    abort the request and free its slot. Retries are up to the caller, as
+    only it knows whether a stream can be restarted.
+
+    Yields:
+        Content fragments in order
+
+    Raises:
+        LLMError: If the request fails; streams are not retried
+    """
+    try:
+        async with llm_pool.lease() as endpoint:
+            stream = await endpoint.client.chat.completions.create(
+                model=llm_pool.model,
+                messages=[
+                    {"role": "system", "content": task},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0,
+                max_tokens=max_tokens,
+                extra_body={"chat_template_kwargs": {"enable_thinking": False}},
+                response_format=PRODUCT_RESPONSE_FORMAT,
+                stream=True,
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+    except Exception as e:
+        raise classify_error(e) from e
 
 
 async def get_markdown(url: str) -> str:
@@ -66,6 +144,32 @@ async def get_markdowns(urls: List[str]) -> List[str]:
     return markdowns
 
 
+async def stream_pages(urls: List[str]) -> AsyncIterator[CrawlResult]:
+    """
+    Fetch pages concurrently in one crawler session and yield them as they finish.
+
+    Closing the generator early stops the crawl and closes the browser.
+
+    Yields:
+        Crawl results of successfully fetched pages (url, html, markdown, ...)
+    """
+    if not urls:
+        return
+
+    browser_config, run_config = build_product_scraper_components()
+    async with AsyncWebCrawler(config=browser_config) as crawler:
+        results = await crawler.arun_many(
+            urls=urls,
+            config=run_config.clone(stream=True),
+            dispatcher=crawl_dispatcher(),
+        )
+        async for result in results:
+            if result.success:
+                yield result
+            else:
+                logger.error(f"Failed to fetch {result.url}: {result.error_message}")
+
+
 async def main(url: str):
     """Fetch a URL and print its markdown; used for manual testing."""
     markdown = await get_markdown(url)
@@ -1,20 +1,58 @@
 import logging
-import difflib
+import math
+import os
 import re
+import socket
+import uuid
 import asyncio
-from typing import List, Optional
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
 
 from src.core.aws.database.operations import DynamoDBOperations
 from src.core.aws.s3 import S3Operations
-from src.core.scraper.base import get_markdown
+from src.core.scraper.base import stream_pages
+from src.core.scraper.cleaning.boilerplate_matcher import (
+    BoilerplateMatcher,
+    hash_lines,
+)
+from src.core.scraper.structured_data import is_product_page
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+BOILERPLATE_SAMPLE_COUNT = int(os.getenv("BOILERPLATE_SAMPLE_COUNT", "10"))
+BOILERPLATE_MIN_FRACTION = float(os.getenv("BOILERPLATE_MIN_FRACTION", "0.6"))
+BOILERPLATE_VERIFY_CONCURRENCY = int(os.getenv("BOILERPLATE_VERIFY_CONCURRENCY", "4"))
+BOILERPLATE_LEASE_TTL = int(os.getenv("BOILERPLATE_LEASE_TTL", "300"))
+# Seconds a process that lost the lease waits for the winner's result (0 = don't wait)
+BOILERPLATE_LEASE_WAIT = float(os.getenv("BOILERPLATE_LEASE_WAIT", "0"))
 
-class BoilerplateDiscovery:
-    """Discovers boilerplate blocks for a specific shop using pairwise difflib comparison."""
+LEASE_NAME = "BOILERPLATE"
 
-    def __init__(self):
+
+class BoilerplateDiscovery:
+    """Discovers boilerplate blocks for a specific shop by frequency voting over sample pages."""
+
+    def __init__(
+        self,
+        sample_count: int = BOILERPLATE_SAMPLE_COUNT,
+        min_fraction: float = BOILERPLATE_MIN_FRACTION,
+        verify_concurrency: int = BOILERPLATE_VERIFY_CONCURRENCY,
+        lease_ttl: int = BOILERPLATE_LEASE_TTL,
+        lease_wait: float = BOILERPLATE_LEASE_WAIT,
+        poll_interval: float = 5.0,
+    ):
+        self.sample_count = sample_count
+        self.min_fraction = min_fraction
+        self.verify_concurrency = max(1, verify_concurrency)
+        self.lease_ttl = lease_ttl
+        self.lease_wait = lease_wait
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
         self.db = DynamoDBOperations()
         self.s3 = S3Operations()
         self.critical_keywords_pattern_1 = re.compile(
@@ -26,51 +64,110 @@ class BoilerplateDiscovery:
         self.currency_pattern = re.compile(r"[\$€£]\s*\d|\d\s*[\$€£]")
         self._locks = {}  # Stores asyncio.Lock() per domain
 
-    async def get_valid_product_markdowns(
-        self, domain: str, target_count: int = 3
-    ) -> List[str]:
-        """Fetch and validate product markdowns until target_count is reached."""
-        urls, _ = self.db.get_product_urls_by_domain(domain, max_urls=15)
-
-        valid_markdowns = []
-        seen_content_hashes = set()
+    async def _verify_product(
+        self, url: str, markdown: str, html: str, semaphore: asyncio.Semaphore
+    ) -> Optional[str]:
+        """
+        Return the markdown if the page is a product.
 
-        for url in urls:
-            if len(valid_markdowns) >= target_count:
-                break
+        Pages with product structured data (JSON-LD, microdata, OpenGraph) are
+        accepted right away; only the others are sent to the LLM.
+        """
+        from src.core.scraper.qwen import extract
 
-            try:
-                markdown = await get_markdown(url)
-                if not markdown or len(markdown) < 500:
-                    continue
+        if html and await asyncio.to_thread(is_product_page, html, url):
+            logger.info(f"Valid product found via structured data: {url}")
+            return markdown
 
-                content_hash = hash(markdown[:5000])
-                if content_hash in seen_content_hashes:
-                    continue
-                seen_content_hashes.add(content_hash)
+        try:
+            async with semaphore:
+                product = await extract(markdown=markdown[:10000])
+        except Exception as e:
+            logger.error(f"Error processing {url}: {e}")
+            return None
+
+        if product and getattr(product, "is_product", False):
+            logger.info(f"Valid product found: {url}")
+            return markdown
+        logger.warning(f"URL is not a product: {url}")
+        return None
 
-                from src.core.scraper.qwen import extract
+    async def get_valid_product_markdowns(
+        self, domain: str, target_count: int = 3
+    ) -> List[str]:
+        """
+        Fetch and validate product markdowns until target_count is reached.
 
-                verification_markdown = markdown[:10000]
-                product = await extract(markdown=verification_markdown)
+        Pages are fetched concurrently in one crawler session, and every
+        fetched page is verified while the crawl goes on, with at most
+        `verify_concurrency` LLM calls at a time. Outstanding fetches and
+        verifications are cancelled once enough products were found. Pages
+        with product structured data skip the LLM.
+        """
+        urls, _ = self.db.get_product_urls_by_domain(
+            domain, max_urls=max(15, target_count * 2)
+        )
 
-                if product and getattr(product, "is_product", False):
-                    valid_markdowns.append(markdown)
-                    logger.info(f"Valid product found: {url}")
-                else:
-                    logger.warning(f"URL is not a product: {url}")
+        valid_markdowns = []
+        seen_content_hashes = set()
+        semaphore = asyncio.Semaphore(self.verify_concurrency)
 
-            except Exception as e:
-                logger.error(f"Error processing {url}: {e}")
-                continue
+        fetched = stream_pages(urls)
+        next_page = asyncio.ensure_future(anext(fetched))
+        pending = {next_page}
+        try:
+            while pending and len(valid_markdowns) < target_count:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task is not next_page:
+                        markdown = task.result()
+                        if markdown and len(valid_markdowns) < target_count:
+                            valid_markdowns.append(markdown)
+                        continue
+
+                    try:
+                        page = task.result()
+                    except StopAsyncIteration:
+                        continue
+                    except Exception as e:
+                        logger.error(f"Error fetching samples for {domain}: {e}")
+                        continue
+
+                    next_page = asyncio.ensure_future(anext(fetched))
+                    pending.add(next_page)
+
+                    url, markdown = page.url, page.markdown
+                    if not markdown or len(markdown) < 500:
+                        continue
+
+                    content_hash = hash(markdown[:5000])
+                    if content_hash in seen_content_hashes:
+                        continue
+                    seen_content_hashes.add(content_hash)
+
+                    pending.add(
+                        asyncio.create_task(
+                            self._verify_product(url, markdown, page.html, semaphore)
+                        )
+                    )
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await fetched.aclose()
 
         return valid_markdowns
 
     async def discover_and_save(self, domain: str) -> List[List[str]]:
         """
-        Full workflow: Check S3 -> Fetch 3 products -> Discover -> Save to S3.
+        Full workflow: Check S3 -> Fetch sample products -> Discover -> Save to S3.
         Returns the discovered blocks.
-        Ensures only one discovery process runs per domain at a time (in-process).
+        Ensures only one discovery process runs per domain at a time: in-process
+        via an asyncio lock, across processes via a DynamoDB lease. A process
+        that loses the lease waits up to `lease_wait` seconds for the winner's
+        blocks and otherwise returns no blocks, so the caller only removes noise.
         """
         # 0. Initialize lock for this domain if not present
         if domain not in self._locks:
@@ -90,32 +187,118 @@ class BoilerplateDiscovery:
             if existing_blocks is not None:
                 return existing_blocks
 
-            # 4. Fetch valid products
-            logger.info(f"Starting boilerplate discovery for {domain}...")
-            markdowns = await self.get_valid_product_markdowns(domain, target_count=3)
-
-            if len(markdowns) < 2:
-                logger.warning(
-                    f"Not enough valid markdowns found for {domain} to discover boilerplate. Saving empty state to prevent re-discovery."
-                )
-                blocks = []
-            else:
-                # 5. Discover blocks
-                blocks = self.find_common_blocks_detailed(markdowns)
-
-            if blocks:
-                logger.info(f"Discovered {len(blocks)} boilerplate blocks for {domain}")
-            else:
+            # 4. Acquire the fleet-wide lease
+            if not await self._acquire_lease(domain):
                 logger.info(
-                    f"No common boilerplate blocks found (or not enough markdowns) for {domain}. Saving empty state."
+                    f"Boilerplate discovery for {domain} is running in another process."
                 )
+                return await self._wait_for_blocks(domain)
 
-            # 6. Save to S3 (even if empty, to mark as "checked")
+            renewal = asyncio.create_task(self._renew_lease(domain))
+            try:
+                return await self._discover(domain)
+            finally:
+                renewal.cancel()
+                await asyncio.gather(renewal, return_exceptions=True)
+                await self._release_lease(domain)
+
+    async def _discover(self, domain: str) -> List[List[str]]:
+        """Discover the blocks of a shop and save them to S3."""
+        # 5. Fetch valid products
+        logger.info(f"Starting boilerplate discovery for {domain}...")
+        markdowns = await self.get_valid_product_markdowns(
+            domain, target_count=self.sample_count
+        )
+
+        if len(markdowns) < 2:
+            logger.warning(
+                f"Not enough valid markdowns found for {domain} to discover boilerplate. Saving empty state to prevent re-discovery."
+            )
+            blocks = []
+        else:
+            # 6. Discover blocks
+            blocks = self.find_common_blocks_detailed(markdowns)
+
+        if blocks:
+            logger.info(f"Discovered {len(blocks)} boilerplate blocks for {domain}")
+        else:
+            logger.info(
+                f"No common boilerplate blocks found (or not enough markdowns) for {domain}. Saving empty state."
+            )
+
+        # 7. Save to S3 (even if empty, to mark as "checked")
+        await asyncio.to_thread(
+            self.s3.upload_json, f"boilerplate/{domain}.json", {"blocks": blocks}
+        )
+
+        # 8. Publish the compiled artifact the remover loads directly
+        await self._publish_artifact(domain, blocks, len(markdowns))
+
+        return blocks
+
+    async def _publish_artifact(
+        self, domain: str, blocks: List[List[str]], n_samples: int
+    ) -> None:
+        """Upload the blocks as a precompiled binary matcher next to the JSON."""
+        matcher = BoilerplateMatcher(
+            blocks,
+            metadata={
+                "domain": domain,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "samples": n_samples,
+                "min_fraction": self.min_fraction,
+            },
+        )
+        try:
             await asyncio.to_thread(
-                self.s3.upload_json, f"boilerplate/{domain}.json", {"blocks": blocks}
+                self.s3.upload_bytes, f"boilerplate/{domain}.bin", matcher.to_bytes()
             )
+        except Exception as e:
+            logger.warning(f"Failed to publish boilerplate artifact for {domain}: {e}")
+
+    async def _acquire_lease(self, domain: str) -> bool:
+        """Take the discovery lease. Fails open if DynamoDB is unavailable."""
+        try:
+            return await asyncio.to_thread(
+                self.db.acquire_lease, domain, LEASE_NAME, self.owner, self.lease_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Could not acquire discovery lease for {domain}: {e}")
+            return True
+
+    async def _renew_lease(self, domain: str) -> None:
+        """Keep extending the lease while discovery runs."""
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                renewed = await asyncio.to_thread(
+                    self.db.renew_lease, domain, LEASE_NAME, self.owner, self.lease_ttl
+                )
+            except Exception as e:
+                logger.warning(f"Could not renew discovery lease for {domain}: {e}")
+                continue
+            if not renewed:
+                logger.warning(f"Lost discovery lease for {domain}")
+                return
 
-            return blocks
+    async def _release_lease(self, domain: str) -> None:
+        try:
+            await asyncio.to_thread(
+                self.db.release_lease, domain, LEASE_NAME, self.owner
+            )
+        except Exception as e:
+            logger.warning(f"Could not release discovery lease for {domain}: {e}")
+
+    async def _wait_for_blocks(self, domain: str) -> List[List[str]]:
+        """Poll S3 for the lease holder's blocks for up to `lease_wait` seconds."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lease_wait
+        while loop.time() < deadline:
+            await asyncio.sleep(min(self.poll_interval, deadline - loop.time()))
+            blocks = await self._check_s3_for_blocks(domain)
+            if blocks is not None:
+                return blocks
+        return []
 
     async def _check_s3_for_blocks(self, domain: str) -> Optional[List[List[str]]]:
         """Helper to check S3 for existing boilerplate blocks."""
@@ -135,25 +318,20 @@ class BoilerplateDiscovery:
 
     def find_common_blocks_detailed(self, markdowns: List[str]) -> List[List[str]]:
         """
-        Identifies common text blocks (boilerplate) between documents.
-        Logic: If a block appears in both documents, it is considered boilerplate,
-        UNLESS it contains critical data (Prices, Images) or headers.
+        Identifies common text blocks (boilerplate) across documents.
+        Logic: A block is boilerplate if it appears in at least `min_fraction`
+        of the documents (and in at least two), UNLESS it contains critical
+        data (Prices, Images) or headers.
         """
         if len(markdowns) < 2:
             return []
 
-        for i in range(len(markdowns)):
-            for j in range(i + 1, len(markdowns)):
-                # Strip whitespace to ensure solid matching even with indentation differences
-                lines_a = [line.strip() for line in markdowns[i].splitlines()]
-                lines_b = [line.strip() for line in markdowns[j].splitlines()]
-
-                match_blocks = self._find_match_blocks(lines_a, lines_b)
-
-                if match_blocks:
-                    return match_blocks
-
-        return []
+        # Strip whitespace to ensure solid matching even with indentation differences
+        documents = [
+            [line.strip() for line in markdown.splitlines()] for markdown in markdowns
+        ]
+        min_count = max(2, math.ceil(self.min_fraction * len(documents)))
+        return self._vote_blocks(documents, min_count)
 
     def _is_safe_line(self, line: str) -> bool:
         """Check if a line is safe to include in boilerplate (no images, prices, or headers)."""
@@ -178,26 +356,113 @@ class BoilerplateDiscovery:
         self, lines_a: List[str], lines_b: List[str]
     ) -> List[List[str]]:
         """Find matching blocks between two lists of lines."""
-        matcher = difflib.SequenceMatcher(None, lines_a, lines_b, autojunk=False)
+        return self._vote_blocks([lines_a, lines_b], min_count=2)
+
+    @staticmethod
+    def _common_runs(
+        lines: List[str], hashes: List[int], document_frequency: Counter, min_count: int
+    ) -> List[Tuple[str, ...]]:
+        """Maximal runs of lines that each occur in at least `min_count` documents."""
+        runs = []
+        run: List[str] = []
+        for line, line_hash in zip(lines, hashes):
+            if document_frequency[line_hash] >= min_count:
+                run.append(line)
+                continue
+            if run:
+                runs.append(run)
+            run = []
+        if run:
+            runs.append(run)
+
+        candidates = []
+        for run in runs:
+            # Blank lines are shared by every page, so never let them start or end a block
+            start, end = 0, len(run)
+            while start < end and not run[start]:
+                start += 1
+            while end > start and not run[end - 1]:
+                end -= 1
+            if start < end:
+                candidates.append(tuple(run[start:end]))
+        return candidates
+
+    @staticmethod
+    def _split_at_blank_lines(run: Tuple[str, ...]) -> List[Tuple[str, ...]]:
+        segments = []
+        segment: List[str] = []
+        for line in run:
+            if line:
+                segment.append(line)
+            elif segment:
+                segments.append(tuple(segment))
+                segment = []
+        if segment:
+            segments.append(tuple(segment))
+        return segments
+
+    def _vote_blocks(
+        self, documents: List[List[str]], min_count: int
+    ) -> List[List[str]]:
+        """
+        Find blocks that occur verbatim in at least `min_count` documents.
+
+        Lines are hashed once and counted per document. Runs of lines that are
+        frequent on their own become candidate blocks, together with their
+        blank-line separated paragraphs. Every candidate is then counted per
+        document with a single matcher pass, and a run is kept when it reaches
+        `min_count`, otherwise its paragraphs that do.
+        """
+        hashed = [hash_lines(lines) for lines in documents]
+        document_frequency: Counter = Counter()
+        for hashes in hashed:
+            document_frequency.update(set(hashes))
+
+        # Candidate runs per document, in document order
+        runs: List[Tuple[str, ...]] = []
+        seen_runs = set()
+        for lines, hashes in zip(documents, hashed):
+            for run in self._common_runs(lines, hashes, document_frequency, min_count):
+                if run not in seen_runs:
+                    seen_runs.add(run)
+                    runs.append(run)
+        if not runs:
+            return []
+
+        segments = {run: self._split_at_blank_lines(run) for run in runs}
+        candidates = list(
+            dict.fromkeys(runs + [segment for run in runs for segment in segments[run]])
+        )
+        candidate_ids = {candidate: i for i, candidate in enumerate(candidates)}
+        matcher = BoilerplateMatcher([list(candidate) for candidate in candidates])
+
+        # Count the documents every candidate occurs in, one pass per document
+        votes: Counter = Counter()
+        for hashes in hashed:
+            votes.update({block_id for _, block_id in matcher.iter_matches(hashes)})
+
+        def accepted(candidate: Tuple[str, ...]) -> bool:
+            return votes[candidate_ids[candidate]] >= min_count
+
         match_blocks = []
         seen_blocks = set()
+        for run in runs:
+            if accepted(run):
+                blocks = [run]
+            else:
+                blocks = [segment for segment in segments[run] if accepted(segment)]
 
-        # get_matching_blocks() finds sequences that are identical in both A and B
-        for match in matcher.get_matching_blocks():
-            if match.size == 0:
-                continue
-
-            block = lines_a[match.a : match.a + match.size]
-            safe_block = [line for line in block if self._is_safe_line(line)]
+            for block in blocks:
+                safe_block = [line for line in block if self._is_safe_line(line)]
 
-            if not self._is_valid_block(safe_block):
-                continue
+                if not self._is_valid_block(safe_block):
+                    continue
 
-            block_tuple = tuple(safe_block)
-            if block_tuple in seen_blocks:
-                continue
+                block_tuple = tuple(safe_block)
+                if block_tuple in seen_blocks:
+                    continue
 
-            seen_blocks.add(block_tuple)
-            match_blocks.append(safe_block)
+                seen_blocks.add(block_tuple)
+                match_blocks.append(safe_block)
 
         return match_blocks
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Binary artifact layout (big-endian):
+#   magic "BPLM", format version (H), metadata length (I), metadata JSON,
+#   block count (I), then per block: line count (I), line hashes (Q each),
+#   and per line: byte length (I) + UTF-8 text.
+ARTIFACT_MAGIC = b"BPLM"
+ARTIFACT_VERSION = 1
+
+
+def line_hash(line: str) -> int:
+    """Stable 64-bit hash of a stripped markdown line."""
+    digest = hashlib.blake2b(line.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def hash_lines(lines: Iterable[str]) -> List[int]:
+    """Hash every line after stripping surrounding whitespace."""
+    return [line_hash(line.strip()) for line in lines]
+
+
+class BoilerplateMatcher:
+    """
+    Compiled set of boilerplate blocks for one shop.
+
+    Every block is stored as a tuple of line hashes and indexed by the hash of
+    its first line. Matching a page is a single pass over its lines: only the
+    blocks whose first line hash equals the current line are compared, so the
+    cost grows with the page length rather than with pages × blocks.
+    """
+
+    def __init__(
+        self,
+        blocks: Sequence[Sequence[str]],
+        block_hashes: Optional[List[Tuple[int, ...]]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Compile the matcher.
+
+        Args:
+            blocks: Boilerplate blocks, each a list of stripped lines
+            block_hashes: Precomputed line hashes of `blocks` (from an artifact)
+            metadata: Free-form information stored with the artifact
+        """
+        self.metadata: Dict[str, Any] = dict(metadata or {})
+        self.blocks: List[List[str]] = [list(block) for block in blocks if block]
+        self._block_hashes: List[Tuple[int, ...]] = (
+            [tuple(hashes) for hashes in block_hashes if hashes]
+            if block_hashes is not None
+            else [tuple(line_hash(line) for line in block) for block in self.blocks]
+        )
+        self._index: Dict[int, List[int]] = {}
+        for block_id, hashes in enumerate(self._block_hashes):
+            self._index.setdefault(hashes[0], []).append(block_id)
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def iter_matches(self, line_hashes: Sequence[int]) -> Iterator[Tuple[int, int]]:
+        """
+        Yield every occurrence of every block in a page.
+
+        Args:
+            line_hashes: Hashes of the page's stripped lines
+
+        Yields:
+            (start line, block index) tuples in page order
+        """
+        n_lines = len(line_hashes)
+        for start, first_hash in enumerate(line_hashes):
+            block_ids = self._index.get(first_hash)
+            if not block_ids:
+                continue
+            for block_id in block_ids:
+                hashes = self._block_hashes[block_id]
+                length = len(hashes)
+                if start + length > n_lines:
+                    continue
+                if all(
+                    line_hashes[start + offset] == hashes[offset]
+                    for offset in range(1, length)
+                ):
+                    yield start, block_id
+
+    def find_occurrences(self, line_hashes: Sequence[int]) -> List[Tuple[int, int]]:
+        """
+        Find every occurrence of every block in a page.
+
+        Args:
+            line_hashes: Hashes of the page's stripped lines
+
+        Returns:
+            List of (start line, block length) tuples in page order
+        """
+        return [
+            (start, len(self._block_hashes[block_id]))
+            for start, block_id in self.iter_matches(line_hashes)
+        ]
+
+    def remove(self, lines: List[str]) -> List[str]:
+        """
+        Drop every line covered by a block occurrence.
+
+        Overlapping occurrences are merged, so each line is removed at most
+        once.
+
+        Args:
+            lines: The page's markdown lines (unstripped)
+
+        Returns:
+            The remaining lines in their original order
+        """
+        if not self._index or not lines:
+            return lines
+
+        removed = bytearray(len(lines))
+        for start, length in self.find_occurrences(hash_lines(lines)):
+            removed[start : start + length] = b"\x01" * length
+
+        if not any(removed):
+            return lines
+        return [line for line, drop in zip(lines, removed) if not drop]
+
+    def to_bytes(self) -> bytes:
+        """Serialize the compiled blocks into the binary artifact format."""
+        metadata = json.dumps(self.metadata, ensure_ascii=False).encode("utf-8")
+        parts = [
+            ARTIFACT_MAGIC,
+            struct.pack(">HI", ARTIFACT_VERSION, len(metadata)),
+            metadata,
+            struct.pack(">I", len(self.blocks)),
+        ]
+        for block, hashes in zip(self.blocks, self._block_hashes):
+            parts.append(struct.pack(f">I{len(hashes)}Q", len(hashes), *hashes))
+            for line in block:
+                encoded = line.encode("utf-8")
+                parts.append(struct.pack(">I", len(encoded)))
+                parts.append(encoded)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BoilerplateMatcher":
+        """
+        Load a matcher from a binary artifact without rehashing its lines.
+
+        Raises:
+            ValueError: If the data is not an artifact of a supported version
+        """
+        try:
+            if data[:4] != ARTIFACT_MAGIC:
+                raise ValueError("Not a boilerplate artifact")
+            version, meta_len = struct.unpack_from(">HI", data, 4)
+            if version != ARTIFACT_VERSION:
+                raise ValueError(f"Unsupported boilerplate artifact version {version}")
+            offset = 10
+            metadata = json.loads(data[offset : offset + meta_len].decode("utf-8"))
+            offset += meta_len
+
+            (n_blocks,) = struct.unpack_from(">I", data, offset)
+            offset += 4
+            blocks: List[List[str]] = []
+            block_hashes: List[Tuple[int, ...]] = []
+            for _ in range(n_blocks):
+                (n_lines,) = struct.unpack_from(">I", data, offset)
+                offset += 4
+                block_hashes.append(struct.unpack_from(f">{n_lines}Q", data, offset))
+                offset += 8 * n_lines
+                block = []
+                for _ in range(n_lines):
+                    (length,) = struct.unpack_from(">I", data, offset)
+                    offset += 4
+                    block.append(data[offset : offset + length].decode("utf-8"))
+                    offset += length
+                blocks.append(block)
+        except (struct.error, UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Corrupt boilerplate artifact: {e}") from e
+
+        return cls(blocks, block_hashes=block_hashes, metadata=metadata)
@@ -1,61 +1,197 @@
 import logging
-import re
+import os
 import time
 import asyncio
-from typing import List, Optional, Dict
+from collections import OrderedDict
+from typing import List, Optional, Dict, Tuple, Union
 
+from dotenv import load_dotenv
 
 from src.core.aws.s3 import S3Operations
+from src.core.scraper.cleaning.boilerplate_matcher import BoilerplateMatcher
+from src.core.scraper.cleaning.noise_filter import NoiseFilters
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+BOILERPLATE_CACHE_SIZE = int(os.getenv("BOILERPLATE_CACHE_SIZE", "1024"))
+BOILERPLATE_NEGATIVE_TTL = int(os.getenv("BOILERPLATE_NEGATIVE_TTL", "300"))
+
 
 class BoilerplateRemover:
     """Removes boilerplate blocks from markdown and detects structural changes."""
 
-    def __init__(self, cache_ttl: int = 3600):
+    def __init__(
+        self,
+        cache_ttl: int = 3600,
+        negative_ttl: int = BOILERPLATE_NEGATIVE_TTL,
+        max_entries: int = BOILERPLATE_CACHE_SIZE,
+    ):
+        """
+        Initialize the remover.
+
+        Args:
+            cache_ttl: Seconds a shop's blocks are served before revalidation
+            negative_ttl: Seconds a missing S3 object is remembered
+            max_entries: Shops kept in the LRU cache
+        """
         self.s3 = S3Operations()
-        self.cache: Dict[str, dict] = {}
+        self.cache: OrderedDict[str, dict] = OrderedDict()
         self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max(1, max_entries)
+        self.noise_filters = NoiseFilters.from_env()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_from_cache(self, domain: str) -> Optional[dict]:
+        """Get the cache entry of a shop, marking it as recently used."""
+        entry = self.cache.get(domain)
+        if entry is not None:
+            self.cache.move_to_end(domain)
+        return entry
+
+    def _save_to_cache(
+        self,
+        domain: str,
+        blocks: Optional[List[List[str]]],
+        etag: Optional[str] = None,
+        key: Optional[str] = None,
+        matcher: Optional[BoilerplateMatcher] = None,
+        ttl: Optional[int] = None,
+    ):
+        """
+        Save blocks and their compiled matcher to cache. None caches a miss.
 
-    def _get_from_cache(self, domain: str) -> Optional[List[List[str]]]:
-        """Get blocks from cache if not expired."""
-        if domain in self.cache:
-            entry = self.cache[domain]
-            if time.time() - entry["timestamp"] < self.cache_ttl:
-                return entry["blocks"]
-        return None
+        `key` and `etag` identify the S3 object the entry was loaded from.
+        """
+        if ttl is None:
+            ttl = self.cache_ttl if blocks is not None else self.negative_ttl
+        if matcher is None and blocks is not None:
+            matcher = BoilerplateMatcher(blocks)
+        self.cache[domain] = {
+            "blocks": blocks,
+            "matcher": matcher,
+            "key": key,
+            "etag": etag,
+            "expires_at": time.time() + ttl,
+        }
+        self.cache.move_to_end(domain)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def remember(self, domain: str, blocks: List[List[str]]) -> None:
+        """
+        Cache the result of a discovery so later pages skip it.
 
-    def _save_to_cache(self, domain: str, blocks: List[List[str]]):
-        """Save blocks to cache."""
-        self.cache[domain] = {"blocks": blocks, "timestamp": time.time()}
+        An empty result may only mean another process is still discovering,
+        so it is kept for the negative TTL and then looked up in S3 again.
+        """
+        self._save_to_cache(domain, blocks, ttl=None if blocks else self.negative_ttl)
+
+    def matcher_for(self, domain: str, blocks: List[List[str]]) -> BoilerplateMatcher:
+        """
+        Return the compiled matcher for a shop's blocks.
+
+        The matcher cached by `load_for_shop` is reused when it was built from
+        the same blocks; otherwise the blocks are compiled and cached.
+        """
+        entry = self._get_from_cache(domain)
+        if entry is None or entry["blocks"] is not blocks:
+            self._save_to_cache(domain, blocks)
+            entry = self.cache[domain]
+        return entry["matcher"]
 
     async def load_for_shop(
         self, domain: str, force_refresh: bool = False
     ) -> Optional[List[List[str]]]:
-        """Load boilerplate blocks from S3 with local caching."""
+        """
+        Load boilerplate blocks from S3 with local caching.
+
+        Hits and misses are cached with separate TTLs. Expired entries are
+        revalidated with their ETag, and concurrent loads of the same shop
+        share a single S3 request.
+        """
         if not force_refresh:
-            cached = self._get_from_cache(domain)
-            if cached is not None:
-                return cached
+            entry = self._get_from_cache(domain)
+            if entry is not None and entry["expires_at"] > time.time():
+                return entry["blocks"]
 
-        data = await asyncio.to_thread(
-            self.s3.download_json, f"boilerplate/{domain}.json"
+        task = self._inflight.get(domain)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._fetch(domain, revalidate=not force_refresh)
+            )
+            self._inflight[domain] = task
+
+            def _done(finished: asyncio.Future) -> None:
+                if self._inflight.get(domain) is finished:
+                    del self._inflight[domain]
+
+            task.add_done_callback(_done)
+        return await asyncio.shield(task)
+
+    async def _download(
+        self, key: str, etag: Optional[str]
+    ) -> Tuple[Optional[BoilerplateMatcher], Optional[str], bool]:
+        """Download the artifact or JSON object at `key` as a matcher."""
+        if key.endswith(".bin"):
+            body, new_etag, changed = await asyncio.to_thread(
+                self.s3.download_bytes_if_changed, key, etag
+            )
+            if body is None:
+                return None, new_etag, changed
+            try:
+                return BoilerplateMatcher.from_bytes(body), new_etag, True
+            except ValueError as e:
+                logger.warning(f"Ignoring boilerplate artifact {key}: {e}")
+                return None, None, True
+
+        data, new_etag, changed = await asyncio.to_thread(
+            self.s3.download_json_if_changed, key, etag
         )
         if data and "blocks" in data:
-            self._save_to_cache(domain, data["blocks"])
-            return data["blocks"]
+            return BoilerplateMatcher(data["blocks"]), new_etag, True
+        return None, new_etag, changed
 
+    async def _fetch(
+        self, domain: str, revalidate: bool = True
+    ) -> Optional[List[List[str]]]:
+        """
+        Download a shop's blocks, reusing the cached copy if S3 answers 304.
+
+        The compiled artifact is preferred; the JSON form is the fallback for
+        shops discovered before artifacts were published.
+        """
+        entry = self.cache.get(domain) if revalidate else None
+
+        for key in (f"boilerplate/{domain}.bin", f"boilerplate/{domain}.json"):
+            etag = entry["etag"] if entry is not None and entry["key"] == key else None
+            matcher, new_etag, changed = await self._download(key, etag)
+            if not changed and entry is not None:
+                entry["expires_at"] = time.time() + (
+                    self.cache_ttl if entry["blocks"] is not None else self.negative_ttl
+                )
+                return entry["blocks"]
+            if matcher is not None:
+                self._save_to_cache(domain, matcher.blocks, new_etag, key, matcher)
+                return matcher.blocks
+
+        self._save_to_cache(domain, None)
         return None
 
     def clean(
-        self, markdown: str, blocks: List[List[str]], remove_noise: bool = True
+        self,
+        markdown: str,
+        blocks: Union[List[List[str]], BoilerplateMatcher],
+        remove_noise: bool = True,
     ) -> str:
         """
         Remove boilerplate blocks from markdown using block-based matching.
         Args:
             markdown: The original markdown text.
-            blocks: List of boilerplate blocks (each block is a list of lines).
+            blocks: List of boilerplate blocks (each block is a list of lines),
+                or a matcher compiled from them.
             remove_noise: Whether to remove noise sections before boilerplate removal.
         """
         cleaned_markdown = markdown
@@ -66,106 +202,22 @@ class BoilerplateRemover:
         if not blocks or not cleaned_markdown:
             return cleaned_markdown
 
-        # Split markdown into lines
-        md_lines = cleaned_markdown.splitlines()
-        stripped_lines = [line.strip() for line in md_lines]
-
-        # Collect positions to remove, in reverse order
-        positions = []
-        for block in blocks:
-            if not block:
-                continue
-            start = 0
-            while True:
-                idx = self.find_subsequence(stripped_lines[start:], block)
-                if idx == -1:
-                    break
-                actual_start = start + idx
-                positions.append((actual_start, len(block)))
-                start = actual_start + 1  # Move past this occurrence
-
-        # Sort positions by start index descending
-        positions.sort(reverse=True)
-
-        # Remove the blocks
-        for start, length in positions:
-            del md_lines[start : start + length]
+        matcher = (
+            blocks
+            if isinstance(blocks, BoilerplateMatcher)
+            else BoilerplateMatcher(blocks)
+        )
+
+        # Remove all block occurrences in a single pass over the lines
+        md_lines = matcher.remove(cleaned_markdown.splitlines())
 
         # Rejoin cleaned lines
         cleaned_markdown = "\n".join(md_lines)
 
         return cleaned_markdown
 
-    def find_subsequence(self, lines: List[str], sub: List[str]) -> int:
-        """Find the start index of sub in lines, or -1 if not found."""
-        if len(sub) == 0:
-            return -1
-        for i in range(len(lines) - len(sub) + 1):
-            if lines[i : i + len(sub)] == sub:
-                return i
-        return -1
-
-    def remove_noise_sections(self, markdown_text: str) -> str:
-        lines = markdown_text.splitlines()
-        clean_lines = []
-        skip = False
-        current_skip_level = 0
-        trigger_keywords = [
-            "related products",
-            "ähnliche produkte",
-            "lieferung",
-            "unsere bundesweiten lieferkosten",
-            "other items",
-            "search",
-            "similar products",
-            "recommended products",
-            "empfohlene produkte",
-            "angebote",
-            "weitere ausgewählte angebote des anbieters",
-            "similar items",
-            "agb",
-            "lieferkosten",
-            "das könnte dir auch gefallen",
-            "unsere arbeit",
-            "versand",
-            "liebe kunden",
-            "facebook",
-            "instagram",
-            "twitter",
-            "youtube",
-            "pinterest",
-            "kontakt",
-            "newsletter",
-            "impressum",
-            "datenschutz",
-            "terms of service",
-            "privacy policy",
-            "terms and conditions",
-            "follow us",
-            "social",
-            "social media",
-            "links",
-        ]
-
-        for line in lines:
-            stripped = line.strip()
-            header_match = re.match(r"^(#{1,6})\s*(.*)", stripped)
-
-            if header_match:
-                level = len(header_match.group(1))
-                header_text = header_match.group(2).lower().strip()
-
-                # If this is a trigger header, start skipping
-                if any(t in header_text for t in trigger_keywords):
-                    skip = True
-                    current_skip_level = level
-                    continue
-
-                # Stop skipping when a new header of same or higher level appears
-                if skip and level <= current_skip_level:
-                    skip = False
-
-            if not skip:
-                clean_lines.append(line)
-
-        return "\n".join(clean_lines)
+    def remove_noise_sections(
+        self, markdown_text: str, domain: Optional[str] = None
+    ) -> str:
+        """Remove noise sections using the filter configured for the domain."""
+        return self.noise_filters.for_domain(domain).remove(markdown_text)
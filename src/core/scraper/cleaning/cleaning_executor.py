@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from dotenv import load_dotenv
+
+from src.core.scraper.cleaning.boilerplate_matcher import BoilerplateMatcher
+from src.core.scraper.cleaning.noise_filter import NoiseFilter, NoiseFilters
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Number of cleaning processes; 0 cleans inline on the event loop
+CLEANING_PROCESSES = int(os.getenv("CLEANING_PROCESSES", "2"))
+MAX_MARKDOWN_LENGTH = 10000
+# Cleaned pages between two log lines of the fired noise triggers
+NOISE_TRIGGER_REPORT_PAGES = int(os.getenv("NOISE_TRIGGER_REPORT_PAGES", "1000"))
+
+# State of a cleaning process, set up by `_init_worker`
+_noise_filters: Optional[NoiseFilters] = None
+_matchers: Dict[str, Tuple[str, BoilerplateMatcher]] = {}
+_MAX_CACHED_MATCHERS = 256
+
+
+def clean_markdown(
+    markdown: str,
+    noise_filter: NoiseFilter,
+    matcher: Optional[BoilerplateMatcher] = None,
+    max_length: int = MAX_MARKDOWN_LENGTH,
+) -> str:
+    """
+    Remove noise sections and boilerplate blocks, then truncate.
+
+    Noise removal streams into block removal, so the page is split and joined
+    only once.
+    """
+    lines = list(noise_filter.iter_lines(markdown.splitlines()))
+    if matcher is not None:
+        lines = matcher.remove(lines)
+    cleaned = "\n".join(lines)
+
+    if max_length and len(cleaned) > max_length:
+        logger.warning(
+            f"Markdown length {len(cleaned)} exceeds limit of {max_length} after cleaning."
+        )
+        cleaned = cleaned[:max_length]
+    return cleaned
+
+
+def _clean_counted(
+    markdowns: List[str],
+    noise_filter: NoiseFilter,
+    matcher: Optional[BoilerplateMatcher],
+    max_length: int,
+) -> Tuple[List[str], Dict[str, int]]:
+    """Clean markdowns and return the noise triggers that fired meanwhile."""
+    before = Counter(noise_filter.trigger_counts)
+    cleaned = [
+        clean_markdown(markdown, noise_filter, matcher, max_length)
+        for markdown in markdowns
+    ]
+    return cleaned, dict(noise_filter.trigger_counts - before)
+
+
+def _init_worker() -> None:
+    global _noise_filters
+    _noise_filters = NoiseFilters.from_env()
+
+
+def _clean_batch(
+    domain: str,
+    token: Optional[str],
+    artifact: Optional[bytes],
+    markdowns: List[str],
+    max_length: int,
+) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Clean a chunk of one domain inside a cleaning process.
+
+    Returns:
+        The cleaned markdowns and the noise triggers that fired, which the
+        parent process aggregates
+    """
+    matcher = None
+    if token is not None:
+        cached = _matchers.get(domain)
+        if cached is None or cached[0] != token:
+            if len(_matchers) >= _MAX_CACHED_MATCHERS:
+                _matchers.clear()
+            cached = (token, BoilerplateMatcher.from_bytes(artifact))
+            _matchers[domain] = cached
+        matcher = cached[1]
+
+    noise_filter = _noise_filters.for_domain(domain)
+    return _clean_counted(markdowns, noise_filter, matcher, max_length)
+
+
+class CleaningExecutor:
+    """
+    Runs markdown cleaning (noise sections, boilerplate blocks, truncation)
+    off the event loop.
+
+    Work is sent to a pool of spawned processes one chunk at a time. The
+    compiled matcher travels as its binary artifact and is kept per domain in
+    every process, so it is only rebuilt when the blocks change. With
+    `max_workers=0` cleaning runs inline.
+
+    The noise triggers that fired in any process are summed in
+    `trigger_counts` and logged every `report_pages` cleaned pages.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = CLEANING_PROCESSES,
+        max_length: int = MAX_MARKDOWN_LENGTH,
+        report_pages: int = NOISE_TRIGGER_REPORT_PAGES,
+    ):
+        """
+        Initialize the executor. Processes are started on first use.
+
+        Args:
+            max_workers: Number of cleaning processes, 0 to clean inline
+            max_length: Length the cleaned markdown is truncated to
+            report_pages: Cleaned pages between two trigger reports, 0 to
+                only report on close
+        """
+        self.max_workers = max(0, max_workers)
+        self.max_length = max_length
+        self.report_pages = report_pages
+        self.noise_filters = NoiseFilters.from_env()
+        self.trigger_counts: Counter = Counter()
+        self.cleaned_pages = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._artifacts: "WeakKeyDictionary[BoilerplateMatcher, Tuple[str, bytes]]" = (
+            WeakKeyDictionary()
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    def _artifact(self, matcher: BoilerplateMatcher) -> Tuple[str, bytes]:
+        """Serialized matcher and a token identifying its content."""
+        artifact = self._artifacts.get(matcher)
+        if artifact is None:
+            data = matcher.to_bytes()
+            token = hashlib.blake2b(data, digest_size=16).hexdigest()
+            artifact = (token, data)
+            self._artifacts[matcher] = artifact
+        return artifact
+
+    def _clean_inline(
+        self, domain: str, markdowns: List[str], matcher: Optional[BoilerplateMatcher]
+    ) -> Tuple[List[str], Dict[str, int]]:
+        noise_filter = self.noise_filters.for_domain(domain)
+        return _clean_counted(markdowns, noise_filter, matcher, self.max_length)
+
+    def _record(self, result: Tuple[List[str], Dict[str, int]]) -> List[str]:
+        cleaned, fired = result
+        self.trigger_counts.update(fired)
+        previous = self.cleaned_pages
+        self.cleaned_pages += len(cleaned)
+        if self.report_pages and (
+            self.cleaned_pages // self.report_pages > previous // self.report_pages
+        ):
+            self.report_triggers()
+        return cleaned
+
+    def report_triggers(self, top: int = 20) -> None:
+        """Log the most frequently fired noise triggers."""
+        if not self.trigger_counts:
+            return
+        fired = ", ".join(
+            f"{trigger}={count}"
+            for trigger, count in self.trigger_counts.most_common(top)
+        )
+        logger.info(
+            f"Noise triggers fired in {self.cleaned_pages} cleaned pages: {fired}"
+        )
+
+    async def clean_many(
+        self,
+        domain: str,
+        markdowns: List[str],
+        matcher: Optional[BoilerplateMatcher] = None,
+    ) -> List[str]:
+        """
+        Clean all markdowns of one domain in a single round trip.
+
+        Args:
+            domain: Shop domain, selects the noise triggers
+            markdowns: Pages to clean
+            matcher: Compiled boilerplate blocks of the shop, if any
+
+        Returns:
+            Cleaned markdowns in input order
+        """
+        if not markdowns:
+            return []
+        if self.max_workers == 0:
+            return self._record(self._clean_inline(domain, markdowns, matcher))
+
+        token, artifact = self._artifact(matcher) if matcher else (None, None)
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self._get_pool(),
+                _clean_batch,
+                domain,
+                token,
+                artifact,
+                markdowns,
+                self.max_length,
+            )
+        except BrokenProcessPool:
+            logger.warning("Cleaning process pool broke, restarting it")
+            pool, self._pool = self._pool, None
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            result = self._clean_inline(domain, markdowns, matcher)
+        return self._record(result)
+
+    async def clean(
+        self,
+        domain: str,
+        markdown: str,
+        matcher: Optional[BoilerplateMatcher] = None,
+    ) -> str:
+        """Clean a single markdown."""
+        return (await self.clean_many(domain, [markdown], matcher))[0]
+
+    def close(self) -> None:
+        """Stop the cleaning processes and report the fired noise triggers."""
+        self.report_triggers()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Optional JSON file: {"default": [...], "domains": {"shop.de": [...]}}
+NOISE_TRIGGERS_CONFIG = os.getenv("NOISE_TRIGGERS_CONFIG")
+
+DEFAULT_NOISE_TRIGGERS = (
+    "related products",
+    "ähnliche produkte",
+    "lieferung",
+    "unsere bundesweiten lieferkosten",
+    "other items",
+    "search",
+    "similar products",
+    "recommended products",
+    "empfohlene produkte",
+    "angebote",
+    "weitere ausgewählte angebote des anbieters",
+    "similar items",
+    "agb",
+    "lieferkosten",
+    "das könnte dir auch gefallen",
+    "unsere arbeit",
+    "versand",
+    "liebe kunden",
+    "facebook",
+    "instagram",
+    "twitter",
+    "youtube",
+    "pinterest",
+    "kontakt",
+    "newsletter",
+    "impressum",
+    "datenschutz",
+    "terms of service",
+    "privacy policy",
+    "terms and conditions",
+    "follow us",
+    "social",
+    "social media",
+    "links",
+)
+
+_HEADER_PATTERN = re.compile(r"(#{1,6})\s*(.*)")
+
+
+class NoiseFilter:
+    """
+    Strips noise sections (related products, shipping, social links, ...) from
+    markdown.
+
+    A section starts at a header containing one of the trigger keywords and
+    ends at the next header of the same or a higher level. All triggers are
+    compiled into one regex, and lines are processed in a single streaming
+    pass. Fired triggers are counted in `trigger_counts` to help tune the list.
+    """
+
+    def __init__(self, triggers: Sequence[str] = DEFAULT_NOISE_TRIGGERS):
+        """
+        Compile the filter.
+
+        Args:
+            triggers: Keywords that mark a header as the start of a noise section
+        """
+        self.triggers = sorted(
+            {t.strip().lower() for t in triggers if t.strip()}, key=len, reverse=True
+        )
+        self._pattern = (
+            re.compile("|".join(re.escape(t) for t in self.triggers))
+            if self.triggers
+            else None
+        )
+        self.trigger_counts: Counter = Counter()
+
+    def match_trigger(self, header_text: str) -> Optional[str]:
+        """Return the trigger found in a header text, if any."""
+        if self._pattern is None:
+            return None
+        match = self._pattern.search(header_text.lower())
+        return match.group(0) if match else None
+
+    def iter_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield the lines that are not part of a noise section."""
+        skip = False
+        current_skip_level = 0
+
+        for line in lines:
+            stripped = line.lstrip()
+            if stripped.startswith("#"):
+                header_match = _HEADER_PATTERN.match(stripped)
+                level = len(header_match.group(1))
+                trigger = self.match_trigger(header_match.group(2))
+
+                # If this is a trigger header, start skipping
+                if trigger:
+                    self.trigger_counts[trigger] += 1
+                    skip = True
+                    current_skip_level = level
+                    continue
+
+                # Stop skipping when a new header of same or higher level appears
+                if skip and level <= current_skip_level:
+                    skip = False
+
+            if not skip:
+                yield line
+
+    def remove(self, markdown_text: str) -> str:
+        """Remove all noise sections from a markdown document."""
+        return "\n".join(self.iter_lines(markdown_text.splitlines()))
+
+
+def load_noise_config(path: Optional[str]) -> Dict[str, List[str]]:
+    """
+    Read the trigger configuration.
+
+    Returns:
+        Mapping of domain to its triggers. The key "" holds the default list.
+    """
+    config: Dict[str, List[str]] = {"": list(DEFAULT_NOISE_TRIGGERS)}
+    if not path:
+        return config
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load noise trigger config {path}: {e}")
+        return config
+
+    if "default" in data:
+        config[""] = list(data["default"])
+    for domain, triggers in data.get("domains", {}).items():
+        config[domain.lower()] = config[""] + list(triggers)
+    return config
+
+
+class NoiseFilters:
+    """Compiled noise filters: the default one and per-domain overrides."""
+
+    def __init__(self, config: Optional[Dict[str, List[str]]] = None):
+        config = config or {"": list(DEFAULT_NOISE_TRIGGERS)}
+        self.default = NoiseFilter(config.get("", DEFAULT_NOISE_TRIGGERS))
+        self._by_domain = {
+            domain: NoiseFilter(triggers)
+            for domain, triggers in config.items()
+            if domain
+        }
+
+    @classmethod
+    def from_env(cls) -> "NoiseFilters":
+        return cls(load_noise_config(NOISE_TRIGGERS_CONFIG))
+
+    def for_domain(self, domain: Optional[str] = None) -> NoiseFilter:
+        """Return the filter configured for a domain, or the default one."""
+        if domain:
+            return self._by_domain.get(domain.lower(), self.default)
+        return self.default
+
+    def trigger_counts(self) -> Counter:
+        """Fired triggers summed over all filters."""
+        total = Counter(self.default.trigger_counts)
+        for noise_filter in self._by_domain.values():
+            total.update(noise_filter.trigger_counts)
+        return total
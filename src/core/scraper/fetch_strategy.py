@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from crawl4ai import AsyncWebCrawler, HTTPCrawlerConfig
+from crawl4ai.async_crawler_strategy import AsyncHTTPCrawlerStrategy
+from crawl4ai.async_dispatcher import BaseDispatcher
+
+logger = logging.getLogger(__name__)
+
+MODE_HTTP = "http"
+MODE_BROWSER = "browser"
+
+# Structured markers that a server-rendered page describes a product
+PRODUCT_MARKUP_PATTERN = re.compile(
+    r'"@type"\s*:\s*\[?\s*"(?:https?://schema\.org/)?Product"'
+    r"|itemtype\s*=\s*[\"']https?://schema\.org/Product[\"']"
+    r"|property\s*=\s*[\"']og:type[\"']\s+content\s*=\s*[\"'](?:og:)?product",
+    re.IGNORECASE,
+)
+
+# A price in the visible text, e.g. "1.250,00 €", "EUR 300", "$ 99.99"
+PRICE_PATTERN = re.compile(
+    r"(?:[€$£]|\b(?:EUR|USD|GBP|CHF)\b)\s?\d[\d.,']*"
+    r"|\d[\d.,']*\s?(?:[€$£]|\b(?:EUR|USD|GBP|CHF)\b)",
+    re.IGNORECASE,
+)
+
+# Signs that the real content is only produced by client-side JavaScript
+JS_RENDERING_PATTERN = re.compile(
+    r"<div[^>]+id\s*=\s*[\"'](?:root|app|__next|__nuxt)[\"'][^>]*>\s*</div>"
+    r"|(?:enable|requires?|turn on)\s+javascript"
+    r"|javascript\s+(?:is\s+)?(?:required|disabled)",
+    re.IGNORECASE,
+)
+
+
+def build_http_crawler(max_connections: int = 100) -> AsyncWebCrawler:
+    """
+    Build a crawler that fetches pages with pooled aiohttp GET requests.
+
+    The crawler shares crawl4ai's scraping and markdown pipeline with the
+    browser crawler, so markdown (and with it the content hash) does not
+    depend on which fetch mode produced it.
+    """
+    strategy = AsyncHTTPCrawlerStrategy(
+        browser_config=HTTPCrawlerConfig(),
+        max_connections=max_connections,
+    )
+    return AsyncWebCrawler(crawler_strategy=strategy)
+
+
+def has_product_signals(html: str, markdown: str) -> bool:
+    """Return True if static HTML looks like a complete product page."""
+    if PRODUCT_MARKUP_PATTERN.search(html or ""):
+        return True
+    return bool(PRICE_PATTERN.search(markdown or ""))
+
+
+def has_js_rendering_markers(html: str) -> bool:
+    """Return True if the page relies on client-side rendering for its content."""
+    return bool(JS_RENDERING_PATTERN.search(html or ""))
+
+
+class HybridFetcher:
+    """
+    Fetches product pages over plain HTTP and falls back to the browser.
+
+    The first chunk of a domain is fetched over HTTP. Pages without product
+    signals, pages with JS-rendering markers and failed requests are re-fetched
+    with the headless browser. If enough of that first chunk was usable as
+    static HTML, the domain stays in HTTP mode; otherwise every further URL of
+    the domain goes straight to the browser. The decision is kept per domain
+    for the lifetime of the fetcher.
+    """
+
+    def __init__(
+        self,
+        http_crawler: Optional[AsyncWebCrawler] = None,
+        min_static_ratio: float = 0.5,
+        min_markdown_length: int = 200,
+    ):
+        """
+        Initialize the fetcher.
+
+        Args:
+            http_crawler: Crawler used for plain HTTP fetches. Built with
+                build_http_crawler() when omitted.
+            min_static_ratio: Share of pages of the first chunk that must be
+                usable as static HTML for a domain to stay in HTTP mode.
+            min_markdown_length: Markdown shorter than this is treated as an
+                incomplete render.
+        """
+        self._http_crawler = http_crawler or build_http_crawler()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self.min_static_ratio = min_static_ratio
+        self.min_markdown_length = min_markdown_length
+        self._decisions: Dict[str, str] = {}
+
+    async def __aenter__(self) -> "HybridFetcher":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        # Concurrent fetches must not start the HTTP crawler twice
+        async with self._start_lock:
+            if not self._started:
+                await self._http_crawler.start()
+                self._started = True
+
+    async def close(self) -> None:
+        async with self._start_lock:
+            if self._started:
+                await self._http_crawler.close()
+                self._started = False
+
+    def mode_for(self, domain: str) -> Optional[str]:
+        """Return the remembered fetch mode for a domain, if any."""
+        return self._decisions.get(domain)
+
+    def is_usable(self, result: Any) -> bool:
+        """Check whether a plain HTTP result can replace a browser render."""
+        if not getattr(result, "success", False):
+            return False
+
+        html = getattr(result, "html", "") or ""
+        markdown = str(getattr(result, "markdown", "") or "")
+        if len(markdown) < self.min_markdown_length:
+            return False
+        if has_js_rendering_markers(html):
+            return False
+        return has_product_signals(html, markdown)
+
+    async def fetch_many(
+        self,
+        browser_crawler: AsyncWebCrawler,
+        urls: List[str],
+        domain: str,
+        run_config: Any,
+        dispatcher_factory: Optional[Callable[[], BaseDispatcher]] = None,
+    ) -> List[Any]:
+        """
+        Fetch a chunk of URLs of one domain.
+
+        Args:
+            browser_crawler: Started browser crawler used for the fallback
+            urls: URLs to fetch
+            domain: Domain the URLs belong to
+            run_config: Crawler run configuration shared by both modes
+            dispatcher_factory: Builds the dispatcher for each arun_many call,
+                so both modes go through the same rate limiting
+
+        Returns:
+            Crawl results in the order of `urls`.
+        """
+
+        def dispatcher() -> Optional[BaseDispatcher]:
+            return dispatcher_factory() if dispatcher_factory else None
+
+        if self._decisions.get(domain) == MODE_BROWSER:
+            return await browser_crawler.arun_many(
+                urls, config=run_config, dispatcher=dispatcher()
+            )
+
+        await self.start()
+        http_results = await self._http_crawler.arun_many(
+            urls, config=run_config, dispatcher=dispatcher()
+        )
+        http_by_url = {result.url: result for result in http_results}
+        results_by_url = {}
+        fallback_urls = []
+        for url in urls:
+            result = http_by_url.get(url)
+            if result is not None and self.is_usable(result):
+                results_by_url[url] = result
+            else:
+                fallback_urls.append(url)
+
+        if domain not in self._decisions:
+            static_ratio = len(results_by_url) / len(urls) if urls else 0.0
+            mode = MODE_HTTP if static_ratio >= self.min_static_ratio else MODE_BROWSER
+            self._decisions[domain] = mode
+            logger.info(
+                f"Using {mode} fetch mode for {domain} "
+                f"({static_ratio:.0%} of pages usable as static HTML)"
+            )
+
+        if fallback_urls:
+            browser_results = await browser_crawler.arun_many(
+                fallback_urls, config=run_config, dispatcher=dispatcher()
+            )
+            for result in browser_results:
+                results_by_url[result.url] = result
+
+        return [results_by_url[url] for url in urls if url in results_by_url]
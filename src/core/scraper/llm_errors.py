@@ -0,0 +1,52 @@
+import asyncio
+
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    InternalServerError,
+    LengthFinishReasonError,
+    RateLimitError,
+)
+
+
+class LLMError(Exception):
+    """Base class of failed LLM requests."""
+
+    retryable = False
+
+
+class LLMTransientError(LLMError):
+    """Timeouts, connection errors, 5xx and 429: worth retrying after a delay."""
+
+    retryable = True
+
+
+class LLMTruncatedError(LLMError):
+    """The answer hit the token limit; may succeed with a bigger budget."""
+
+
+class LLMRequestError(LLMError):
+    """The server rejected the request (4xx); retrying will not help."""
+
+
+def classify_error(error: Exception) -> LLMError:
+    """
+    Map an exception raised by the OpenAI client onto the LLM error model.
+
+    Errors that are already typed are returned unchanged.
+    """
+    if isinstance(error, LLMError):
+        return error
+    if isinstance(error, LengthFinishReasonError):
+        typed: LLMError = LLMTruncatedError(str(error))
+    elif isinstance(
+        error,
+        (APIConnectionError, InternalServerError, RateLimitError, asyncio.TimeoutError),
+    ):
+        typed = LLMTransientError(f"{type(error).__name__}: {error}")
+    elif isinstance(error, APIStatusError):
+        typed = LLMRequestError(f"{type(error).__name__}: {error}")
+    else:
+        typed = LLMError(f"{type(error).__name__}: {error}")
+    typed.__cause__ = error
+    return typed
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated base URLs of OpenAI-compatible (vLLM) servers
+LLM_ENDPOINTS = os.getenv("LLM_ENDPOINTS", "http://localhost:8003/v1")
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "Qwen/Qwen3-8B-AWQ")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "dummy")
+LLM_FAILURE_THRESHOLD = int(os.getenv("LLM_FAILURE_THRESHOLD", "3"))
+LLM_COOLDOWN_SECONDS = float(os.getenv("LLM_COOLDOWN_SECONDS", "30"))
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))
+
+# Errors that say something about the server rather than the request
+ENDPOINT_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+
+
+@dataclass
+class LLMEndpoint:
+    """One OpenAI-compatible server with its load and health counters."""
+
+    base_url: str
+    client: AsyncOpenAI
+    in_flight: int = 0
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    latency_total: float = 0.0
+    last_error: Optional[str] = field(default=None, repr=False)
+
+    def is_open(self, now: float) -> bool:
+        """Whether the circuit is open, i.e. the endpoint is skipped."""
+        return self.open_until > now
+
+    def latency(self) -> float:
+        """Average latency of completed requests in seconds."""
+        completed = self.requests - self.failures
+        return self.latency_total / completed if completed else 0.0
+
+
+class LLMEndpointPool:
+    """
+    Pool of OpenAI-compatible LLM servers used as one client.
+
+    Every request goes to the endpoint with the fewest outstanding requests
+    (ties go to the lower average latency). After `failure_threshold`
+    consecutive transport or 5xx errors an endpoint's circuit opens and it is
+    skipped for `cooldown` seconds; a background health check closes it early
+    once the server answers again. If every circuit is open, the endpoint
+    that opened first is tried anyway, so a single-server setup keeps working
+    once its server is back.
+    """
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        model: str = LLM_MODEL_NAME,
+        api_key: str = LLM_API_KEY,
+        failure_threshold: int = LLM_FAILURE_THRESHOLD,
+        cooldown: float = LLM_COOLDOWN_SECONDS,
+        health_interval: float = LLM_HEALTH_INTERVAL,
+        client_factory: Optional[Callable[[str], AsyncOpenAI]] = None,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            base_urls: Base URLs of the servers, e.g. http://gpu-1:8003/v1
+            model: Model name served by all endpoints
+            api_key: API key sent to the servers
+            failure_threshold: Consecutive failures that open a circuit
+            cooldown: Seconds an open circuit stays open
+            health_interval: Seconds between health checks of open circuits
+            client_factory: Builds the client of an endpoint from its URL
+        """
+        if not base_urls:
+            raise ValueError("At least one LLM endpoint is required")
+
+        # Retries are handled by the caller's retry policy, which can fail over
+        factory = client_factory or (
+            lambda url: AsyncOpenAI(base_url=url, api_key=api_key, max_retries=0)
+        )
+        self.model = model
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.health_interval = health_interval
+        self.endpoints = [LLMEndpoint(url, factory(url)) for url in base_urls]
+        self._health_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "LLMEndpointPool":
+        urls = [url.strip() for url in LLM_ENDPOINTS.split(",") if url.strip()]
+        return cls(urls)
+
+    def _select(self) -> LLMEndpoint:
+        now = time.monotonic()
+        closed = [e for e in self.endpoints if not e.is_open(now)]
+        if not closed:
+            return min(self.endpoints, key=lambda e: e.open_until)
+        return min(closed, key=lambda e: (e.in_flight, e.latency()))
+
+    def _record_success(self, endpoint: LLMEndpoint, elapsed: float) -> None:
+        endpoint.latency_total += elapsed
+        if endpoint.consecutive_failures or endpoint.open_until:
+            logger.info(f"LLM endpoint {endpoint.base_url} recovered")
+        endpoint.consecutive_failures = 0
+        endpoint.open_until = 0.0
+
+    def _record_failure(self, endpoint: LLMEndpoint, error: Exception) -> None:
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        endpoint.last_error = f"{type(error).__name__}: {error}"
+        if endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.open_until = time.monotonic() + self.cooldown
+            logger.warning(
+                f"Opening circuit of LLM endpoint {endpoint.base_url} for "
+                f"{self.cooldown:.0f}s after {endpoint.consecutive_failures} "
+                f"failures: {endpoint.last_error}"
+            )
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[LLMEndpoint]:
+        """
+        Lease the least busy endpoint for one request.
+
+        Transport and server errors raised inside the block count against the
+        endpoint; other errors (bad requests, truncation, ...) do not.
+        """
+        endpoint = self._select()
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        start = time.perf_counter()
+        try:
+            yield endpoint
+        except ENDPOINT_ERRORS as e:
+            self._record_failure(endpoint, e)
+            raise
+        else:
+            self._record_success(endpoint, time.perf_counter() - start)
+        finally:
+            endpoint.in_flight -= 1
+
+    async def check_health(self) -> None:
+        """Probe the endpoints with open circuits and close those that answer."""
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if not endpoint.is_open(now):
+                continue
+            try:
+                await endpoint.client.models.list()
+            except Exception as e:
+                logger.debug(f"LLM endpoint {endpoint.base_url} still unhealthy: {e}")
+                continue
+            self._record_success(endpoint, 0.0)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.warning(f"LLM health check failed: {e}")
+
+    def start(self) -> None:
+        """Start the background health checks."""
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint load, error and latency counters."""
+        now = time.monotonic()
+        return {
+            e.base_url: {
+                "in_flight": e.in_flight,
+                "requests": e.requests,
+                "failures": e.failures,
+                "avg_latency_s": round(e.latency(), 3),
+                "open": e.is_open(now),
+            }
+            for e in self.endpoints
+        }
+
+    async def close(self) -> None:
+        """Stop the health checks and close the clients."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        logger.info(f"LLM endpoint metrics: {self.metrics()}")
+        for endpoint in self.endpoints:
+            try:
+                await endpoint.client.close()
+            except Exception as e:
+                logger.debug(f"Failed to close LLM client {endpoint.base_url}: {e}")
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+from src.core.scraper.llm_errors import LLMTruncatedError, classify_error
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_TRUNCATION_MAX_TOKENS = int(os.getenv("LLM_TRUNCATION_MAX_TOKENS", "5000"))
+# Retries a domain may spend per request, and the burst it may spend at once
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+LLM_RETRY_BUDGET_RESERVE = float(os.getenv("LLM_RETRY_BUDGET_RESERVE", "10"))
+
+
+class RetryBudget:
+    """
+    Per-domain token bucket that caps retries to a share of the requests.
+
+    Every domain starts with `reserve` tokens. Each request deposits `ratio`
+    tokens (up to `reserve`) and each retry withdraws one, so in the long run
+    a domain retries at most `ratio` times per request, and a failing server
+    cannot be flooded with retries.
+    """
+
+    def __init__(
+        self,
+        ratio: float = LLM_RETRY_BUDGET_RATIO,
+        reserve: float = LLM_RETRY_BUDGET_RESERVE,
+    ):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens: Dict[str, float] = {}
+
+    def deposit(self, domain: Optional[str]) -> None:
+        key = domain or ""
+        tokens = self._tokens.get(key, self.reserve)
+        self._tokens[key] = min(self.reserve, tokens + self.ratio)
+
+    def withdraw(self, domain: Optional[str]) -> bool:
+        """Take one retry token; False if the domain's budget is used up."""
+        key = domain or ""
+        tokens = self._tokens.get(key, self.reserve)
+        if tokens < 1:
+            return False
+        self._tokens[key] = tokens - 1
+        return True
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How failed LLM requests are retried.
+
+    Transient errors are retried with exponential backoff and full jitter, a
+    truncated answer is retried once with the caller's `truncation_max_tokens`
+    (if it gave one), and all other errors fail immediately. Every retry
+    needs a token from the domain's retry budget.
+    """
+
+    max_attempts: int = LLM_MAX_ATTEMPTS
+    base_delay: float = LLM_RETRY_BASE_DELAY
+    max_delay: float = LLM_RETRY_MAX_DELAY
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def run(
+        self,
+        request: Callable[[int], Awaitable[T]],
+        max_tokens: int,
+        budget: RetryBudget,
+        domain: Optional[str] = None,
+        truncation_max_tokens: Optional[int] = None,
+    ) -> T:
+        """
+        Run a request with retries.
+
+        Args:
+            request: Sends the request with the given max_tokens
+            max_tokens: Token limit of the first attempt
+            budget: Retry budget shared by all requests
+            domain: Budget key
+            truncation_max_tokens: Token limit of the retry of a truncated
+                answer; None does not retry truncated answers
+
+        Raises:
+            LLMError: The typed error of the last attempt
+        """
+        budget.deposit(domain)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await request(max_tokens)
+            except Exception as e:
+                error = classify_error(e)
+
+            if isinstance(error, LLMTruncatedError):
+                retry = (
+                    truncation_max_tokens is not None
+                    and max_tokens < truncation_max_tokens
+                )
+                max_tokens = truncation_max_tokens or max_tokens
+            else:
+                retry = error.retryable and attempt < self.max_attempts
+            if not retry:
+                raise error
+            if not budget.withdraw(domain):
+                logger.warning(f"Retry budget of {domain or 'default'} used up")
+                raise error
+
+            delay = (
+                0.0 if isinstance(error, LLMTruncatedError) else self.backoff(attempt)
+            )
+            logger.info(
+                f"Retrying LLM request (attempt {attempt + 1}) in {delay:.2f}s: {error}"
+            )
+            await asyncio.sleep(delay)
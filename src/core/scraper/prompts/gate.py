@@ -0,0 +1,12 @@
+GATE_SYSTEM_PROMPT = """
+You check scraped web pages of antique shops and auction houses.
+Answer whether the page describes exactly ONE specific item for sale (a product
+or auction lot detail page). Category pages, search results, listings of many
+items, blog posts and info pages are NOT product pages.
+Return RAW JSON ONLY: {"is_product": true} or {"is_product": false}
+"""
+
+GATE_PROMPT_TEMPLATE = """
+### SCRAPED_TEXT
+{markdown}
+"""
@@ -1,23 +1,117 @@
 import json
 import logging
-from typing import Optional
+import os
+import re
+from typing import Iterator, List, Optional
 from datetime import datetime, timezone
 
+from dotenv import load_dotenv
 from src.core.scraper.prompts.system import SYSTEM_PROMPT_TEMPLATE
-from src.core.scraper.base import chat_completion
+from src.core.scraper.base import (
+    chat_completion,
+    retry_budget,
+    retry_policy,
+    stream_chat_completion,
+)
+from src.core.scraper.llm_errors import LLMError, LLMTruncatedError
+from src.core.scraper.llm_retry import LLM_TRUNCATION_MAX_TOKENS
 
 from pydantic import ValidationError
 
 from src.core.scraper.prompts.extractor import EXTRACTION_PROMPT_TEMPLATE
+from src.core.scraper.prompts.gate import GATE_PROMPT_TEMPLATE, GATE_SYSTEM_PROMPT
 from src.core.scraper.schemas.extracted_product import ExtractedProduct
+from src.core.scraper.schemas.product_gate import ProductGate
 from src.core.scraper.cleaning.boilerplate_remover import BoilerplateRemover
 from src.core.scraper.cleaning.boilerplate_discovery import BoilerplateDiscovery
+from src.core.scraper.cleaning.boilerplate_matcher import BoilerplateMatcher
+from src.core.scraper.cleaning.cleaning_executor import CleaningExecutor
+
+load_dotenv()
 
 # Logger is already initialized in base or can be kept here
 logger = logging.getLogger(__name__)
 
+# Stream responses and abort generation once the answer is known
+LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() == "true"
+
+# Two-stage extraction: a cheap is_product question before the full schema
+LLM_GATE_ENABLED = os.getenv("LLM_GATE_ENABLED", "false").lower() == "true"
+LLM_GATE_MAX_CHARS = int(os.getenv("LLM_GATE_MAX_CHARS", "4000"))
+LLM_GATE_MAX_TOKENS = 10
+
+# The schema does not change, so the system prompt is rendered once
+SYSTEM_PROMPT = SYSTEM_PROMPT_TEMPLATE.format(
+    schema=json.dumps(ExtractedProduct.model_json_schema(), indent=2),
+)
+
+_JSON_SPECIALS = re.compile(r'[{}"\\]')
+_IS_PRODUCT_PATTERN = re.compile(r'"is_product"\s*:\s*(true|false)')
+# Characters searched again before new text, so a match split across
+# deltas is still found
+_IS_PRODUCT_OVERLAP = 64
+
 boilerplate_remover = BoilerplateRemover()
 boilerplate_discovery = BoilerplateDiscovery()
+# Inline cleaning for single pages; workers pass a process-backed executor
+cleaning_executor = CleaningExecutor(max_workers=0)
+
+
+class JsonObjectScanner:
+    """
+    Incremental scanner for the first balanced JSON object in a text.
+
+    Only braces, quotes and backslashes are visited, braces inside strings are
+    ignored, and the state carries over between `feed` calls, so a streamed
+    response can be scanned chunk by chunk as it arrives.
+    """
+
+    def __init__(self):
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped_at = -1
+        self._offset = 0
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """
+        Scan the next part of the text.
+
+        Returns:
+            End offset (exclusive) of the object once it is closed, else None
+        """
+        if self.end is not None:
+            return self.end
+
+        for match in _JSON_SPECIALS.finditer(chunk):
+            pos = self._offset + match.start()
+            ch = match.group()
+            if self.start is None:
+                if ch == "{":
+                    self.start = pos
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if pos == self._escaped_at:
+                    continue
+                if ch == "\\":
+                    self._escaped_at = pos + 1
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = pos + 1
+                    break
+
+        self._offset += len(chunk)
+        return self.end
 
 
 def _find_balanced_brace_object(text: str) -> Optional[str]:
@@ -29,139 +123,201 @@ def _find_balanced_brace_object(text: str) -> Optional[str]:
     Returns:
         The substring containing the first balanced JSON object, or None if not found.
     """
-    start = None
-    depth = 0
-    for i, ch in enumerate(text):
-        if ch == "{":
-            if start is None:
-                start = i
-            depth += 1
-        elif ch == "}" and start is not None:
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
-    return None
+    scanner = JsonObjectScanner()
+    end = scanner.feed(text)
+    return text[scanner.start : end] if end is not None else None
 
 
-def _parse_llm_response(response_text: str) -> str:
-    """Parse LLM response to extract valid JSON.
+def _json_candidates(response_text: str) -> Iterator[str]:
+    """
+    Yield the texts to try decoding, cheapest first.
+
+    1. The response as is
+    2. The first balanced brace object (drops code fences and chatter)
+    3. That object with raw newlines replaced
+    """
+    yield response_text
+    candidate = _find_balanced_brace_object(response_text)
+    if candidate is None:
+        return
+    if candidate != response_text:
+        yield candidate
+    if "\n" in candidate:
+        yield candidate.replace("\n", " ")
 
-    Tries multiple parsing strategies in order:
-    1. Direct JSON parsing
-    2. Extract balanced brace object
-    3. Sanitize newlines and retry
 
-    Args:
-        response_text: Raw text response from the LLM
+def decode_product(response_text: str) -> Optional[ExtractedProduct]:
+    """
+    Decode an LLM response straight into a validated product.
+
+    Every candidate is parsed and validated in one pass by pydantic; the next
+    candidate is only tried if the text was not valid JSON.
 
     Returns:
-        JSON string (either parsed data or empty '{}')
+        The product, or None if no candidate is valid JSON or validation fails
     """
     if not response_text:
-        return "{}"
+        return None
 
-    # Strategy 1: Try direct parsing
-    try:
-        parsed = json.loads(response_text)
-        return json.dumps(parsed, ensure_ascii=False)
-    except Exception:
-        pass
+    for candidate in _json_candidates(response_text):
+        try:
+            return ExtractedProduct.model_validate_json(candidate)
+        except ValidationError as e:
+            if e.errors()[0]["type"] != "json_invalid":
+                logger.warning(f"Extraction validation failed: {e.json()}")
+                return None
 
-    # Strategy 2: Try to find balanced JSON object
-    candidate = _find_balanced_brace_object(response_text)
-    if not candidate:
-        return "{}"
+    logger.warning("Failed to parse LLM response as JSON")
+    return None
 
-    try:
-        parsed = json.loads(candidate)
-        return json.dumps(parsed, ensure_ascii=False)
-    except Exception:
-        pass
 
-    # Strategy 3: Try sanitizing newlines
+async def _read_product_stream(
+    system_prompt: str, prompt: str, max_tokens: int
+) -> Optional[ExtractedProduct]:
+    """One streamed extraction attempt, aborted once the answer is known."""
+    scanner = JsonObjectScanner()
+    text = ""
+    searched = 0
+    decided = False
+    stream = stream_chat_completion(system_prompt, prompt, max_tokens=max_tokens)
     try:
-        safe = candidate.replace("\n", " ").strip()
-        parsed = json.loads(safe)
-        return json.dumps(parsed, ensure_ascii=False)
-    except Exception:
-        return "{}"
-
-
-def validate_extracted_data(data: dict) -> tuple[dict, Optional[str]]:
-    """Validate the extracted data using the Pydantic model.
+        async for delta in stream:
+            text += delta
+            if scanner.feed(delta) is not None:
+                break
+            if not decided and scanner.start is not None:
+                # Only the new text (and a little before it) can hold a match
+                start = max(scanner.start, searched - _IS_PRODUCT_OVERLAP)
+                match = _IS_PRODUCT_PATTERN.search(text, start)
+                searched = len(text)
+                if match:
+                    decided = True
+                    if match.group(1) == "false":
+                        return ExtractedProduct.model_construct(is_product=False)
+    finally:
+        await stream.aclose()
+
+    return decode_product(text)
+
+
+async def _stream_product(
+    system_prompt: str, prompt: str, domain: Optional[str] = None
+) -> Optional[ExtractedProduct]:
+    """
+    Extract with a streamed completion and stop generating as early as possible.
 
-    Args:
-        data: The parsed JSON data as a dictionary.
+    The request is aborted as soon as the JSON object is closed or the model
+    reports `is_product: false`. In the latter case an unvalidated product
+    with only `is_product=False` set is returned, so callers can tell
+    non-products from failures. A failed stream is restarted from scratch
+    under the same retry policy and domain budget as `chat_completion`.
 
-    Returns:
-        The validated data as a dictionary, or an empty dictionary if validation fails.
+    Raises:
+        LLMError: If the streamed request failed after retries
     """
-    if not data:
-        return {}, "No data to validate."
-
-    try:
-        validated_product = ExtractedProduct(**data)
-        return validated_product.model_dump(), None
-    except ValidationError as e:
-        return {}, e.json()
 
+    async def request(max_tokens: int) -> Optional[ExtractedProduct]:
+        return await _read_product_stream(system_prompt, prompt, max_tokens)
 
-async def _apply_boilerplate_removal(markdown: str, domain: str) -> str:
-    """Helper to handle boilerplate removal logic."""
-    clean_markdown = ""
     try:
-        # 1. Remove noise sections first
-        clean_markdown = boilerplate_remover.remove_noise_sections(markdown)
+        return await retry_policy.run(
+            request, 2500, retry_budget, domain, LLM_TRUNCATION_MAX_TOKENS
+        )
+    except LLMError as e:
+        logger.error(f"vLLM Error: {type(e).__name__}: {e}")
+        raise
 
-        # 2. Check length safety
-        if len(clean_markdown) > 20000:
-            logger.warning(
-                f"Markdown length {len(clean_markdown)} exceeds limit of 20000 after noise removal."
-            )
 
+async def _load_matcher(domain: str) -> Optional[BoilerplateMatcher]:
+    """Load (or discover) the shop's boilerplate blocks as a compiled matcher."""
+    try:
         blocks = await boilerplate_remover.load_for_shop(domain)
 
         # Check if we need to discover (blocks missing)
         if blocks is None:
             logger.info(f"Triggering boilerplate discovery for {domain}")
             blocks = await boilerplate_discovery.discover_and_save(domain)
+            boilerplate_remover.remember(domain, blocks)
 
         if blocks:
-            clean_markdown = boilerplate_remover.clean(
-                clean_markdown, blocks, remove_noise=False
-            )
-        else:
-            logger.info(f"No boilerplate blocks found for {domain}")
+            return boilerplate_remover.matcher_for(domain, blocks)
+        logger.info(f"No boilerplate blocks found for {domain}")
     except Exception as e:
         logger.error(f"Error during boilerplate removal for {domain}: {e}")
+    return None
 
-    return clean_markdown
 
+async def clean_for_extraction(
+    markdowns: List[str],
+    domain: str,
+    executor: Optional[CleaningExecutor] = None,
+) -> List[str]:
+    """
+    Remove noise sections and boilerplate blocks from a chunk of one shop.
 
-async def extract(
-    markdown: str,
-    domain: Optional[str] = None,
-    current_time: Optional[datetime] = None,
-) -> ExtractedProduct | None:
-    """Extract product information as JSON string from markdown using a single LLM step.
+    Args:
+        markdowns: Pages of the shop
+        domain: Shop domain
+        executor: Cleaning executor to run on; defaults to inline cleaning
+
+    Returns:
+        Cleaned and truncated markdowns in input order
+    """
+    matcher = await _load_matcher(domain)
+    return await (executor or cleaning_executor).clean_many(domain, markdowns, matcher)
+
+
+async def _apply_boilerplate_removal(markdown: str, domain: str) -> str:
+    """Helper to handle boilerplate removal logic."""
+    return (await clean_for_extraction([markdown], domain))[0]
+
+
+async def gate_product(markdown: str, domain: Optional[str] = None) -> Optional[bool]:
+    """
+    Ask the model only whether a page is a single product page.
+
+    The page is truncated to `LLM_GATE_MAX_CHARS`, and the answer is limited
+    to a tiny constrained JSON object, so the call costs a few output tokens
+    instead of a full extraction.
 
-    Pass CURRENT_TIME to the LLM so it can calculate auction dates.
     Args:
-        markdown: Page content (Markdown or HTML) to analyze.
-        domain: Optional shop domain for boilerplate removal.
-        current_time: Optional UTC datetime as reference for relative times.
+        markdown: Cleaned page content
+        domain: Shop domain, charged for retries
 
     Returns:
-        An ExtractedProduct object or None if validation fails or it's not a product.
+        The model's answer, or None if it was truncated or could not be
+        decoded (callers should then run the full extraction)
+
+    Raises:
+        LLMError: If the request failed after retries
     """
     if not isinstance(markdown, str):
         return None
 
-    # Apply Boilerplate Removal if domain is provided
-    if domain:
-        markdown = await _apply_boilerplate_removal(markdown, domain)
-        markdown = markdown[:10000]  # Ensure we don't exceed token limits
+    prompt = GATE_PROMPT_TEMPLATE.format(markdown=markdown[:LLM_GATE_MAX_CHARS])
+    try:
+        response_text = await chat_completion(
+            GATE_SYSTEM_PROMPT,
+            prompt,
+            response_format=ProductGate,
+            max_tokens=LLM_GATE_MAX_TOKENS,
+            domain=domain,
+            truncation_max_tokens=None,
+        )
+    except LLMTruncatedError:
+        logger.warning("Gate response was truncated, leaving the page undecided")
+        return None
+    try:
+        return ProductGate.model_validate_json(response_text).is_product
+    except ValidationError as e:
+        logger.warning(f"Gate response could not be decoded: {e}")
+        return None
+
 
+def build_extraction_prompt(
+    markdown: str, current_time: Optional[datetime] = None
+) -> str:
+    """Render the user prompt with CURRENT_TIME (UTC, defaults to now)."""
     if current_time is None:
         current_time = datetime.now(timezone.utc)
 
@@ -171,28 +327,44 @@ async def extract(
         .isoformat()
         .replace("+00:00", "Z")
     )
-
-    # Generate JSON schema from Pydantic model
-    schema_json = json.dumps(ExtractedProduct.model_json_schema(), indent=2)
-
-    system_prompt = SYSTEM_PROMPT_TEMPLATE.format(
-        schema=schema_json,
-    )
-    prompt_base = EXTRACTION_PROMPT_TEMPLATE.format(
+    return EXTRACTION_PROMPT_TEMPLATE.format(
         current_time=current_time_iso, markdown=markdown
     )
 
-    response_text = await chat_completion(system_prompt, prompt_base)
-    try:
-        parsed_data = json.loads(_parse_llm_response(response_text))
-    except (json.JSONDecodeError, TypeError) as e:
-        logger.warning(f"Failed to parse LLM response as JSON: {e}")
+
+async def extract(
+    markdown: str,
+    domain: Optional[str] = None,
+    current_time: Optional[datetime] = None,
+    clean: bool = True,
+) -> ExtractedProduct | None:
+    """Extract product information as JSON string from markdown using a single LLM step.
+
+    Pass CURRENT_TIME to the LLM so it can calculate auction dates.
+    Args:
+        markdown: Page content (Markdown or HTML) to analyze.
+        domain: Optional shop domain for boilerplate removal and retry budgets.
+        current_time: Optional UTC datetime as reference for relative times.
+        clean: Whether to clean the markdown (False if it already is).
+
+    Returns:
+        An ExtractedProduct object or None if validation fails or it's not a product.
+
+    Raises:
+        LLMError: If the LLM request failed after retries.
+    """
+    if not isinstance(markdown, str):
         return None
 
-    validated_data, last_exception = validate_extracted_data(parsed_data)
+    # Apply Boilerplate Removal if domain is provided
+    if domain and clean:
+        markdown = await _apply_boilerplate_removal(markdown, domain)
+        markdown = markdown[:10000]  # Ensure we don't exceed token limits
+
+    prompt_base = build_extraction_prompt(markdown, current_time)
 
-    if validated_data:
-        return ExtractedProduct(**validated_data)
+    if LLM_STREAMING:
+        return await _stream_product(SYSTEM_PROMPT, prompt_base, domain)
 
-    logger.warning(f"Extraction validation failed: {last_exception}")
-    return None
+    response_text = await chat_completion(SYSTEM_PROMPT, prompt_base, domain=domain)
+    return decode_product(response_text)
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import aiohttp
+from dotenv import load_dotenv
+
+from src.core.aws.database.models import URLEntry
+from src.core.aws.database.operations import DynamoDBOperations
+from src.core.utils.politeness import PolitenessScheduler, politeness_scheduler
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REVALIDATION_ENABLED = os.getenv("REVALIDATION_ENABLED", "true").lower() == "true"
+
+# Outcomes of a single revalidation request
+UNCHANGED = "unchanged"
+CHANGED = "changed"
+UNKNOWN = "unknown"
+
+
+def _header(headers: Mapping[str, Any], name: str) -> Optional[str]:
+    """Case-insensitive header lookup that works for plain dicts as well."""
+    value = headers.get(name)
+    if value is None:
+        for key, candidate in headers.items():
+            if key.lower() == name.lower():
+                value = candidate
+                break
+    return str(value) if value else None
+
+
+def validators_from_headers(
+    headers: Optional[Mapping[str, Any]],
+) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+    """
+    Extract ETag, Last-Modified and Content-Length from response headers.
+
+    Returns:
+        Tuple of (etag, last_modified, content_length)
+    """
+    if not headers:
+        return None, None, None
+
+    content_length = _header(headers, "Content-Length")
+    try:
+        length = int(content_length) if content_length else None
+    except ValueError:
+        length = None
+
+    return _header(headers, "ETag"), _header(headers, "Last-Modified"), length
+
+
+def _same_etag(stored: Optional[str], current: Optional[str]) -> bool:
+    """Compare two ETags, ignoring the weak-validator prefix."""
+    if not stored or not current:
+        return False
+    return stored.removeprefix("W/") == current.removeprefix("W/")
+
+
+class Revalidator:
+    """
+    Decides with cheap conditional requests which product pages changed.
+
+    For every URL whose entry carries validators from the last scrape, a HEAD
+    request with If-None-Match / If-Modified-Since is sent. A 304, or a 200
+    with the same ETag or the same Last-Modified (and Content-Length), marks
+    the page unchanged so the browser render can be skipped. Everything else,
+    including URLs without stored validators and failed requests, is rendered.
+    """
+
+    def __init__(
+        self,
+        db: DynamoDBOperations,
+        rate_limiter: PolitenessScheduler = politeness_scheduler,
+        concurrency: int = 16,
+        timeout: float = 10.0,
+        user_agent: str = "Mozilla/5.0 (compatible; AuraHistoriaBot/1.0)",
+    ):
+        """
+        Initialize the revalidator.
+
+        Args:
+            db: DynamoDBOperations instance holding the URL entries
+            rate_limiter: Scheduler that paces requests per host
+            concurrency: Maximum number of requests in flight
+            timeout: Timeout per request in seconds
+            user_agent: User-Agent header of the requests
+        """
+        self.db = db
+        self.rate_limiter = rate_limiter
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.headers = {"User-Agent": user_agent}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._entries: Dict[str, URLEntry] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout, headers=self.headers
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def revalidate(self, entry: URLEntry) -> str:
+        """
+        Send one conditional request for a stored URL entry.
+
+        Returns:
+            UNCHANGED, CHANGED or UNKNOWN
+        """
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        async with self._semaphore:
+            await self.rate_limiter.wait_if_needed(entry.url)
+            try:
+                session = await self._get_session()
+                async with session.head(
+                    entry.url, headers=headers, allow_redirects=True
+                ) as response:
+                    self.rate_limiter.update_delay(entry.url, response.status)
+                    if response.status == 304:
+                        return UNCHANGED
+                    if response.status != 200:
+                        return UNKNOWN
+                    etag, last_modified, length = validators_from_headers(
+                        response.headers
+                    )
+            except Exception as e:
+                logger.debug(f"Revalidation of {entry.url} failed: {e}")
+                return UNKNOWN
+
+        if _same_etag(entry.etag, etag):
+            return UNCHANGED
+        if entry.last_modified and entry.last_modified == last_modified:
+            if entry.content_length is None or entry.content_length == length:
+                return UNCHANGED
+        return CHANGED
+
+    async def load_entries(self, domain: str, urls: List[str]) -> Dict[str, URLEntry]:
+        """
+        Batch-load the URL entries of a chunk and keep them for `record`.
+
+        Args:
+            domain: Domain the URLs belong to
+            urls: URLs of the next chunk
+
+        Returns:
+            Dict mapping url to URLEntry for every entry that exists
+        """
+        entries = await asyncio.to_thread(self.db.batch_get_url_entries, domain, urls)
+        if len(self._entries) > 10_000:
+            self._entries.clear()
+        self._entries.update(entries)
+        return entries
+
+    async def filter_changed(
+        self,
+        domain: str,
+        urls: List[str],
+        entries: Optional[Dict[str, URLEntry]] = None,
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Split URLs into those that must be rendered and those that are unchanged.
+
+        Args:
+            domain: Domain the URLs belong to
+            urls: URLs of the next chunk
+            entries: Entries from `load_entries`; loaded here when omitted
+
+        Returns:
+            Tuple of (urls to render, unchanged urls), both in input order
+        """
+        if entries is None:
+            entries = await self.load_entries(domain, urls)
+        candidates = [
+            entries[url]
+            for url in urls
+            if url in entries and entries[url].hash and entries[url].has_validators()
+        ]
+        outcomes: Dict[str, str] = {}
+        if candidates:
+            results = await asyncio.gather(
+                *(self.revalidate(entry) for entry in candidates)
+            )
+            outcomes = {entry.url: result for entry, result in zip(candidates, results)}
+
+        to_render = [url for url in urls if outcomes.get(url) != UNCHANGED]
+        unchanged = [url for url in urls if outcomes.get(url) == UNCHANGED]
+        for url in unchanged:
+            self._entries.pop(url, None)
+        return to_render, unchanged
+
+    async def record(self, domain: str, result: Any) -> None:
+        """
+        Store the validators of a rendered page for the next scrape.
+
+        Entries loaded by `filter_changed` are used to skip the write when
+        the validators did not change.
+        """
+        etag, last_modified, length = validators_from_headers(
+            getattr(result, "response_headers", None)
+        )
+        if not (etag or last_modified):
+            return
+
+        stored = self._entries.pop(result.url, None)
+        if (
+            stored is not None
+            and stored.etag == etag
+            and stored.last_modified == last_modified
+            and stored.content_length == length
+        ):
+            return
+        try:
+            await asyncio.to_thread(
+                self.db.update_url_validators,
+                domain,
+                result.url,
+                etag,
+                last_modified,
+                length,
+            )
+        except Exception as e:
+            logger.warning(
+                f"Failed to store validators for {result.url}: {e}",
+                extra={"domain": domain},
+            )
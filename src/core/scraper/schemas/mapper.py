@@ -1,3 +1,5 @@
+from typing import Any, Dict, Optional
+
 from aura_historia_backend_api_client.models import PutProductData
 from aura_historia_backend_api_client.models.localized_text_data import (
     LocalizedTextData,
@@ -6,7 +8,11 @@ from aura_historia_backend_api_client.models.price_data import PriceData
 from aura_historia_backend_api_client.models.currency_data import CurrencyData
 from aura_historia_backend_api_client.models.product_state_data import ProductStateData
 from aura_historia_backend_api_client.models.language_data import LanguageData
-from src.core.scraper.schemas.extracted_product import ExtractedProduct
+from src.core.scraper.schemas.extracted_product import (
+    ExtractedProduct,
+    LocalizedText,
+    MonetaryValue,
+)
 
 
 def map_extracted_product_to_api(
@@ -51,3 +57,37 @@ def map_extracted_product_to_api(
         auction_start=extracted.auctionStart,
         auction_end=extracted.auctionEnd,
     )
+
+
+def _text_to_wire(text: Optional[LocalizedText]) -> Optional[Dict[str, str]]:
+    if not text:
+        return None
+    # Validate the code like LanguageData(...) does
+    return {"text": text.text, "language": LanguageData(text.language).value}
+
+
+def _price_to_wire(price: Optional[MonetaryValue]) -> Optional[Dict[str, Any]]:
+    if not price:
+        return None
+    return {"currency": CurrencyData(price.currency).value, "amount": price.amount}
+
+
+def product_to_wire(extracted: ExtractedProduct, url: str) -> Dict[str, Any]:
+    """
+    Map an extracted product straight to its put_products JSON object.
+
+    Produces the same dict as
+    `map_extracted_product_to_api(extracted, url).to_dict()` without
+    building the intermediate attrs models.
+    """
+    return {
+        "shopsProductId": extracted.shopsProductId,
+        "title": _text_to_wire(extracted.title),
+        "state": ProductStateData(extracted.state).value,
+        "url": url,
+        "description": _text_to_wire(extracted.description),
+        "price": _price_to_wire(extracted.price),
+        "images": [str(i) for i in extracted.images],
+        "auctionStart": extracted.auctionStart,
+        "auctionEnd": extracted.auctionEnd,
+    }
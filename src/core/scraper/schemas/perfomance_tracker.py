@@ -10,10 +10,21 @@ class PerformanceStats:
     domains_processed: str = ""
     extracted_successfully: int = 0
     n_unchanged_urls: int = 0  # URLs that were skipped because they were unchanged
+    n_revalidated_urls: int = 0  # Unchanged URLs detected without a browser render
     validation_errors: int = 0  # JSON was valid, but Pydantic failed
     system_errors: int = 0  # Network, vLLM 500s, or crashes
     token_limit_errors: int = 0  # LengthFinishReason (Truncated)
     filtered_non_products: int = 0  # LLM correctly identified as "Not a Product"
+    structured_data_extractions: int = 0  # Built from structured data, no LLM call
+    llm_extractions: int = 0  # Pages sent to the LLM
+    structured_data_gap_fills: int = 0  # LLM results completed from structured data
+    gate_calls: int = 0  # Pages sent to the is_product gate
+    gate_rejections: int = 0  # Pages the gate rejected (no full extraction)
+    gate_passes: int = 0  # Pages the gate called a product
+    gate_errors: int = 0  # Gate failed or undecided; page kept without a verdict
+    gate_false_positives: int = 0  # Gate called a product, full stage found none
+    gate_seconds: float = 0.0  # Wall time spent in the gate stage
+    extraction_seconds: float = 0.0  # Wall time spent in the full extraction stage
 
     def duration_seconds(self) -> float:
         """Return duration since start in seconds."""
@@ -42,6 +53,23 @@ class PerformanceStats:
         processed = n_urls - self.n_unchanged_urls
         return self.safe_divide(self.duration_seconds(), processed)
 
+    def gate_latency(self) -> float:
+        """Average gate wall time per gated page in seconds."""
+        return self.safe_divide(self.gate_seconds, self.gate_calls)
+
+    def extraction_latency(self) -> float:
+        """Average full-extraction wall time per page in seconds."""
+        return self.safe_divide(self.extraction_seconds, self.llm_extractions)
+
+    def gate_precision(self) -> float:
+        """Share of gate positives that the full stage confirmed as products."""
+        return (
+            self.safe_divide(
+                self.gate_passes - self.gate_false_positives, self.gate_passes
+            )
+            * 100
+        )
+
     def progress(self) -> float:
         return (
             self.safe_divide(
@@ -69,7 +97,18 @@ class PerformanceStats:
         print(f"Success:              {self.extracted_successfully}")
         print(f"Success Rate:         {self.success_rate(total_urls):.1f}%")
         print(f"Filtered (Non-Prd):   {self.filtered_non_products}")
+        print(f"Structured Data:      {self.structured_data_extractions}")
+        print(f"LLM Extractions:      {self.llm_extractions}")
+        print(f"Gaps Filled:          {self.structured_data_gap_fills}")
+        if self.gate_calls:
+            print(f"Gate Calls:           {self.gate_calls}")
+            print(f"Gate Rejected:        {self.gate_rejections}")
+            print(f"Gate Errors:          {self.gate_errors}")
+            print(f"Gate Precision:       {self.gate_precision():.1f}%")
+            print(f"Gate Latency:         {self.gate_latency():.2f} sec/page")
+        print(f"Extraction Latency:   {self.extraction_latency():.2f} sec/page")
         print(f"Skipped (No Change):  {self.n_unchanged_urls}")
+        print(f"Skipped (Validators): {self.n_revalidated_urls}")
         print(f"System/Net Errors:    {self.system_errors}")
         print(f"Validation Fails:     {self.validation_errors}")
         print(f"Error Rate:           {self.error_rate(total_urls):.1f}%")
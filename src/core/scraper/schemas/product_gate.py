@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+
+
+class ProductGate(BaseModel):
+    is_product: bool = Field(
+        ...,
+        description="True if the page describes exactly one specific item for sale.",
+    )
+
+    model_config = {"extra": "forbid"}
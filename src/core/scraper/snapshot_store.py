@@ -0,0 +1,183 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from dotenv import load_dotenv
+
+from src.core.utils.object_store import open_backend
+
+try:
+    import zstandard
+except ImportError:  # optional "snapshots" extra
+    zstandard = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Local directory or s3://bucket/prefix; empty disables snapshots
+SNAPSHOT_STORE = os.getenv("SNAPSHOT_STORE", "")
+SNAPSHOT_ZSTD_LEVEL = int(os.getenv("SNAPSHOT_ZSTD_LEVEL", "10"))
+
+ZSTD_SUFFIX = ".md.zst"
+GZIP_SUFFIX = ".md.gz"
+
+
+def content_hash(markdown: str) -> str:
+    """SHA256 of the markdown, the address of its snapshot."""
+    return hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Content-addressed store of the cleaned markdown sent to the LLM.
+
+    Every distinct markdown is stored once under its SHA256
+    (objects/ab/abcd....md.zst), so re-crawling unchanged pages costs no
+    space. Each saved chunk also writes a manifest (manifests/<domain>/...)
+    mapping its URLs to content hashes, which is what replays read.
+
+    Objects are zstd-compressed when `zstandard` is installed (the
+    "snapshots" extra) and gzip-compressed otherwise; both are readable
+    as long as the codec is available.
+    """
+
+    def __init__(self, backend, level: int = SNAPSHOT_ZSTD_LEVEL):
+        self.backend = backend
+        self.level = level
+        self._known: Set[str] = set()
+
+    @classmethod
+    def from_uri(cls, uri: str) -> "SnapshotStore":
+        """Open a store in a local directory or below s3://bucket/prefix."""
+        return cls(open_backend(uri))
+
+    @classmethod
+    def from_env(cls) -> Optional["SnapshotStore"]:
+        """The store configured by SNAPSHOT_STORE, or None if disabled."""
+        return cls.from_uri(SNAPSHOT_STORE) if SNAPSHOT_STORE else None
+
+    def _compress(self, markdown: str) -> bytes:
+        data = markdown.encode("utf-8")
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    @staticmethod
+    def _object_key(digest: str, suffix: str) -> str:
+        return f"objects/{digest[:2]}/{digest}{suffix}"
+
+    def _put_object(self, digest: str, markdown: str) -> bool:
+        """Store a markdown unless it is already there; True if written."""
+        if digest in self._known:
+            return False
+        suffixes = (ZSTD_SUFFIX, GZIP_SUFFIX)
+        if any(self.backend.exists(self._object_key(digest, s)) for s in suffixes):
+            self._known.add(digest)
+            return False
+        suffix = ZSTD_SUFFIX if zstandard is not None else GZIP_SUFFIX
+        self.backend.put(self._object_key(digest, suffix), self._compress(markdown))
+        self._known.add(digest)
+        return True
+
+    def save(self, domain: str, urls: Sequence[str], markdowns: Sequence[str]) -> int:
+        """
+        Store the markdowns of a chunk and its manifest.
+
+        Returns:
+            Number of new (not deduplicated) objects
+        """
+        captured_at = datetime.now(timezone.utc).isoformat()
+        entries = []
+        written = 0
+        for url, markdown in zip(urls, markdowns):
+            digest = content_hash(markdown)
+            written += self._put_object(digest, markdown)
+            entries.append(
+                {
+                    "url": url,
+                    "domain": domain,
+                    "hash": digest,
+                    "captured_at": captured_at,
+                }
+            )
+        if entries:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            key = f"manifests/{domain}/{stamp}-{uuid.uuid4().hex[:8]}.jsonl"
+            body = "".join(json.dumps(e) + "\n" for e in entries)
+            self.backend.put(key, body.encode("utf-8"))
+        return written
+
+    async def save_async(
+        self, domain: str, urls: Sequence[str], markdowns: Sequence[str]
+    ) -> int:
+        """Store a chunk off the event loop; failures are logged, not raised."""
+        try:
+            written = await asyncio.to_thread(self.save, domain, urls, markdowns)
+            logger.debug(f"Saved {len(urls)} snapshots of {domain} ({written} new)")
+            return written
+        except Exception as e:
+            logger.warning(f"Failed to save snapshots of {domain}: {e}")
+            return 0
+
+    def load(self, digest: str) -> Optional[str]:
+        """The markdown stored under a content hash, or None."""
+        data = self.backend.get(self._object_key(digest, ZSTD_SUFFIX))
+        if data is not None:
+            if zstandard is None:
+                raise RuntimeError(
+                    "Reading zstd snapshots needs zstandard; install the "
+                    "'snapshots' extra"
+                )
+            raw = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+            return raw.decode("utf-8")
+        data = self.backend.get(self._object_key(digest, GZIP_SUFFIX))
+        return gzip.decompress(data).decode("utf-8") if data is not None else None
+
+    def domains(self) -> List[str]:
+        """Domains with at least one manifest."""
+        return sorted({key.split("/")[1] for key in self.backend.list("manifests/")})
+
+    def entries(self, domains: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Latest manifest entry of every URL.
+
+        Args:
+            domains: Domains to read; all domains if None
+        """
+        latest: Dict[str, Dict] = {}
+        for domain in domains or self.domains():
+            # Manifest names start with their timestamp, so later ones win
+            # The trailing slash keeps shop.de from matching shop.de.at on S3
+            for key in self.backend.list(f"manifests/{domain}/"):
+                data = self.backend.get(key)
+                if data is None:
+                    continue
+                for line in data.decode("utf-8").splitlines():
+                    if line.strip():
+                        entry = json.loads(line)
+                        latest[entry["url"]] = entry
+        return list(latest.values())
+
+    def load_pages(self, domains: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Latest snapshot of every URL as {"url", "domain", "markdown"}.
+
+        Entries whose object is missing are skipped.
+        """
+        pages = []
+        for entry in self.entries(domains):
+            markdown = self.load(entry["hash"])
+            if markdown is None:
+                logger.warning(f"Snapshot {entry['hash']} of {entry['url']} missing")
+                continue
+            pages.append(
+                {"url": entry["url"], "domain": entry["domain"], "markdown": markdown}
+            )
+        return pages
@@ -0,0 +1,346 @@
+import logging
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import extruct
+from pydantic import ValidationError
+
+from src.core.scraper.schemas.extracted_product import ExtractedProduct
+
+logger = logging.getLogger(__name__)
+
+SYNTAXES = ["json-ld", "microdata", "opengraph"]
+PRODUCT_TYPES = {"product", "individualproduct", "productmodel", "vehicle"}
+
+# Fields an ExtractedProduct cannot be built without
+REQUIRED_FIELDS = ("shopsProductId", "title", "state")
+LANGUAGES = {"de", "en", "fr", "es"}
+CURRENCIES = {"EUR", "GBP", "USD", "AUD", "CAD", "NZD"}
+
+# schema.org ItemAvailability -> product state
+AVAILABILITY_STATES = {
+    "instock": "AVAILABLE",
+    "instoreonly": "AVAILABLE",
+    "onlineonly": "AVAILABLE",
+    "limitedavailability": "AVAILABLE",
+    "preorder": "AVAILABLE",
+    "presale": "AVAILABLE",
+    "backorder": "AVAILABLE",
+    "madetoorder": "AVAILABLE",
+    "soldout": "SOLD",
+    "outofstock": "SOLD",
+    "discontinued": "REMOVED",
+}
+
+_HTML_LANG_PATTERN = re.compile(r"<html[^>]*?\slang=[\"']?([a-zA-Z]{2})", re.IGNORECASE)
+
+
+def extract_structured_data(html: str, url: Optional[str] = None) -> Dict[str, list]:
+    """
+    Read JSON-LD, microdata and OpenGraph from a page.
+
+    Returns:
+        Mapping of syntax to the items found, empty if parsing fails
+    """
+    if not html:
+        return {}
+    try:
+        return extruct.extract(
+            html, base_url=url, syntaxes=SYNTAXES, uniform=True, errors="ignore"
+        )
+    except Exception as e:
+        logger.debug(f"Failed to read structured data from {url}: {e}")
+        return {}
+
+
+def _types(node: Dict[str, Any]) -> List[str]:
+    value = node.get("@type", [])
+    values = value if isinstance(value, list) else [value]
+    # Full IRIs ("http://schema.org/Product") count by their last segment
+    return [str(v).rstrip("/").rsplit("/", 1)[-1].lower() for v in values]
+
+
+def _walk(items: Any) -> Iterator[Dict[str, Any]]:
+    """Yield every dict node, descending into @graph and nested values."""
+    if isinstance(items, list):
+        for item in items:
+            yield from _walk(item)
+    elif isinstance(items, dict):
+        yield items
+        for value in items.values():
+            if isinstance(value, (list, dict)):
+                yield from _walk(value)
+
+
+def find_products(data: Dict[str, list]) -> List[Dict[str, Any]]:
+    """Return all schema.org Product nodes from JSON-LD and microdata."""
+    products = []
+    for syntax in ("json-ld", "microdata"):
+        for node in _walk(data.get(syntax, [])):
+            if PRODUCT_TYPES.intersection(_types(node)):
+                products.append(node)
+    return products
+
+
+def _same_page(value: Any, url: str) -> Optional[bool]:
+    """Whether a node's `url`/`@id` names the page; None if it names none."""
+    value = _first(value)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    target = urljoin(url, value.strip()).split("#", 1)[0].rstrip("/")
+    return target.lower() == url.split("#", 1)[0].rstrip("/").lower()
+
+
+def _names_page(node: Dict[str, Any], url: str) -> Optional[bool]:
+    verdicts = [_same_page(node.get(key), url) for key in ("url", "@id")]
+    if True in verdicts:
+        return True
+    return False if False in verdicts else None
+
+
+def _top_level_products(data: Dict[str, list], syntax: str) -> List[Dict[str, Any]]:
+    """Product nodes of a syntax that are not nested in another item."""
+    products = []
+    for item in data.get(syntax, []):
+        if not isinstance(item, dict):
+            continue
+        graph = item.get("@graph")
+        for node in graph if isinstance(graph, list) else [item]:
+            if isinstance(node, dict) and PRODUCT_TYPES.intersection(_types(node)):
+                products.append(node)
+    return products
+
+
+def page_product(
+    data: Dict[str, list], url: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    The Product node that describes the page itself.
+
+    That is a Product whose `url` or `@id` is the page URL, or else the
+    only top-level Product of the page (JSON-LD before microdata) that
+    does not name another page. Listing pages (an ItemList of Products)
+    and pages with several products, e.g. related or recently viewed
+    items, have none, so their extraction is left to the LLM.
+    """
+    if url:
+        for node in find_products(data):
+            if _names_page(node, url):
+                return node
+    for syntax in ("json-ld", "microdata"):
+        products = _top_level_products(data, syntax)
+        if url:
+            products = [p for p in products if _names_page(p, url) is not False]
+        if len(products) > 1:
+            return None
+        if products:
+            return products[0]
+    return None
+
+
+def has_product_signals(data: Dict[str, list], url: Optional[str] = None) -> bool:
+    """
+    Whether the structured data describes a product page.
+
+    A page qualifies with a Product node describing the page itself (see
+    `page_product`) or an OpenGraph `og:type` of product. Products nested
+    in listings or related-product markup do not count.
+    """
+    if page_product(data, url) is not None:
+        return True
+    return any(
+        any(t.startswith("product") for t in _types(node))
+        for node in data.get("opengraph", [])
+    )
+
+
+def is_product_page(html: str, url: Optional[str] = None) -> Optional[bool]:
+    """
+    Cheap product-page check based on structured data.
+
+    Returns:
+        True if the page carries product markup, None if it does not and the
+        caller has to decide another way
+    """
+    data = extract_structured_data(html, url)
+    return True if has_product_signals(data, url) else None
+
+
+def _first(value: Any) -> Any:
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _text(value: Any) -> Optional[str]:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("@value") or value.get("name")
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _language(node: Dict[str, Any], html: str) -> Optional[str]:
+    """Language of the product from `inLanguage` or the `<html lang>` attribute."""
+    language = _text(node.get("inLanguage"))
+    if not language:
+        match = _HTML_LANG_PATTERN.search(html[:5000])
+        language = match.group(1) if match else None
+    language = language[:2].lower() if language else None
+    return language if language in LANGUAGES else None
+
+
+def _amount_in_cents(value: Any) -> Optional[int]:
+    """Parse a schema.org price ("1234.50", 1234.5, "1.234,50") into cents."""
+    text = _text(value)
+    if text is None:
+        return None
+    text = re.sub(r"[^\d.,]", "", text)
+    if "," in text and "." in text:
+        # The last separator is the decimal one
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        text = text.replace(",", ".")
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None
+    return int((amount * 100).to_integral_value()) if amount >= 0 else None
+
+
+def _offers(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    offers = node.get("offers") or []
+    offers = offers if isinstance(offers, list) else [offers]
+    flat = []
+    for offer in offers:
+        if not isinstance(offer, dict):
+            continue
+        # AggregateOffer nests the individual offers
+        nested = offer.get("offers")
+        flat.extend(nested if isinstance(nested, list) else [offer])
+    return [offer for offer in flat if isinstance(offer, dict)]
+
+
+def _price(offer: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    amount = _amount_in_cents(offer.get("price"))
+    if amount is None:
+        amount = _amount_in_cents(offer.get("lowPrice"))
+    if amount is None:
+        spec = _first(offer.get("priceSpecification"))
+        if isinstance(spec, dict):
+            amount = _amount_in_cents(spec.get("price"))
+            offer = {**spec, **offer}
+    currency = (_text(offer.get("priceCurrency")) or "").upper()
+    if amount is None or currency not in CURRENCIES:
+        return None
+    return {"amount": amount, "currency": currency}
+
+
+def _state(offer: Dict[str, Any]) -> Optional[str]:
+    availability = _text(offer.get("availability"))
+    if not availability:
+        return None
+    key = availability.rstrip("/").rsplit("/", 1)[-1].lower()
+    return AVAILABILITY_STATES.get(key)
+
+
+def _images(node: Dict[str, Any], url: Optional[str]) -> List[str]:
+    values = node.get("image") or []
+    values = values if isinstance(values, list) else [values]
+    images = []
+    for value in values:
+        if isinstance(value, dict):
+            value = value.get("contentUrl") or value.get("url")
+        if not isinstance(value, str) or value.startswith("data:"):
+            continue
+        image = urljoin(url or "", value.strip())
+        parsed = urlparse(image)
+        if parsed.scheme in ("http", "https") and parsed.netloc and image not in images:
+            images.append(image)
+    return images
+
+
+def product_fields(html: str, url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Map the schema.org Product of a page onto ExtractedProduct fields.
+
+    Only the fields found in the structured data are returned, so the result
+    may be partial or empty. It is empty unless `page_product` finds the
+    product the page is about.
+    """
+    node = page_product(extract_structured_data(html, url), url)
+    if node is None:
+        return {}
+
+    fields: Dict[str, Any] = {"is_product": True}
+    product_id = next(
+        (
+            _text(node.get(key))
+            for key in ("sku", "productID", "mpn")
+            if _text(node.get(key))
+        ),
+        None,
+    )
+    if product_id:
+        fields["shopsProductId"] = product_id
+
+    language = _language(node, html)
+    title = _text(node.get("name"))
+    if title and language:
+        fields["title"] = {"text": title, "language": language}
+    description = _text(node.get("description"))
+    if description and language:
+        fields["description"] = {"text": description, "language": language}
+
+    for offer in _offers(node):
+        if "price" not in fields:
+            price = _price(offer)
+            if price:
+                fields["price"] = price
+        if "state" not in fields:
+            state = _state(offer)
+            if state:
+                fields["state"] = state
+
+    images = _images(node, url)
+    if images:
+        fields["images"] = images
+    return fields
+
+
+def product_from_fields(fields: Dict[str, Any]) -> Optional[ExtractedProduct]:
+    """Build a product if all required fields were found, else return None."""
+    if not all(fields.get(name) for name in REQUIRED_FIELDS):
+        return None
+    try:
+        return ExtractedProduct.model_validate(fields)
+    except ValidationError as e:
+        logger.debug(f"Structured data did not validate as a product: {e}")
+        return None
+
+
+def fill_gaps(product: ExtractedProduct, fields: Dict[str, Any]) -> ExtractedProduct:
+    """
+    Complete an LLM-extracted product with values from structured data.
+
+    The LLM result wins; structured data only fills fields it left empty.
+    """
+    if not fields or not product.is_product:
+        return product
+    data = product.model_dump()
+    filled = False
+    for name, value in fields.items():
+        if name != "is_product" and not data.get(name):
+            data[name] = value
+            filled = True
+    if not filled:
+        return product
+    try:
+        return ExtractedProduct.model_validate(data)
+    except ValidationError:
+        return product
@@ -1,12 +1,160 @@
+import importlib.util
+import logging
 import os
+from typing import Any, Dict, Optional
 
+import httpx
 from dotenv import load_dotenv
 from aura_historia_backend_api_client.client import Client
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 api_key = os.getenv("API_KEY")
 headers = {"X-API-Key": api_key}
 base_url = os.getenv("BACKEND_API_URL")
 
-api_client = Client(base_url=base_url) if base_url else None
+BACKEND_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT", "30"))
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "5"))
+BACKEND_MAX_CONNECTIONS = int(os.getenv("BACKEND_MAX_CONNECTIONS", "20"))
+BACKEND_MAX_KEEPALIVE = int(os.getenv("BACKEND_MAX_KEEPALIVE", "10"))
+BACKEND_KEEPALIVE_EXPIRY = float(os.getenv("BACKEND_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 needs the h2 package (httpx[http2]); without it HTTP/1.1 keep-alive is used
+BACKEND_HTTP2 = os.getenv("BACKEND_HTTP2", "true").lower() == "true"
+
+
+class ApiClientFactory:
+    """
+    Builds the backend API client around one shared, pooled httpx client.
+
+    All requests share a connection pool with keep-alive (and HTTP/2 when
+    available), so consecutive put_products calls reuse an open TLS
+    connection instead of paying a handshake each time. Request and
+    connection counters show how well connections are reused.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str],
+        api_key: Optional[str] = None,
+        timeout: float = BACKEND_TIMEOUT,
+        connect_timeout: float = BACKEND_CONNECT_TIMEOUT,
+        max_connections: int = BACKEND_MAX_CONNECTIONS,
+        max_keepalive: int = BACKEND_MAX_KEEPALIVE,
+        keepalive_expiry: float = BACKEND_KEEPALIVE_EXPIRY,
+        http2: bool = BACKEND_HTTP2,
+    ):
+        """
+        Initialize the factory.
+
+        Args:
+            base_url: Backend base URL; without it no client is built
+            api_key: Sent as X-API-Key when set
+            timeout: Read, write and pool timeout in seconds
+            connect_timeout: Connect timeout in seconds
+            max_connections: Upper bound of open connections
+            max_keepalive: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept
+            http2: Use HTTP/2 if the h2 package is installed
+        """
+        self.base_url = base_url
+        self.headers = {"X-API-Key": api_key} if api_key else {}
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            logger.info("h2 is not installed, using HTTP/1.1 for the backend API")
+
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self._client: Optional[Client] = None
+
+    @classmethod
+    def from_env(cls) -> "ApiClientFactory":
+        return cls(base_url, api_key)
+
+    def _on_trace(self, event: str) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    async def _trace_async(self, event: str, info: Dict[str, Any]) -> None:
+        self._on_trace(event)
+
+    def _trace_sync(self, event: str, info: Dict[str, Any]) -> None:
+        self._on_trace(event)
+
+    async def _on_request_async(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self._trace_async
+
+    def _on_request_sync(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self._trace_sync
+
+    def _httpx_kwargs(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "headers": self.headers,
+            "timeout": self.timeout,
+            "limits": self.limits,
+            "http2": self.http2,
+        }
+
+    def _build_async(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            event_hooks={"request": [self._on_request_async]}, **self._httpx_kwargs()
+        )
+
+    def _build_sync(self) -> httpx.Client:
+        return httpx.Client(
+            event_hooks={"request": [self._on_request_sync]}, **self._httpx_kwargs()
+        )
+
+    def client(self) -> Optional[Client]:
+        """The shared API client, or None if no base URL is configured."""
+        if not self.base_url:
+            return None
+        if self._client is None:
+            self._client = Client(
+                base_url=self.base_url, headers=self.headers, timeout=self.timeout
+            )
+            self._client.set_async_httpx_client(self._build_async())
+            self._client.set_httpx_client(self._build_sync())
+        return self._client
+
+    def stats(self) -> Dict[str, float]:
+        """Requests, new connections, TLS handshakes and the reuse ratio."""
+        reused = max(0, self.requests - self.connections)
+        return {
+            "requests": self.requests,
+            "connections": self.connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled connections.
+
+        The API client object stays valid; it gets fresh httpx clients and
+        reconnects on its next request.
+        """
+        if self._client is None:
+            return
+        logger.info(f"Backend API connections: {self.stats()}")
+        await self._client.get_async_httpx_client().aclose()
+        self._client.get_httpx_client().close()
+        self._client.set_async_httpx_client(self._build_async())
+        self._client.set_httpx_client(self._build_sync())
+
+
+api_client_factory = ApiClientFactory.from_env()
+api_client = api_client_factory.client()
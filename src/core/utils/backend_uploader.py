@@ -0,0 +1,402 @@
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+import httpx
+import ujson
+from dotenv import load_dotenv
+
+from aura_historia_backend_api_client.models import (
+    ApiError,
+    PutProductData,
+    PutProductsResponse,
+)
+from src.core.utils.api_client import api_client
+from src.core.utils.object_store import open_backend
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BACKEND_BATCH_SIZE = int(os.getenv("BACKEND_BATCH_SIZE", "50"))
+BACKEND_BATCH_MAX_BYTES = int(os.getenv("BACKEND_BATCH_MAX_BYTES", "1000000"))
+BACKEND_FLUSH_SECONDS = float(os.getenv("BACKEND_FLUSH_SECONDS", "5"))
+BACKEND_UPLOAD_CONCURRENCY = int(os.getenv("BACKEND_UPLOAD_CONCURRENCY", "4"))
+BACKEND_MAX_ATTEMPTS = int(os.getenv("BACKEND_MAX_ATTEMPTS", "5"))
+BACKEND_RETRY_BASE_DELAY = float(os.getenv("BACKEND_RETRY_BASE_DELAY", "1"))
+BACKEND_RETRY_MAX_DELAY = float(os.getenv("BACKEND_RETRY_MAX_DELAY", "30"))
+# Local directory or s3://bucket/prefix for batches that could not be sent;
+# empty disables dead-lettering
+BACKEND_DEAD_LETTER = os.getenv("BACKEND_DEAD_LETTER", "dead_letter")
+
+PRODUCTS_PATH = "/api/v1/products"
+# 4xx answers that are worth another attempt; every other 4xx is permanent
+RETRYABLE_CLIENT_STATUSES = {408, 429}
+
+# A put_products item: the wire dict of product_to_wire, or the attrs model
+Product = Union[Dict[str, Any], PutProductData]
+# URL and JSON of one encoded item
+EncodedProduct = Tuple[Optional[str], bytes]
+Sender = Callable[[bytes], Awaitable[Any]]
+
+
+def encode_product(item: Product) -> EncodedProduct:
+    """Encode one put_products item to JSON, once."""
+    if not isinstance(item, dict):
+        item = item.to_dict()
+    data = ujson.dumps(item, ensure_ascii=False, escape_forward_slashes=False)
+    return item.get("url"), data.encode("utf-8")
+
+
+def encode_batch(products: Sequence[EncodedProduct]) -> bytes:
+    """The put_products request body of encoded items."""
+    return b'{"items":[' + b",".join(data for _, data in products) + b"]}"
+
+
+def _api_error(response: httpx.Response) -> ApiError:
+    """The ApiError of a failed response, also for bodies that are not one."""
+    try:
+        error = ApiError.from_dict(ujson.loads(response.content))
+    except (ValueError, KeyError, TypeError):
+        return ApiError(
+            status=response.status_code,
+            title=response.reason_phrase,
+            error="UNEXPECTED_RESPONSE",
+            detail=response.text[:200],
+        )
+    # The status line is authoritative, not what the body claims
+    error.status = response.status_code
+    return error
+
+
+def is_retryable(error: ApiError) -> bool:
+    """Whether a failed answer may succeed on a later attempt."""
+    return error.status >= 500 or error.status in RETRYABLE_CLIENT_STATUSES
+
+
+async def send_products(body: bytes) -> Union[ApiError, PutProductsResponse]:
+    """
+    Send an encoded batch to the products endpoint.
+
+    Does what put_products.asyncio does, but with a pre-encoded body, so
+    the batch is not rebuilt from attrs models on every attempt. Every
+    status other than 200 is returned as an ApiError.
+    """
+    if api_client is None:
+        raise RuntimeError("BACKEND_API_URL is not set")
+    response = await api_client.get_async_httpx_client().request(
+        "put",
+        PRODUCTS_PATH,
+        content=body,
+        headers={"Content-Type": "application/json"},
+    )
+    if response.status_code == 200:
+        return PutProductsResponse.from_dict(ujson.loads(response.content))
+    return _api_error(response)
+
+
+class DeadLetterStore:
+    """
+    Batches the backend did not accept, kept for a later replay.
+
+    Each batch is one JSON object (dead_letter/<timestamp>-<id>.json) with
+    the serialized products and the last error.
+    """
+
+    PREFIX = "dead_letter"
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @classmethod
+    def from_uri(cls, uri: str) -> "DeadLetterStore":
+        return cls(open_backend(uri))
+
+    @classmethod
+    def from_env(cls) -> Optional["DeadLetterStore"]:
+        """The store configured by BACKEND_DEAD_LETTER, or None if disabled."""
+        return cls.from_uri(BACKEND_DEAD_LETTER) if BACKEND_DEAD_LETTER else None
+
+    def put(self, items: Sequence[EncodedProduct], error: str) -> str:
+        now = datetime.now(timezone.utc)
+        key = f"{self.PREFIX}/{now.strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}.json"
+        meta = ujson.dumps({"failed_at": now.isoformat(), "error": error})
+        # {"failed_at": ..., "error": ..., "items": [...]}
+        body = meta[:-1].encode("utf-8") + b"," + encode_batch(items)[1:]
+        self.backend.put(key, body)
+        return key
+
+    def keys(self) -> List[str]:
+        return [k for k in self.backend.list(self.PREFIX) if k.endswith(".json")]
+
+    def get(self, key: str) -> Optional[List[EncodedProduct]]:
+        data = self.backend.get(key)
+        if data is None:
+            return None
+        return [encode_product(item) for item in ujson.loads(data)["items"]]
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+
+class BackendUploader:
+    """
+    Upload stage between extraction and the backend.
+
+    Products are encoded to JSON once when added and flushed as one
+    put_products batch once the buffer reaches `batch_size` items or
+    `max_bytes` of JSON, or when its oldest product is `max_age` seconds old.
+    Up to `concurrency` batches are in flight at once; when all slots are
+    busy, `add` waits, which bounds memory. Failed batches are retried with exponential backoff and full
+    jitter; a batch that still fails after `max_attempts` goes to the
+    dead-letter store (if any) instead of being dropped.
+
+    Use as an async context manager; leaving it flushes and waits for all
+    uploads.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = BACKEND_BATCH_SIZE,
+        max_bytes: int = BACKEND_BATCH_MAX_BYTES,
+        max_age: float = BACKEND_FLUSH_SECONDS,
+        concurrency: int = BACKEND_UPLOAD_CONCURRENCY,
+        max_attempts: int = BACKEND_MAX_ATTEMPTS,
+        base_delay: float = BACKEND_RETRY_BASE_DELAY,
+        max_delay: float = BACKEND_RETRY_MAX_DELAY,
+        dead_letter: Optional[DeadLetterStore] = None,
+        send: Optional[Sender] = None,
+        on_sent: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+    ):
+        """
+        Initialize the uploader.
+
+        Args:
+            batch_size: Products per batch
+            max_bytes: Serialized size that flushes a batch early
+            max_age: Seconds a product may wait in the buffer
+            concurrency: Batches in flight at once
+            max_attempts: Attempts per batch before dead-lettering
+            base_delay: Base of the exponential backoff in seconds
+            max_delay: Upper bound of a single backoff
+            dead_letter: Where batches go after the last attempt
+            send: Sends one encoded batch; defaults to send_products
+            on_sent: Called after each upload with the URLs of the products
+                that were sent, i.e. not dead-lettered
+        """
+        self.batch_size = max(1, batch_size)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter = dead_letter
+        self.send = send or send_products
+        self.on_sent = on_sent
+
+        self._buffer: List[EncodedProduct] = []
+        self._buffer_bytes = 0
+        self._oldest: Optional[float] = None
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._uploads: Set[asyncio.Task] = set()
+        self._timer: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.dead_lettered = 0
+
+    async def __aenter__(self) -> "BackendUploader":
+        if self.max_age > 0:
+            self._timer = asyncio.create_task(self._flush_on_age())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def add(self, item: Product) -> None:
+        """Buffer a product and flush if the batch is full."""
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        encoded = encode_product(item)
+        self._buffer.append(encoded)
+        self._buffer_bytes += len(encoded[1])
+        if len(self._buffer) >= self.batch_size or self._buffer_bytes >= self.max_bytes:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Start uploading the buffered products as one batch."""
+        if not self._buffer:
+            return
+        batch = self._buffer
+        self._buffer, self._buffer_bytes, self._oldest = [], 0, None
+        # Wait for a free slot here, so producers slow down with the backend
+        await self._slots.acquire()
+        task = asyncio.create_task(self._upload(batch))
+        self._uploads.add(task)
+        task.add_done_callback(self._uploads.discard)
+
+    async def close(self) -> None:
+        """Flush the buffer and wait until every batch is sent or dead-lettered."""
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        await self.flush()
+        if self._uploads:
+            await asyncio.gather(*self._uploads, return_exceptions=True)
+
+    async def _flush_on_age(self) -> None:
+        while True:
+            await asyncio.sleep(self.max_age / 2)
+            if (
+                self._oldest is not None
+                and time.monotonic() - self._oldest >= self.max_age
+            ):
+                await self.flush()
+
+    async def _upload(self, batch: List[EncodedProduct]) -> None:
+        try:
+            remaining, error = await self.send_with_retry(batch)
+            self.sent += len(batch) - len(remaining)
+            if self.on_sent is not None and len(remaining) < len(batch):
+                await self._notify_sent(batch, remaining)
+            if remaining:
+                await self._dead_letter(remaining, error)
+        finally:
+            self._slots.release()
+
+    async def _notify_sent(
+        self, batch: List[EncodedProduct], remaining: List[EncodedProduct]
+    ) -> None:
+        failed = {url for url, _ in remaining}
+        urls = [url for url, _ in batch if url and url not in failed]
+        try:
+            await self.on_sent(urls)
+        except Exception as e:
+            logger.warning(f"on_sent callback failed for {len(urls)} products: {e}")
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def send_with_retry(
+        self, items: List[EncodedProduct]
+    ) -> Tuple[List[EncodedProduct], str]:
+        """
+        Send a batch, retrying failed attempts with backoff.
+
+        Transport errors, 5xx, 408 and 429 answers and products the backend
+        reports as unprocessed (temporary issues) are retried; any other 4xx
+        answer is not. Products the backend reports as failed were rejected
+        and are not retried either.
+
+        Returns:
+            The products that could not be sent (including rejected ones)
+            and the last error
+        """
+        pending = list(items)
+        rejected: List[EncodedProduct] = []
+        error = ""
+        for attempt in range(1, self.max_attempts + 1):
+            retryable = True
+            try:
+                response = await self.send(encode_batch(pending))
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if isinstance(response, ApiError):
+                    error = f"HTTP {response.status} {response.error}"
+                    retryable = is_retryable(response)
+                elif response is None:
+                    error = "Unexpected response status"
+                else:
+                    unprocessed, failed = set(), set()
+                    if isinstance(response, PutProductsResponse):
+                        failed = self._log_failed(response)
+                        unprocessed = set(response.unprocessed or []) - failed
+                    rejected += [p for p in pending if p[0] in failed]
+                    pending = [p for p in pending if p[0] in unprocessed]
+                    if not pending:
+                        error = ""
+                        break
+                    error = f"{len(pending)} products unprocessed"
+
+            if not retryable or attempt == self.max_attempts:
+                break
+            delay = self._backoff(attempt)
+            logger.warning(
+                f"Backend upload of {len(pending)} products failed "
+                f"(attempt {attempt}/{self.max_attempts}), retrying in "
+                f"{delay:.1f}s: {error}"
+            )
+            await asyncio.sleep(delay)
+
+        if pending:
+            logger.error(f"Giving up on {len(pending)} products: {error}")
+        if rejected:
+            error = "; ".join(filter(None, [error, f"{len(rejected)} rejected"]))
+        return pending + rejected, error
+
+    @staticmethod
+    def _log_failed(response: PutProductsResponse) -> Set[str]:
+        """Log the products the backend rejected and return their URLs."""
+        codes = response.failed.to_dict() if response.failed else {}
+        for url, code in codes.items():
+            logger.warning(f"Backend rejected {url}: {code}")
+        return set(codes)
+
+    async def _dead_letter(self, items: List[EncodedProduct], error: str) -> None:
+        if self.dead_letter is None:
+            logger.error(f"Dropping {len(items)} products, no dead-letter store")
+            return
+        try:
+            key = await asyncio.to_thread(self.dead_letter.put, items, error)
+            self.dead_lettered += len(items)
+            logger.warning(f"Dead-lettered {len(items)} products to {key}")
+        except Exception as e:
+            logger.exception(f"Failed to dead-letter {len(items)} products: {e}")
+
+    async def replay_dead_letters(self) -> int:
+        """
+        Send the dead-lettered batches again. Batches that go through are
+        removed; the others stay for the next replay.
+
+        Returns:
+            Number of products sent
+        """
+        if self.dead_letter is None:
+            return 0
+        keys = await asyncio.to_thread(self.dead_letter.keys)
+        sent = 0
+        for key in keys:
+            try:
+                items = await asyncio.to_thread(self.dead_letter.get, key)
+            except Exception as e:
+                logger.error(f"Unreadable dead-letter batch {key}: {e}")
+                continue
+            if items:
+                remaining, error = await self.send_with_retry(items)
+                if remaining:
+                    logger.warning(f"Dead-letter batch {key} still failing: {error}")
+                    continue
+                sent += len(items)
+            await asyncio.to_thread(self.dead_letter.delete, key)
+        if keys:
+            logger.info(
+                f"Replayed {sent} dead-lettered products from {len(keys)} batches"
+            )
+        return sent
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, List, Optional, Set
+
+import psutil
+from crawl4ai import AsyncWebCrawler, BrowserConfig
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "500"))
+BROWSER_MAX_MEMORY_MB = int(os.getenv("BROWSER_MAX_MEMORY_MB", "2048"))
+
+# Process names of the browsers Playwright launches
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell", "firefox", "webkit")
+
+
+@dataclass
+class PooledBrowser:
+    """A started crawler together with its usage counters."""
+
+    crawler: AsyncWebCrawler
+    pages: int = 0
+    leases: int = 0
+    # Root processes of this browser, found when it was launched
+    pids: Set[int] = field(default_factory=set)
+
+
+def _is_browser(process: psutil.Process) -> bool:
+    try:
+        name = process.name().lower()
+    except psutil.Error:
+        return False
+    return any(browser in name for browser in BROWSER_PROCESS_NAMES)
+
+
+def browser_root_pids() -> Set[int]:
+    """
+    PIDs of the browser processes of this process that were not started by
+    another browser process, i.e. one per launched browser.
+    """
+    try:
+        browsers = psutil.Process().children(recursive=True)
+    except psutil.Error:
+        return set()
+    browsers = [p for p in browsers if _is_browser(p)]
+    pids = {p.pid for p in browsers}
+    roots = set()
+    for process in browsers:
+        try:
+            if process.ppid() not in pids:
+                roots.add(process.pid)
+        except psutil.Error:
+            continue
+    return roots
+
+
+def browser_memory_mb(browser: PooledBrowser) -> float:
+    """Resident memory of one browser's process tree, in MB."""
+    total = 0
+    seen: Set[int] = set()
+    for pid in browser.pids:
+        try:
+            root = psutil.Process(pid)
+            processes = [root, *root.children(recursive=True)]
+        except psutil.Error:
+            continue
+        for process in processes:
+            if process.pid in seen:
+                continue
+            seen.add(process.pid)
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """
+    Long-lived pool of headless browsers shared by the workers of a process.
+
+    Jobs lease a started AsyncWebCrawler instead of launching their own
+    Chromium. When a lease ends, the browser's contexts are closed so the next
+    job starts without cookies or storage of the previous one. A browser is
+    replaced after `max_pages` rendered pages, when its own process tree uses
+    more than `max_memory_mb`, or when it fails its health check.
+    """
+
+    def __init__(
+        self,
+        browser_config: BrowserConfig,
+        size: int = 1,
+        max_pages: int = BROWSER_MAX_PAGES,
+        max_memory_mb: int = BROWSER_MAX_MEMORY_MB,
+        crawler_factory: Optional[Callable[[BrowserConfig], AsyncWebCrawler]] = None,
+        memory_probe: Callable[[PooledBrowser], float] = browser_memory_mb,
+    ):
+        """
+        Initialize the pool. Browsers are launched lazily on first lease.
+
+        Args:
+            browser_config: Configuration of every browser in the pool
+            size: Maximum number of browsers alive at the same time
+            max_pages: Pages a browser may render before it is recycled
+            max_memory_mb: Memory of a single browser above which it is
+                recycled on release
+            crawler_factory: Builds a crawler from the browser config
+            memory_probe: Returns the current memory of a browser in MB
+        """
+        self.browser_config = browser_config
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self._crawler_factory = crawler_factory or (
+            lambda config: AsyncWebCrawler(config=config)
+        )
+        self._memory_probe = memory_probe
+        self._idle: List[PooledBrowser] = []
+        self._alive = 0
+        self._condition = asyncio.Condition()
+        # One launch at a time, so new browser processes belong to it
+        self._launch_lock = asyncio.Lock()
+        self._closed = False
+
+    async def _launch(self) -> PooledBrowser:
+        crawler = self._crawler_factory(self.browser_config)
+        async with self._launch_lock:
+            before = await asyncio.to_thread(browser_root_pids)
+            await crawler.start()
+            after = await asyncio.to_thread(browser_root_pids)
+        browser = PooledBrowser(crawler=crawler, pids=after - before)
+
+        strategy = getattr(crawler, "crawler_strategy", None)
+        if hasattr(strategy, "set_hook"):
+
+            async def count_page(page, **_kwargs):
+                browser.pages += 1
+                return page
+
+            strategy.set_hook("on_page_context_created", count_page)
+
+        if browser.pids:
+            logger.info(f"Launched pooled browser (pids {sorted(browser.pids)})")
+        else:
+            logger.info("Launched pooled browser; its process was not found")
+        return browser
+
+    async def _dispose(self, browser: PooledBrowser, reason: str) -> None:
+        logger.info(
+            f"Recycling pooled browser after {browser.pages} pages "
+            f"and {browser.leases} leases: {reason}"
+        )
+        try:
+            await browser.crawler.close()
+        except Exception as e:
+            logger.warning(f"Failed to close pooled browser: {e}")
+
+    @staticmethod
+    def is_healthy(browser: PooledBrowser) -> bool:
+        """Check that the crawler is started and its browser still connected."""
+        crawler = browser.crawler
+        if not getattr(crawler, "ready", True):
+            return False
+        try:
+            manager = crawler.crawler_strategy.browser_manager
+            if manager.browser is not None and not manager.browser.is_connected():
+                return False
+        except AttributeError:
+            pass
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    async def _reset_contexts(browser: PooledBrowser) -> None:
+        """Close the contexts a job created, dropping its cookies and storage."""
+        try:
+            manager = browser.crawler.crawler_strategy.browser_manager
+            contexts = list(manager.contexts_by_config.values())
+            manager.contexts_by_config.clear()
+        except AttributeError:
+            return
+
+        for context in contexts:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"Failed to close browser context: {e}")
+
+    async def _acquire(self) -> PooledBrowser:
+        async with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    browser = self._idle.pop()
+                    break
+                if self._alive < self.size:
+                    self._alive += 1
+                    browser = None
+                    break
+                await self._condition.wait()
+
+        if browser is not None and not self.is_healthy(browser):
+            await self._dispose(browser, "failed health check")
+            browser = None
+
+        if browser is None:
+            try:
+                browser = await self._launch()
+            except Exception:
+                async with self._condition:
+                    self._alive -= 1
+                    self._condition.notify()
+                raise
+
+        browser.leases += 1
+        return browser
+
+    async def _release(self, browser: PooledBrowser) -> None:
+        await self._reset_contexts(browser)
+
+        reason = None
+        if browser.pages >= self.max_pages:
+            reason = f"page limit of {self.max_pages} reached"
+        elif self._memory_probe(browser) >= self.max_memory_mb:
+            reason = f"browser memory above {self.max_memory_mb} MB"
+        elif not self.is_healthy(browser):
+            reason = "failed health check"
+
+        if reason or self._closed:
+            await self._dispose(browser, reason or "pool closed")
+            async with self._condition:
+                self._alive -= 1
+                self._condition.notify()
+            return
+
+        async with self._condition:
+            self._idle.append(browser)
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[AsyncWebCrawler]:
+        """
+        Lease a started crawler for the duration of one job.
+
+        Yields:
+            An AsyncWebCrawler that must not be closed by the caller.
+        """
+        browser = await self._acquire()
+        try:
+            yield browser.crawler
+        finally:
+            await self._release(browser)
+
+    async def close(self) -> None:
+        """Close all idle browsers; leased ones are closed when released."""
+        async with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._alive -= len(idle)
+            self._condition.notify_all()
+
+        for browser in idle:
+            await self._dispose(browser, "pool closed")
@@ -3,7 +3,6 @@ from typing import Tuple
 from crawl4ai import (
     CrawlerRunConfig,
     CacheMode,
-    RateLimiter,
     MemoryAdaptiveDispatcher,
     BrowserConfig,
 )
@@ -12,6 +11,7 @@ from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
 from src.core.algorithms.bfs_no_cycle_deep_crawl_strategy import (
     BFSNoCycleDeepCrawlStrategy,
 )
+from src.core.utils.politeness import politeness_scheduler
 
 
 def crawl_config() -> CrawlerRunConfig:
@@ -49,6 +49,7 @@ def crawl_config() -> CrawlerRunConfig:
             "ttf",  # Assets
         ],
         exclude_patterns=["*wishlist*", "*cart*", "*login*", "*signup*"],
+        dispatcher_factory=crawl_dispatcher,
     )
 
     config = CrawlerRunConfig(
@@ -64,11 +65,16 @@ def crawl_config() -> CrawlerRunConfig:
 
 
 def crawl_dispatcher() -> MemoryAdaptiveDispatcher:
-    """Create a MemoryAdaptiveDispatcher with proper rate limiting."""
+    """
+    Create a MemoryAdaptiveDispatcher with proper rate limiting.
+
+    All dispatchers share the process-wide politeness scheduler, so the
+    per-host pace holds across chunks and workers.
+    """
     dispatcher = MemoryAdaptiveDispatcher(
         memory_threshold_percent=80.0,
         check_interval=0.5,
-        rate_limiter=RateLimiter(),
+        rate_limiter=politeness_scheduler,
     )
 
     return dispatcher
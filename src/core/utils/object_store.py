@@ -0,0 +1,86 @@
+import os
+import uuid
+from typing import List, Optional, Union
+
+from src.core.aws.s3 import S3Operations
+
+
+class LocalBackend:
+    """Objects as files below a directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so readers never see half-written objects
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str) -> List[str]:
+        base = self._path(prefix)
+        if not os.path.isdir(base):
+            return []
+        keys = []
+        for directory, _, files in os.walk(base):
+            rel = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            keys.extend(f"{rel}/{name}" for name in files if not name.endswith(".tmp"))
+        return sorted(keys)
+
+
+class S3Backend:
+    """Objects below a prefix of an S3 bucket."""
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        self.s3 = S3Operations(bucket_name=bucket)
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        return self.s3.object_exists(self._key(key))
+
+    def put(self, key: str, data: bytes) -> None:
+        self.s3.upload_bytes(self._key(key), data)
+
+    def get(self, key: str) -> Optional[bytes]:
+        data, _, _ = self.s3.download_bytes_if_changed(self._key(key))
+        return data
+
+    def delete(self, key: str) -> None:
+        self.s3.delete_object(self._key(key))
+
+    def list(self, prefix: str) -> List[str]:
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        return sorted(key[strip:] for key in self.s3.list_objects(self._key(prefix)))
+
+
+def open_backend(uri: str) -> Union[LocalBackend, S3Backend]:
+    """Open a local directory or s3://bucket/prefix as an object backend."""
+    if uri.startswith("s3://"):
+        bucket, _, prefix = uri[len("s3://") :].partition("/")
+        return S3Backend(bucket, prefix)
+    return LocalBackend(uri)
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+from crawl4ai import RateLimiter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HOST_REQUESTS_PER_SECOND = float(os.getenv("HOST_REQUESTS_PER_SECOND", "0.5"))
+HOST_BURST = int(os.getenv("HOST_BURST", "2"))
+RESPECT_CRAWL_DELAY = os.getenv("RESPECT_CRAWL_DELAY", "true").lower() == "true"
+
+
+def parse_crawl_delay(robots_text: str, user_agent: str = "*") -> Optional[float]:
+    """Return the Crawl-delay for `user_agent` from a robots.txt body, if any."""
+    parser = RobotFileParser()
+    parser.parse(robots_text.splitlines())
+    delay = parser.crawl_delay(user_agent)
+    return float(delay) if delay is not None else None
+
+
+@dataclass
+class HostState:
+    """Token bucket and backoff state of a single host."""
+
+    rate: float
+    capacity: float
+    tokens: float
+    updated_at: float = field(default_factory=time.monotonic)
+    backoff_until: float = 0.0
+    backoff_delay: float = 0.0
+    fail_count: int = 0
+    queued: int = 0
+    crawl_delay: Optional[float] = None
+    crawl_delay_checked: bool = False
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+
+class PolitenessScheduler(RateLimiter):
+    """
+    Per-host token-bucket scheduler shared by every crawl of a process.
+
+    It is a drop-in `RateLimiter` for crawl4ai dispatchers: `wait_if_needed`
+    blocks until the host has a token, `update_delay` reacts to the response
+    status. Each host refills at `requests_per_second` up to `burst` tokens.
+    A `Crawl-delay` from robots.txt lowers the rate for that host, and
+    429/503 responses pause the host with exponential, jittered backoff.
+    Waiters of one host are served in arrival order.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = HOST_REQUESTS_PER_SECOND,
+        burst: int = HOST_BURST,
+        max_delay: float = 60.0,
+        max_retries: int = 3,
+        rate_limit_codes: Optional[List[int]] = None,
+        respect_crawl_delay: bool = RESPECT_CRAWL_DELAY,
+        robots_timeout: float = 10.0,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_second: Sustained request rate per host
+            burst: Maximum number of requests a host may receive back to back
+            max_delay: Upper bound of the backoff pause in seconds
+            max_retries: Consecutive rate-limit responses before giving up
+            rate_limit_codes: Status codes that trigger a backoff
+            respect_crawl_delay: Fetch robots.txt once per host for Crawl-delay
+            robots_timeout: Timeout for the robots.txt request in seconds
+        """
+        super().__init__(
+            max_delay=max_delay,
+            max_retries=max_retries,
+            rate_limit_codes=rate_limit_codes,
+        )
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst)
+        self.respect_crawl_delay = respect_crawl_delay
+        self.robots_timeout = robots_timeout
+        self.hosts: Dict[str, HostState] = {}
+
+    def get_domain(self, url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _state(self, host: str) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostState(
+                rate=self.requests_per_second,
+                capacity=float(self.burst),
+                tokens=float(self.burst),
+            )
+            self.hosts[host] = state
+        return state
+
+    def set_crawl_delay(self, host: str, delay: Optional[float]) -> None:
+        """Apply a robots.txt Crawl-delay (in seconds) to a host."""
+        state = self._state(host)
+        state.crawl_delay_checked = True
+        if not delay or delay <= 0:
+            return
+        state.crawl_delay = delay
+        state.rate = min(state.rate, 1.0 / delay)
+        state.capacity = 1.0
+        state.tokens = min(state.tokens, state.capacity)
+        logger.info(f"Honoring Crawl-delay of {delay}s for {host}")
+
+    async def _load_crawl_delay(self, url: str, host: str) -> None:
+        """Fetch robots.txt of the host once and apply its Crawl-delay."""
+        parsed = urlparse(url)
+        robots_url = f"{parsed.scheme or 'https'}://{parsed.netloc}/robots.txt"
+        delay = None
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.robots_timeout)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(robots_url) as response:
+                    if response.status == 200:
+                        delay = parse_crawl_delay(await response.text(errors="replace"))
+        except Exception as e:
+            logger.debug(f"Failed to read Crawl-delay from {robots_url}: {e}")
+        self.set_crawl_delay(host, delay)
+
+    async def wait_if_needed(self, url: str) -> None:
+        """Wait until the host of `url` may receive another request."""
+        host = self.get_domain(url)
+        state = self._state(host)
+        state.queued += 1
+        try:
+            async with state.lock:
+                if self.respect_crawl_delay and not state.crawl_delay_checked:
+                    await self._load_crawl_delay(url, host)
+
+                while True:
+                    now = time.monotonic()
+                    if state.backoff_until > now:
+                        await asyncio.sleep(state.backoff_until - now)
+                        continue
+
+                    state.refill(now)
+                    if state.tokens >= 1.0:
+                        state.tokens -= 1.0
+                        return
+                    await asyncio.sleep((1.0 - state.tokens) / state.rate)
+        finally:
+            state.queued -= 1
+
+    def update_delay(self, url: str, status_code: int) -> bool:
+        """
+        Adapt the host's pace to a response status.
+
+        Returns:
+            False once the host keeps rate limiting after `max_retries`
+            consecutive backoffs, True otherwise.
+        """
+        host = self.get_domain(url)
+        state = self._state(host)
+
+        if status_code in self.rate_limit_codes:
+            state.fail_count += 1
+            base = state.backoff_delay or 1.0 / state.rate
+            state.backoff_delay = min(
+                base * 2 * random.uniform(0.75, 1.25), self.max_delay
+            )
+            state.backoff_until = time.monotonic() + state.backoff_delay
+            state.tokens = 0.0
+            logger.warning(
+                f"{host} answered {status_code}, backing off for "
+                f"{state.backoff_delay:.1f}s (attempt {state.fail_count})"
+            )
+            return state.fail_count <= self.max_retries
+
+        state.fail_count = 0
+        state.backoff_delay = state.backoff_delay / 2 if state.backoff_delay > 1 else 0
+        return True
+
+    def queue_depth(self, host: str) -> int:
+        """Number of requests currently waiting for a token of `host`."""
+        state = self.hosts.get(host.lower())
+        return state.queued if state else 0
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Waiting requests per host, for hosts with a non-empty queue."""
+        return {host: s.queued for host, s in self.hosts.items() if s.queued}
+
+
+# Shared by all workers of the process so they never hammer the same host
+politeness_scheduler = PolitenessScheduler()
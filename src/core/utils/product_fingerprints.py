@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from src.core.aws.database.models import URLEntry
+from src.core.aws.database.operations import DynamoDBOperations
+from src.core.utils.backend_uploader import Product
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_FINGERPRINT_ENABLED = (
+    os.getenv("PRODUCT_FINGERPRINT_ENABLED", "true").lower() == "true"
+)
+
+
+class ProductFingerprints:
+    """
+    Skips backend writes of products that did not change.
+
+    The markdown hash catches unchanged pages, but markdown also changes
+    for reasons that do not touch the product (view counters, "recently
+    viewed" blocks). The fingerprint of every product the backend took is
+    stored in its URL entry; a newly extracted product with the same
+    fingerprint is not sent again.
+    """
+
+    def __init__(self, db: DynamoDBOperations):
+        self.db = db
+        self._pending: Dict[str, str] = {}
+        self.skipped = 0
+
+    async def filter_changed(
+        self, domain: str, products: List[Product]
+    ) -> List[Product]:
+        """
+        Drop the products whose fingerprint matches the stored one.
+
+        Lookup errors are logged and every product is kept, so a database
+        problem never loses an update.
+
+        Args:
+            domain: Domain the products belong to
+            products: put_products items
+
+        Returns:
+            Products to send, in input order
+        """
+        wires = [p if isinstance(p, dict) else p.to_dict() for p in products]
+        fingerprints = {
+            w["url"]: URLEntry.calculate_product_fingerprint(w)
+            for w in wires
+            if w.get("url")
+        }
+        if not fingerprints:
+            return products
+        try:
+            entries = await asyncio.to_thread(
+                self.db.batch_get_url_entries, domain, list(fingerprints)
+            )
+        except Exception as e:
+            logger.warning(f"Fingerprint lookup failed for {domain}: {e}")
+            entries = {}
+
+        # Products that were dead-lettered are never recorded
+        if len(self._pending) > 10_000:
+            self._pending.clear()
+        changed = []
+        for product, wire in zip(products, wires):
+            url = wire.get("url")
+            entry = entries.get(url)
+            if entry is not None and entry.product_fingerprint == fingerprints[url]:
+                self.skipped += 1
+                logger.debug(f"Product at {url} unchanged, not sent")
+                continue
+            if url:
+                self._pending[url] = fingerprints[url]
+            changed.append(product)
+        return changed
+
+    async def record(self, domain: str, urls: List[str]) -> None:
+        """
+        Store the fingerprints of products the backend took.
+
+        Fingerprints are only written after the upload, so a product that
+        never reached the backend is sent again on the next scrape.
+        """
+        updates = {url: self._pending.pop(url) for url in urls if url in self._pending}
+        if updates:
+            await asyncio.to_thread(self._write, domain, updates)
+
+    def _write(self, domain: str, updates: Dict[str, str]) -> None:
+        for url, fingerprint in updates.items():
+            try:
+                self.db.update_product_fingerprint(domain, url, fingerprint)
+            except Exception as e:
+                logger.warning(f"Failed to store product fingerprint of {url}: {e}")
@@ -0,0 +1,470 @@
+"""
+Offline bulk extraction for backfills.
+
+Reads crawled pages from a JSONL file (local path or s3://bucket/key), one
+object per line with "url", "domain" and "markdown", and writes one result
+per page with "url", "domain", "product" and "error" to JSONL. Results can
+later be replayed into the backend.
+
+Subcommands:
+    offline        Extract with vLLM's in-process batch engine (gpu extra)
+    prepare-batch  Write an OpenAI batch request file (e.g. for `vllm run-batch`)
+    collect-batch  Turn a batch output file into result records
+    reextract      Extract the pages of a snapshot store again
+    replay         Send result records to the backend with put_products
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from src.core.aws.s3 import S3Operations
+from src.core.scraper.base import PRODUCT_RESPONSE_FORMAT
+from src.core.scraper.qwen import (
+    SYSTEM_PROMPT,
+    boilerplate_remover,
+    build_extraction_prompt,
+    cleaning_executor,
+    decode_product,
+    extract,
+)
+from src.core.scraper.snapshot_store import SnapshotStore
+from src.core.scraper.schemas.extracted_product import ExtractedProduct
+from src.core.scraper.schemas.mapper import product_to_wire
+from src.core.utils.backend_uploader import BackendUploader, DeadLetterStore
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BULK_MODEL_NAME = os.getenv("BULK_MODEL_NAME", "Qwen/Qwen3-8B-AWQ")
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "256"))
+BULK_MAX_TOKENS = int(os.getenv("BULK_MAX_TOKENS", "2500"))
+BULK_MAX_MODEL_LEN = int(os.getenv("BULK_MAX_MODEL_LEN", "10000"))
+# Parallel requests when re-extracting through the served model
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "32"))
+
+Record = Dict[str, Any]
+
+
+def _split_s3_uri(uri: str) -> Tuple[str, str]:
+    bucket, _, key = uri[len("s3://") :].partition("/")
+    return bucket, key
+
+
+def read_jsonl(source: str) -> List[Record]:
+    """Read records from a local JSONL file or an s3://bucket/key object."""
+    if source.startswith("s3://"):
+        bucket, key = _split_s3_uri(source)
+        data, _, _ = S3Operations(bucket_name=bucket).download_bytes_if_changed(key)
+        if data is None:
+            raise FileNotFoundError(source)
+        lines = data.decode("utf-8").splitlines()
+    else:
+        with open(source, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def write_jsonl(target: str, records: Sequence[Record]) -> None:
+    """Write records to a local JSONL file or an s3://bucket/key object."""
+    body = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    if target.startswith("s3://"):
+        bucket, key = _split_s3_uri(target)
+        S3Operations(bucket_name=bucket).upload_bytes(
+            key, body.encode("utf-8"), content_type="application/x-ndjson"
+        )
+    else:
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(body)
+    logger.info(f"Wrote {len(records)} records to {target}")
+
+
+def schedule_by_length(
+    records: Sequence[Record], batch_size: int
+) -> Iterator[List[Record]]:
+    """
+    Yield batches of pages with similar length, longest first.
+
+    Grouping similar prompt lengths keeps batches evenly packed, and starting
+    with the longest pages avoids a long straggler at the end of the run.
+    """
+    ordered = sorted(records, key=lambda r: len(r.get("markdown") or ""), reverse=True)
+    for i in range(0, len(ordered), max(1, batch_size)):
+        yield ordered[i : i + batch_size]
+
+
+async def clean_records(records: List[Record]) -> List[Record]:
+    """
+    Clean the markdown of every record with its shop's noise filter and
+    boilerplate blocks. Shops without stored blocks are only noise-filtered;
+    no discovery crawl is started.
+    """
+    by_domain: Dict[str, List[Record]] = {}
+    for record in records:
+        by_domain.setdefault(record.get("domain") or "", []).append(record)
+
+    cleaned_records = []
+    for domain, group in by_domain.items():
+        matcher = None
+        if domain:
+            try:
+                blocks = await boilerplate_remover.load_for_shop(domain)
+                if blocks:
+                    matcher = boilerplate_remover.matcher_for(domain, blocks)
+            except Exception as e:
+                logger.warning(f"No boilerplate blocks for {domain}: {e}")
+        cleaned = await cleaning_executor.clean_many(
+            domain, [r["markdown"] for r in group], matcher
+        )
+        cleaned_records.extend(
+            {**record, "markdown": markdown} for record, markdown in zip(group, cleaned)
+        )
+    return cleaned_records
+
+
+def build_messages(
+    markdown: str, current_time: Optional[datetime] = None
+) -> List[Dict[str, str]]:
+    """Chat messages of one extraction request."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_extraction_prompt(markdown, current_time)},
+    ]
+
+
+def result_record(
+    record: Record, product: Optional[ExtractedProduct], error: Optional[str] = None
+) -> Record:
+    """The result record of a page."""
+    if product is None and error is None:
+        error = "Response could not be decoded"
+    return {
+        "url": record["url"],
+        "domain": record.get("domain"),
+        "product": product.model_dump(mode="json") if product else None,
+        "error": error,
+    }
+
+
+def decoded_record(record: Record, response_text: Optional[str]) -> Record:
+    """Decode a raw model answer into the result record of a page."""
+    product = decode_product(response_text) if response_text else None
+    return result_record(record, product)
+
+
+class VLLMEngine:
+    """In-process vLLM engine generating whole batches at once."""
+
+    def __init__(
+        self,
+        model: str = BULK_MODEL_NAME,
+        max_tokens: int = BULK_MAX_TOKENS,
+        max_model_len: int = BULK_MAX_MODEL_LEN,
+    ):
+        try:
+            from vllm import LLM, SamplingParams
+            from vllm.sampling_params import StructuredOutputsParams
+        except ImportError as e:
+            raise RuntimeError(
+                "Offline extraction needs vLLM; install the 'gpu' extra"
+            ) from e
+
+        self.llm = LLM(
+            model=model, max_model_len=max_model_len, enable_prefix_caching=True
+        )
+        self.sampling_params = SamplingParams(
+            temperature=0,
+            max_tokens=max_tokens,
+            structured_outputs=StructuredOutputsParams(
+                json=ExtractedProduct.model_json_schema()
+            ),
+        )
+
+    def generate(self, conversations: List[List[Dict[str, str]]]) -> List[str]:
+        outputs = self.llm.chat(
+            conversations,
+            self.sampling_params,
+            use_tqdm=False,
+            chat_template_kwargs={"enable_thinking": False},
+        )
+        return [output.outputs[0].text for output in outputs]
+
+
+async def extract_offline(
+    records: List[Record],
+    batch_size: int = BULK_BATCH_SIZE,
+    engine: Optional[Any] = None,
+) -> List[Record]:
+    """
+    Extract pages with the in-process engine, batched by length.
+
+    Args:
+        records: Pages with url, domain and (cleaned) markdown
+        batch_size: Pages handed to the engine at once
+        engine: Object with `generate(conversations) -> texts`; defaults to
+            a VLLMEngine
+
+    Returns:
+        The result records
+    """
+    engine = engine or VLLMEngine()
+    current_time = datetime.now(timezone.utc)
+
+    results = []
+    for batch in schedule_by_length(records, batch_size):
+        conversations = [build_messages(r["markdown"], current_time) for r in batch]
+        try:
+            texts = await asyncio.to_thread(engine.generate, conversations)
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} pages failed: {e}")
+            results.extend(result_record(r, None, str(e)) for r in batch)
+            continue
+        results.extend(decoded_record(r, text) for r, text in zip(batch, texts))
+        logger.info(f"Extracted {len(results)}/{len(records)} pages")
+    return results
+
+
+async def extract_online(
+    records: List[Record], concurrency: int = BULK_CONCURRENCY
+) -> List[Record]:
+    """
+    Extract pages through the served model (the LLM endpoint pool).
+
+    Args:
+        records: Pages with url, domain and cleaned markdown
+        concurrency: Requests in flight at once
+
+    Returns:
+        The result records
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def extract_one(record: Record) -> Record:
+        async with semaphore:
+            try:
+                product = await extract(
+                    record["markdown"], record.get("domain"), clean=False
+                )
+            except Exception as e:
+                return result_record(record, None, str(e))
+        return result_record(record, product)
+
+    ordered = [r for batch in schedule_by_length(records, len(records)) for r in batch]
+    return list(await asyncio.gather(*(extract_one(r) for r in ordered)))
+
+
+async def run_offline(
+    source: str,
+    target: str,
+    batch_size: int = BULK_BATCH_SIZE,
+    engine: Optional[Any] = None,
+    clean: bool = True,
+) -> List[Record]:
+    """
+    Extract every page of `source` with the in-process engine.
+
+    Args:
+        source: Input JSONL with url, domain and markdown
+        target: Output JSONL for the result records
+        batch_size: Pages handed to the engine at once
+        engine: Engine passed on to `extract_offline`
+        clean: Whether to clean the markdown first
+
+    Returns:
+        The result records
+    """
+    records = [r for r in read_jsonl(source) if r.get("markdown")]
+    if clean:
+        records = await clean_records(records)
+    results = await extract_offline(records, batch_size, engine)
+    write_jsonl(target, results)
+    return results
+
+
+async def reextract(
+    store: str,
+    target: str,
+    domains: Optional[Sequence[str]] = None,
+    online: bool = False,
+    batch_size: int = BULK_BATCH_SIZE,
+    concurrency: int = BULK_CONCURRENCY,
+    engine: Optional[Any] = None,
+) -> List[Record]:
+    """
+    Extract the latest snapshot of every page again, e.g. after a prompt or
+    schema change. Snapshots are already cleaned, so only the model runs.
+
+    Args:
+        store: Snapshot store, a directory or s3://bucket/prefix
+        target: Output JSONL for the result records
+        domains: Domains to re-extract; all if None
+        online: Use the served model instead of the in-process engine
+        batch_size: Pages per engine batch (offline)
+        concurrency: Requests in flight (online)
+        engine: Engine passed on to `extract_offline`
+
+    Returns:
+        The result records
+    """
+    snapshots = SnapshotStore.from_uri(store)
+    records = await asyncio.to_thread(snapshots.load_pages, domains)
+    logger.info(f"Re-extracting {len(records)} pages from {store}")
+    if online:
+        results = await extract_online(records, concurrency)
+    else:
+        results = await extract_offline(records, batch_size, engine)
+    write_jsonl(target, results)
+    return results
+
+
+async def prepare_batch(
+    source: str,
+    target: str,
+    model: str = BULK_MODEL_NAME,
+    clean: bool = True,
+) -> List[Record]:
+    """
+    Write an OpenAI batch request file for the pages of `source`.
+
+    Requests are ordered by length like the offline scheduler, and the page
+    URL is used as custom_id so `collect_batch` can match the answers.
+    """
+    records = [r for r in read_jsonl(source) if r.get("markdown")]
+    if clean:
+        records = await clean_records(records)
+    current_time = datetime.now(timezone.utc)
+
+    requests = [
+        {
+            "custom_id": record["url"],
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": build_messages(record["markdown"], current_time),
+                "temperature": 0,
+                "max_tokens": BULK_MAX_TOKENS,
+                "response_format": PRODUCT_RESPONSE_FORMAT,
+                "chat_template_kwargs": {"enable_thinking": False},
+            },
+        }
+        for batch in schedule_by_length(records, len(records))
+        for record in batch
+    ]
+    write_jsonl(target, requests)
+    return requests
+
+
+def collect_batch(source: str, batch_output: str, target: str) -> List[Record]:
+    """Turn the output file of a batch run into result records."""
+    records = {r["url"]: r for r in read_jsonl(source)}
+    results = []
+    for line in read_jsonl(batch_output):
+        record = records.get(line.get("custom_id"), {"url": line.get("custom_id")})
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code", 200) != 200:
+            error = line.get("error") or f"HTTP {response.get('status_code')}"
+            results.append(result_record(record, None, str(error)))
+            continue
+        choices = (response.get("body") or {}).get("choices") or [{}]
+        text = (choices[0].get("message") or {}).get("content")
+        results.append(decoded_record(record, text))
+    write_jsonl(target, results)
+    return results
+
+
+async def replay(source: str, batch_size: int = 50) -> int:
+    """
+    Send the products of a result file to the backend.
+
+    Returns:
+        Number of products sent
+    """
+    items = []
+    for record in read_jsonl(source):
+        product = record.get("product")
+        if not product or not product.get("is_product"):
+            continue
+        extracted = ExtractedProduct.model_validate(product)
+        items.append(product_to_wire(extracted, record["url"]))
+
+    async with BackendUploader(
+        batch_size=batch_size, max_age=0, dead_letter=DeadLetterStore.from_env()
+    ) as uploader:
+        for item in items:
+            await uploader.add(item)
+    sent = uploader.sent
+    logger.info(f"Replayed {sent}/{len(items)} products from {source}")
+    return sent
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    offline = commands.add_parser("offline", help="Extract with in-process vLLM")
+    offline.add_argument("source")
+    offline.add_argument("target")
+    offline.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    offline.add_argument("--no-clean", action="store_true")
+
+    prepare = commands.add_parser("prepare-batch", help="Write a batch request file")
+    prepare.add_argument("source")
+    prepare.add_argument("target")
+    prepare.add_argument("--model", default=BULK_MODEL_NAME)
+    prepare.add_argument("--no-clean", action="store_true")
+
+    collect = commands.add_parser("collect-batch", help="Read a batch output file")
+    collect.add_argument("source")
+    collect.add_argument("batch_output")
+    collect.add_argument("target")
+
+    again = commands.add_parser("reextract", help="Extract snapshots again")
+    again.add_argument("store")
+    again.add_argument("target")
+    again.add_argument("--domain", action="append", dest="domains")
+    again.add_argument("--online", action="store_true")
+    again.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    again.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY)
+
+    replay_cmd = commands.add_parser("replay", help="Send results to the backend")
+    replay_cmd.add_argument("source")
+    replay_cmd.add_argument("--batch-size", type=int, default=50)
+
+    args = parser.parse_args(argv)
+    if args.command == "offline":
+        asyncio.run(
+            run_offline(
+                args.source, args.target, args.batch_size, clean=not args.no_clean
+            )
+        )
+    elif args.command == "prepare-batch":
+        asyncio.run(
+            prepare_batch(args.source, args.target, args.model, not args.no_clean)
+        )
+    elif args.command == "collect-batch":
+        collect_batch(args.source, args.batch_output, args.target)
+    elif args.command == "reextract":
+        asyncio.run(
+            reextract(
+                args.store,
+                args.target,
+                args.domains,
+                args.online,
+                args.batch_size,
+                args.concurrency,
+            )
+        )
+    else:
+        asyncio.run(replay(args.source, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
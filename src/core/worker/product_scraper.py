@@ -3,7 +3,7 @@ import json
 import os
 import time
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 
@@ -17,13 +17,32 @@ from src.core.aws.sqs.message_wrapper import (
     visibility_heartbeat,
 )
 from src.core.aws.sqs.queue_wrapper import get_queue
-from src.core.scraper.schemas.mapper import map_extracted_product_to_api
-from src.core.utils.api_client import api_client
-from aura_historia_backend_api_client.api.products import put_products
-from aura_historia_backend_api_client.models import (
-    PutProductsCollectionData,
-    PutProductData,
+from src.core.scraper.cleaning.cleaning_executor import (
+    CLEANING_PROCESSES,
+    CleaningExecutor,
 )
+from src.core.scraper.base import llm_pool
+from src.core.scraper.fetch_strategy import HybridFetcher
+from src.core.scraper.llm_errors import LLMTruncatedError
+from src.core.scraper.revalidation import REVALIDATION_ENABLED, Revalidator
+from src.core.scraper.snapshot_store import SnapshotStore
+from src.core.scraper.structured_data import (
+    fill_gaps,
+    product_fields,
+    product_from_fields,
+)
+from src.core.utils.api_client import api_client_factory
+from src.core.utils.backend_uploader import BackendUploader, DeadLetterStore
+from src.core.utils.product_fingerprints import (
+    PRODUCT_FINGERPRINT_ENABLED,
+    ProductFingerprints,
+)
+from src.core.utils.browser_pool import BrowserPool
+from src.core.scraper.schemas.mapper import (
+    map_extracted_product_to_api,
+    product_to_wire,
+)
+from aura_historia_backend_api_client.models import PutProductData
 from src.core.utils.logger import logger
 from src.core.utils.configs import (
     build_product_scraper_components,
@@ -31,7 +50,13 @@ from src.core.utils.configs import (
 )
 from src.core.worker.base_worker import generic_worker, run_worker_pool
 from crawl4ai import AsyncWebCrawler
-from src.core.scraper.qwen import extract as qwen_extract, extract
+from src.core.scraper.qwen import (
+    LLM_GATE_ENABLED,
+    extract as qwen_extract,
+    extract,
+    clean_for_extraction,
+    gate_product,
+)
 
 load_dotenv()
 
@@ -41,12 +66,16 @@ QUEUE_NAME = os.getenv("SQS_QUEUE_NAME")
 
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "2"))
 LOG_METRICS_INTERVAL = int(os.getenv("LOG_METRICS_INTERVAL", "2"))
+HTTP_FETCH_ENABLED = os.getenv("HTTP_FETCH_ENABLED", "true").lower() == "true"
+STRUCTURED_DATA_ENABLED = os.getenv("STRUCTURED_DATA_ENABLED", "true").lower() == "true"
 
 
 shutdown_event: asyncio.Event = asyncio.Event()
 
 db_operations = DynamoDBOperations()
 
+dead_letter_store = DeadLetterStore.from_env()
+
 
 async def process_result_async(result: Any, domain) -> Optional[PutProductData]:
     """
@@ -67,7 +96,6 @@ async def process_result_async(result: Any, domain) -> Optional[PutProductData]:
         start_ts = time.perf_counter()
 
         qwen_out = await qwen_extract(markdown, domain)
-        print(len(markdown))
 
         end_ts = time.perf_counter()
         elapsed_s = end_ts - start_ts
@@ -97,28 +125,39 @@ async def process_result_async(result: Any, domain) -> Optional[PutProductData]:
         return None
 
 
-async def batch_sender(q: asyncio.Queue, batch_size: int) -> None:
-    """Drain `q` and send accumulated items via `send_items` until a ``None`` sentinel arrives."""
-    batch: List[ScrapedData] = []
-    while True:
-        item = await q.get()
-        if item is None:
-            if batch:
-                try:
-                    collection = PutProductsCollectionData(items=batch)
-                    await put_products.asyncio(client=api_client, body=collection)
-                except Exception as e:
-                    logger.exception("Failed to send final batch: %s", e)
-            break
+async def batch_sender(
+    q: asyncio.Queue,
+    batch_size: int,
+    domain: Optional[str] = None,
+    fingerprints: Optional[ProductFingerprints] = None,
+) -> None:
+    """
+    Drain `q` into a BackendUploader until a ``None`` sentinel arrives.
 
-        batch.append(item)
-        if len(batch) >= batch_size:
-            try:
-                collection = PutProductsCollectionData(items=batch)
-                await put_products.asyncio(client=api_client, body=collection)
-                batch = []
-            except Exception as e:
-                logger.exception("Failed to send batch: %s", e)
+    With `fingerprints` (and the `domain` of the products), whatever is
+    queued is looked up in one batch and unchanged products are skipped.
+    """
+    dedupe = fingerprints is not None and domain is not None
+
+    async def record(urls: List[str]) -> None:
+        await fingerprints.record(domain, urls)
+
+    async with BackendUploader(
+        batch_size=batch_size,
+        dead_letter=dead_letter_store,
+        on_sent=record if dedupe else None,
+    ) as uploader:
+        done = False
+        while not done:
+            items = [await q.get()]
+            while not q.empty():
+                items.append(q.get_nowait())
+            if None in items:
+                items, done = items[: items.index(None)], True
+            if dedupe and items:
+                items = await fingerprints.filter_changed(domain, items)
+            for item in items:
+                await uploader.add(item)
 
 
 async def process_single_url(
@@ -131,14 +170,13 @@ async def process_single_url(
     """Process a single URL: fetch, extract, and queue result."""
     try:
         result = await asyncio.wait_for(
-            crawler.arun(url, config=run_config, dispatcher=crawl_dispatcher()),
+            crawler.arun(url, config=run_config),
             timeout=REQUEST_TIMEOUT,
         )
 
         if result and getattr(result, "success", False):
             extracted = await process_result_async(result, domain)
             if extracted:
-                print(json.dumps(extracted.to_dict()))
                 await result_queue.put(extracted)
 
     except asyncio.TimeoutError:
@@ -152,6 +190,51 @@ async def process_single_url(
         logger.exception("Error processing %s: %s", url, e, extra={"domain": domain})
 
 
+async def gate_chunk(
+    domain: str,
+    markdowns: List[str],
+    urls: List[str],
+    structured_fields: List[dict],
+    stats: PerformanceStats,
+) -> Tuple[List[str], List[str], List[dict], List[Optional[bool]]]:
+    """
+    Run the is_product gate on a chunk and drop the pages it rejects.
+
+    Pages whose gate call fails are kept, so errors never lose products.
+
+    Returns:
+        The markdowns, URLs, structured fields and gate verdicts of the pages
+        that passed; the verdict is True, or None if the gate failed
+    """
+    start_ts = time.perf_counter()
+    verdicts = await asyncio.gather(
+        *(gate_product(markdown, domain) for markdown in markdowns),
+        return_exceptions=True,
+    )
+    stats.gate_seconds += time.perf_counter() - start_ts
+    stats.gate_calls += len(markdowns)
+
+    passed = ([], [], [], [])
+    for verdict, markdown, url, fields in zip(
+        verdicts, markdowns, urls, structured_fields
+    ):
+        if verdict is False:
+            stats.gate_rejections += 1
+            stats.filtered_non_products += 1
+            logger.debug(f"Gate rejected {url}")
+            continue
+        if verdict is True:
+            stats.gate_passes += 1
+        else:
+            stats.gate_errors += 1
+            verdict = None
+        passed[0].append(markdown)
+        passed[1].append(url)
+        passed[2].append(fields)
+        passed[3].append(verdict)
+    return passed
+
+
 async def scrape(
     crawler: AsyncWebCrawler,
     domain: str,
@@ -160,10 +243,17 @@ async def scrape(
     run_config: Any,
     vllm_batch_size: int = 4,  # Parallel LLM requests
     backend_batch_size: int = 50,
+    fetcher: Optional[HybridFetcher] = None,
+    revalidator: Optional[Revalidator] = None,
+    cleaner: Optional[CleaningExecutor] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    fingerprints: Optional[ProductFingerprints] = None,
 ) -> int:
     processed_count = 0
     results_q = asyncio.Queue()
-    consumer_task = asyncio.create_task(batch_sender(results_q, backend_batch_size))
+    consumer_task = asyncio.create_task(
+        batch_sender(results_q, backend_batch_size, domain, fingerprints)
+    )
 
     stats = PerformanceStats(total_urls=len(urls), domains_processed=domain)
 
@@ -174,32 +264,117 @@ async def scrape(
             break
 
         url_chunk = urls[i : i + vllm_batch_size]
+        fetch_urls = url_chunk
+        entries = None
+
+        # 0. Conditional requests: skip rendering pages that did not change
+        if revalidator is not None:
+            entries = await revalidator.load_entries(domain, url_chunk)
+            fetch_urls, unchanged = await revalidator.filter_changed(
+                domain, url_chunk, entries
+            )
+            stats.n_unchanged_urls += len(unchanged)
+            stats.n_revalidated_urls += len(unchanged)
+
+        # 1. Parallel Crawl for the chunk (plain HTTP first if a fetcher is set)
+        if not fetch_urls:
+            crawl_results = []
+        elif fetcher is not None:
+            crawl_results = await fetcher.fetch_many(
+                crawler,
+                fetch_urls,
+                domain,
+                run_config,
+                dispatcher_factory=crawl_dispatcher,
+            )
+        else:
+            crawl_results = await crawler.arun_many(
+                fetch_urls, config=run_config, dispatcher=crawl_dispatcher()
+            )
 
-        # 1. Parallel Crawl for the chunk
-        crawl_results = await crawler.arun_many(url_chunk, config=run_config)
-
-        valid_tasks = []
+        valid_markdowns = []
         valid_urls = []
+        valid_html = []
 
         # 2. Prepare Parallel Extraction
         for res in crawl_results:
             if res.success:
+                if revalidator is not None:
+                    await revalidator.record(domain, res)
+
                 # Deduplicate before sending to GPU
-                if await update_hash(res.markdown, domain, res.url):
-                    valid_tasks.append(extract(res.markdown, domain))
+                if await update_hash(res.markdown, domain, res.url, entries):
+                    valid_markdowns.append(res.markdown)
                     valid_urls.append(res.url)
+                    valid_html.append(res.html)
                 else:
                     stats.n_unchanged_urls += 1
 
+        # 2a. Structured data fast path: complete schema.org products skip the LLM
+        structured_fields = [{} for _ in valid_urls]
+        if STRUCTURED_DATA_ENABLED and valid_urls:
+            structured_fields = await asyncio.gather(
+                *(
+                    asyncio.to_thread(product_fields, html, url)
+                    for html, url in zip(valid_html, valid_urls)
+                )
+            )
+            llm_markdowns, llm_urls, llm_fields = [], [], []
+            for markdown, url, fields in zip(
+                valid_markdowns, valid_urls, structured_fields
+            ):
+                product = product_from_fields(fields)
+                if product is None:
+                    llm_markdowns.append(markdown)
+                    llm_urls.append(url)
+                    llm_fields.append(fields)
+                    continue
+                logger.debug(f"Extracted {url} from structured data")
+                stats.structured_data_extractions += 1
+                stats.extracted_successfully += 1
+                await results_q.put(product_to_wire(product, url))
+            valid_markdowns, valid_urls = llm_markdowns, llm_urls
+            structured_fields = llm_fields
+
+        cleaned = None
+        if valid_markdowns and (
+            cleaner is not None or LLM_GATE_ENABLED or snapshots is not None
+        ):
+            # Clean the whole chunk off the event loop in one round trip
+            cleaned = await clean_for_extraction(valid_markdowns, domain, cleaner)
+
+        # Keep what the LLM sees, so prompt changes can be replayed without crawling
+        if snapshots is not None and cleaned:
+            await snapshots.save_async(domain, valid_urls, cleaned)
+
+        # 2b. Gate: only pages the model calls a product get the full schema
+        gate_verdicts: List[Optional[bool]] = [None] * len(valid_urls)
+        if LLM_GATE_ENABLED and cleaned:
+            cleaned, valid_urls, structured_fields, gate_verdicts = await gate_chunk(
+                domain, cleaned, valid_urls, structured_fields, stats
+            )
+
+        if cleaned is not None:
+            valid_tasks = [
+                extract(markdown, domain, clean=False) for markdown in cleaned
+            ]
+        else:
+            valid_tasks = [extract(markdown, domain) for markdown in valid_markdowns]
+        stats.llm_extractions += len(valid_tasks)
+
         # 3. Parallel Extraction (Concurrent Requests to vLLM)
         if valid_tasks:
             # This triggers vLLM's continuous batching
+            start_ts = time.perf_counter()
             extractions = await asyncio.gather(*valid_tasks, return_exceptions=True)
+            stats.extraction_seconds += time.perf_counter() - start_ts
 
-            for product, url in zip(extractions, valid_urls):
+            for product, url, fields, verdict in zip(
+                extractions, valid_urls, structured_fields, gate_verdicts
+            ):
                 # Case A: System / Network / Token Limit Error
                 if isinstance(product, Exception):
-                    if "LengthFinishReasonError" in str(product):
+                    if isinstance(product, LLMTruncatedError):
                         stats.token_limit_errors += 1
                         logger.warning(f"Truncated JSON (Token Limit) for {url}")
                     else:
@@ -216,11 +391,15 @@ async def scrape(
                 # Case C: Absolute Success
                 if product.is_product:
                     stats.extracted_successfully += 1
-                    product = map_extracted_product_to_api(product, url)
-                    await results_q.put(product)
+                    filled = fill_gaps(product, fields)
+                    if filled is not product:
+                        stats.structured_data_gap_fills += 1
+                    await results_q.put(product_to_wire(filled, url))
                 else:
                     # It's valid JSON, but the LLM correctly identified it's NOT a product
                     stats.filtered_non_products += 1
+                    if verdict is True:
+                        stats.gate_false_positives += 1
 
         # 4. Update Progress
         processed_count += len(url_chunk)
@@ -236,7 +415,9 @@ async def scrape(
     return processed_count
 
 
-async def update_hash(markdown, domain, url) -> bool:
+async def update_hash(
+    markdown, domain, url, entries: Optional[Dict[str, URLEntry]] = None
+) -> bool:
     """
     Update the hash of a URL entry in the database based on status and price.
 
@@ -244,11 +425,16 @@ async def update_hash(markdown, domain, url) -> bool:
         markdown: Extracted markdown content of the page.
         domain: The domain of the URL.
         url: The URL being processed.
+        entries: URL entries already batch-loaded for the chunk. A URL missing
+            from them has no entry; the entry is only read when omitted.
     Returns:
         True if the hash was updated, False otherwise.
     """
     new_hash = URLEntry.calculate_hash(markdown)
-    old_entry = await asyncio.to_thread(db_operations.get_url_entry, domain, url)
+    if entries is not None:
+        old_entry = entries.get(url)
+    else:
+        old_entry = await asyncio.to_thread(db_operations.get_url_entry, domain, url)
     old_hash = old_entry.hash if old_entry else None
     if (not old_hash and new_hash) or (old_hash != new_hash):
         try:
@@ -270,6 +456,12 @@ async def handle_domain_message(
     queue: Any,
     backend_batch_size: int,
     vllm_batch_size: int,
+    fetcher: Optional[HybridFetcher] = None,
+    browser_pool: Optional[BrowserPool] = None,
+    revalidator: Optional[Revalidator] = None,
+    cleaner: Optional[CleaningExecutor] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    fingerprints: Optional[ProductFingerprints] = None,
 ) -> None:
     """Handles the full lifecycle of a single domain message.
 
@@ -280,6 +472,18 @@ async def handle_domain_message(
         queue (Any): SQS queue.
         backend_batch_size (int): Batch size for sending items.
         vllm_batch_size (int): Batch size for sending to vllm.
+        fetcher (Optional[HybridFetcher]): Shared HTTP-first fetcher; if None,
+            every page is rendered in the browser.
+        browser_pool (Optional[BrowserPool]): Pool to lease the browser from;
+            if None, a browser is launched for this message only.
+        revalidator (Optional[Revalidator]): Skips rendering of pages whose
+            HTTP validators show no change.
+        cleaner (Optional[CleaningExecutor]): Cleans markdown in worker
+            processes; if None, pages are cleaned on the event loop.
+        snapshots (Optional[SnapshotStore]): Stores the cleaned markdown of
+            every extracted page for later re-extraction.
+        fingerprints (Optional[ProductFingerprints]): Skips backend writes of
+            products that did not change.
     """
     domain, next_url = parse_message_body(message)
 
@@ -336,7 +540,12 @@ async def handle_domain_message(
 
         try:
             browser_config, run_config = build_product_scraper_components()
-            async with AsyncWebCrawler(config=browser_config) as crawler:
+            session = (
+                browser_pool.lease()
+                if browser_pool is not None
+                else AsyncWebCrawler(config=browser_config)
+            )
+            async with session as crawler:
                 items_processed = await scrape(
                     crawler=crawler,
                     domain=domain,
@@ -345,6 +554,11 @@ async def handle_domain_message(
                     run_config=run_config,
                     backend_batch_size=backend_batch_size,
                     vllm_batch_size=vllm_batch_size,
+                    fetcher=fetcher,
+                    revalidator=revalidator,
+                    cleaner=cleaner,
+                    snapshots=snapshots,
+                    fingerprints=fingerprints,
                 )
 
             if shutdown_event.is_set():
@@ -374,6 +588,12 @@ async def worker(
     db: DynamoDBOperations,
     backend_batch_size: int,
     vllm_batch_size: int,
+    fetcher: Optional[HybridFetcher] = None,
+    browser_pool: Optional[BrowserPool] = None,
+    revalidator: Optional[Revalidator] = None,
+    cleaner: Optional[CleaningExecutor] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    fingerprints: Optional[ProductFingerprints] = None,
 ) -> None:
     """Worker function for processing domain messages from SQS queue.
 
@@ -382,11 +602,29 @@ async def worker(
         queue (Any): SQS queue object to poll messages from.
         db (DynamoDBOperations): Database operations instance.
         batch_size (int): Number of items to batch before sending.
+        fetcher (Optional[HybridFetcher]): Fetcher shared by all workers.
+        browser_pool (Optional[BrowserPool]): Browser pool shared by all workers.
+        revalidator (Optional[Revalidator]): Revalidator shared by all workers.
+        cleaner (Optional[CleaningExecutor]): Cleaning executor shared by all workers.
+        snapshots (Optional[SnapshotStore]): Snapshot store shared by all workers.
+        fingerprints (Optional[ProductFingerprints]): Product fingerprints
+            shared by all workers.
     """
 
     async def handler(message: Any) -> None:
         await handle_domain_message(
-            message, db, shutdown_event, queue, backend_batch_size, vllm_batch_size
+            message,
+            db,
+            shutdown_event,
+            queue,
+            backend_batch_size,
+            vllm_batch_size,
+            fetcher=fetcher,
+            browser_pool=browser_pool,
+            revalidator=revalidator,
+            cleaner=cleaner,
+            snapshots=snapshots,
+            fingerprints=fingerprints,
         )
 
     await generic_worker(
@@ -417,16 +655,56 @@ async def main(
         logger.error(f"Initialization failed: {e}")
         return
 
+    # One fetcher per process so the per-domain fetch mode is shared
+    fetcher = HybridFetcher() if HTTP_FETCH_ENABLED else None
+    browser_config, _ = build_product_scraper_components()
+    browser_pool = BrowserPool(browser_config, size=n_workers)
+    revalidator = Revalidator(db) if REVALIDATION_ENABLED else None
+    cleaner = CleaningExecutor() if CLEANING_PROCESSES > 0 else None
+    snapshots = SnapshotStore.from_env()
+    fingerprints = ProductFingerprints(db) if PRODUCT_FINGERPRINT_ENABLED else None
+    llm_pool.start()
+    # Send what a previous run could not deliver, next to the new work
+    replay_task = asyncio.create_task(
+        BackendUploader(dead_letter=dead_letter_store).replay_dead_letters()
+    )
+
     # Worker factory function
     async def create_worker(worker_id: int) -> None:
-        await worker(worker_id, queue, db, backend_batch_size, vllm_batch_size)
+        await worker(
+            worker_id,
+            queue,
+            db,
+            backend_batch_size,
+            vllm_batch_size,
+            fetcher=fetcher,
+            browser_pool=browser_pool,
+            revalidator=revalidator,
+            cleaner=cleaner,
+            snapshots=snapshots,
+            fingerprints=fingerprints,
+        )
 
-    await run_worker_pool(
-        n_workers=n_workers,
-        shutdown_event=shutdown_event,
-        worker_factory=create_worker,
-        shutdown_timeout=90.0,
-    )
+    try:
+        await run_worker_pool(
+            n_workers=n_workers,
+            shutdown_event=shutdown_event,
+            worker_factory=create_worker,
+            shutdown_timeout=90.0,
+        )
+    finally:
+        if not replay_task.done():
+            replay_task.cancel()
+        await asyncio.gather(replay_task, return_exceptions=True)
+        await browser_pool.close()
+        await llm_pool.close()
+        await api_client_factory.aclose()
+        if cleaner is not None:
+            cleaner.close()
+        if revalidator is not None:
+            await revalidator.close()
+        if fetcher is not None:
+            await fetcher.close()
 
 
 if __name__ == "__main__":
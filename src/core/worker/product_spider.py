@@ -1,11 +1,13 @@
 import asyncio
 import json
 import os
+from contextlib import aclosing
 from datetime import datetime
 from typing import Any, List, Optional
 
 from dotenv import load_dotenv
 
+from src.core.algorithms.sitemap_discovery import SitemapDiscovery
 from src.core.aws.database.constants import STATE_PROGRESS, STATE_DONE
 from src.core.classifier.url_classifier import URLBertClassifier
 from src.core.aws.database.operations import DynamoDBOperations, URLEntry
@@ -18,14 +20,94 @@ from src.core.utils.logger import logger
 from src.core.utils.configs import crawl_config, crawl_dispatcher
 from crawl4ai import AsyncWebCrawler, BrowserConfig
 
+from src.core.utils.browser_pool import BrowserPool
 from src.core.worker.base_worker import generic_worker, run_worker_pool
 
 load_dotenv()
 
 QUEUE_NAME = os.getenv("SQS_PRODUCT_SPIDER_QUEUE_NAME")
+SITEMAP_DISCOVERY_ENABLED = (
+    os.getenv("SITEMAP_DISCOVERY_ENABLED", "true").lower() == "true"
+)
 shutdown_event: asyncio.Event = asyncio.Event()
 
 
+async def discover_sitemap_urls(
+    sitemap_discovery: SitemapDiscovery,
+    start_url: str,
+    domain: str,
+    classifier: URLBertClassifier,
+    db: DynamoDBOperations,
+    shutdown_event: asyncio.Event,
+    batch_size: int = 50,
+) -> tuple[int, List[str]]:
+    """
+    Discover URLs from the shop's sitemaps, classify and save them.
+
+    URLs are classified in batches straight from the sitemap stream, so no
+    page has to be rendered in a browser for this stage.
+
+    Args:
+        sitemap_discovery: SitemapDiscovery instance
+        start_url: Starting URL of the shop
+        domain: Domain being crawled
+        classifier: URLBertClassifier instance
+        db: DynamoDBOperations instance
+        shutdown_event: Event to signal shutdown
+        batch_size: Number of URLs to classify and write at once
+
+    Returns:
+        Tuple of (number of URLs processed, list of product URLs found)
+    """
+    processed_count = 0
+    product_urls: List[str] = []
+    pending: List[str] = []
+
+    async def flush() -> None:
+        nonlocal processed_count
+        urls = pending.copy()
+        pending.clear()
+        predictions = await asyncio.to_thread(
+            classifier.classify_urls_batch, urls, batch_size
+        )
+        url_batch = []
+        for url, (is_product_bool, _) in zip(urls, predictions):
+            url_batch.append(
+                URLEntry(
+                    domain=domain, url=url, type="product" if is_product_bool else None
+                )
+            )
+            if is_product_bool:
+                product_urls.append(url)
+        await asyncio.to_thread(db.batch_write_url_entries, url_batch)
+        processed_count += len(urls)
+
+    try:
+        # Close the stream on early exit so its HTTP session is released now
+        async with aclosing(sitemap_discovery.discover(start_url)) as urls:
+            async for url in urls:
+                if shutdown_event.is_set():
+                    logger.info("Shutdown event received, stopping sitemap discovery")
+                    break
+
+                pending.append(url)
+                if len(pending) >= batch_size:
+                    await flush()
+
+        if pending:
+            await flush()
+    except Exception as e:
+        logger.exception(
+            f"Error during sitemap discovery: {e}", extra={"domain": domain}
+        )
+
+    logger.info(
+        f"Sitemap discovery classified {processed_count} URLs "
+        f"({len(product_urls)} products) for {domain}"
+    )
+    return processed_count, product_urls
+
+
 async def crawl_and_classify_urls(
     crawler: AsyncWebCrawler,
     start_url: str,
@@ -35,11 +117,16 @@ async def crawl_and_classify_urls(
     shutdown_event: asyncio.Event,
     run_config: Any,
     batch_size: int = 50,
+    sitemap_discovery: Optional[SitemapDiscovery] = None,
 ) -> int:
     """
     Crawl a website starting from start_url using BFS algorithm,
     classify each discovered URL, and save to database.
 
+    If a SitemapDiscovery is given, the shop's sitemaps are processed first.
+    Product URLs found there are handed to the BFS strategy as known URLs,
+    so the browser only renders the sections the sitemaps don't cover.
+
     Args:
         crawler: AsyncWebCrawler instance
         start_url: Starting URL for the crawl
@@ -49,6 +136,7 @@ async def crawl_and_classify_urls(
         shutdown_event: Event to signal shutdown
         run_config: Crawler configuration
         batch_size: Number of URLs to batch before writing to DB
+        sitemap_discovery: Optional sitemap stage to run before the BFS crawl
 
     Returns:
         Number of URLs processed
@@ -56,6 +144,20 @@ async def crawl_and_classify_urls(
     processed_count = 0
     url_batch: List[URLEntry] = []
 
+    if sitemap_discovery is not None:
+        processed_count, product_urls = await discover_sitemap_urls(
+            sitemap_discovery=sitemap_discovery,
+            start_url=start_url,
+            domain=domain,
+            classifier=classifier,
+            db=db,
+            shutdown_event=shutdown_event,
+            batch_size=batch_size,
+        )
+        strategy = getattr(run_config, "deep_crawl_strategy", None)
+        if product_urls and hasattr(strategy, "add_known_urls"):
+            strategy.add_known_urls(product_urls)
+
     try:
         async for result in await crawler.arun(
             start_url, config=run_config, dispatcher=crawl_dispatcher()
@@ -152,6 +254,7 @@ async def handle_shop_message(
     db: DynamoDBOperations,
     shutdown_event: asyncio.Event,
     batch_size: int = 50,
+    browser_pool: Optional[BrowserPool] = None,
 ) -> None:
     """Handle a shop message by crawling and classifying URLs.
 
@@ -161,6 +264,8 @@ async def handle_shop_message(
         db (DynamoDBOperations): Database operations instance.
         shutdown_event (asyncio.Event): Event to signal shutdown.
         batch_size (int): Number of URLs to batch before writing to DB.
+        browser_pool (Optional[BrowserPool]): Pool to lease the browser from;
+            if None, a browser is launched for this message only.
     """
     domain, start_url = parse_shop_message(message)
 
@@ -187,7 +292,12 @@ async def handle_shop_message(
 
         # Wrap crawler to catch shutdown cleanup
         try:
-            async with AsyncWebCrawler(config=browser_config) as crawler:
+            session = (
+                browser_pool.lease()
+                if browser_pool is not None
+                else AsyncWebCrawler(config=browser_config)
+            )
+            async with session as crawler:
                 processed_count = await crawl_and_classify_urls(
                     crawler=crawler,
                     start_url=start_url,
@@ -197,6 +307,9 @@ async def handle_shop_message(
                     shutdown_event=shutdown_event,
                     run_config=run_config,
                     batch_size=batch_size,
+                    sitemap_discovery=(
+                        SitemapDiscovery() if SITEMAP_DISCOVERY_ENABLED else None
+                    ),
                 )
         except (Exception, asyncio.CancelledError) as e:
             if shutdown_event.is_set():
@@ -244,6 +357,7 @@ async def worker(
     classifier: URLBertClassifier,
     db: DynamoDBOperations,
     batch_size: int,
+    browser_pool: Optional[BrowserPool] = None,
 ) -> None:
     """Independent worker loop for processing shop messages from SQS queue.
 
@@ -255,10 +369,18 @@ async def worker(
         classifier (URLBertClassifier): URL classifier instance.
         db (DynamoDBOperations): Database operations instance.
         batch_size (int): Number of URLs to batch before writing to DB.
+        browser_pool (Optional[BrowserPool]): Browser pool shared by all workers.
     """
 
     async def handler(message: Any) -> None:
-        await handle_shop_message(message, classifier, db, shutdown_event, batch_size)
+        await handle_shop_message(
+            message,
+            classifier,
+            db,
+            shutdown_event,
+            batch_size,
+            browser_pool=browser_pool,
+        )
 
     await generic_worker(
         worker_id=worker_id,
@@ -287,16 +409,24 @@ async def main(n_workers: int = 3, batch_size: int = 50) -> None:
         logger.critical(f"Initialization failed: {e}")
         return
 
+    # One browser per worker, kept alive across shop messages
+    browser_pool = BrowserPool(BrowserConfig(headless=True), size=n_workers)
+
     # Worker factory function
     async def create_worker(worker_id: int) -> None:
-        await worker(worker_id, queue, classifier, db, batch_size)
+        await worker(
+            worker_id, queue, classifier, db, batch_size, browser_pool=browser_pool
+        )
 
-    await run_worker_pool(
-        n_workers=n_workers,
-        shutdown_event=shutdown_event,
-        worker_factory=create_worker,
-        shutdown_timeout=90.0,
-    )
+    try:
+        await run_worker_pool(
+            n_workers=n_workers,
+            shutdown_event=shutdown_event,
+            worker_factory=create_worker,
+            shutdown_timeout=90.0,
+        )
+    finally:
+        await browser_pool.close()
 
 
 if __name__ == "__main__":
@@ -17,6 +17,7 @@ from aura_historia_backend_api_client.models.api_error import ApiError
 
 from src.core.aws.database.models import METADATA_SK, ShopMetadata
 from src.core.aws.database.operations import db_operations
+from src.core.utils.api_client import ApiClientFactory
 
 # Configure JSON logging for CloudWatch
 logger = logging.getLogger(__name__)
@@ -55,7 +56,8 @@ def _get_client() -> Client | None:
     if _GLOBAL_CLIENT is None:
         if not API_BASE_URL:
             raise ValueError("API_BASE_URL environment variable is not set.")
-        _GLOBAL_CLIENT = Client(base_url=API_BASE_URL)
+        # Pooled keep-alive connections with timeouts and the API key header
+        _GLOBAL_CLIENT = ApiClientFactory(API_BASE_URL, os.getenv("API_KEY")).client()
     return _GLOBAL_CLIENT
 
 
@@ -334,3 +334,77 @@ class TestBFSNoCycleDeepCrawlStrategy:
 
         # Verify exactly 3 calls (no 4th call with revisited URLs)
         assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_known_urls_are_not_crawled(self):
+        """URLs registered via add_known_urls are skipped during link discovery."""
+        from unittest.mock import AsyncMock, MagicMock
+
+        strategy = BFSNoCycleDeepCrawlStrategy(max_depth=3)
+        strategy.add_known_urls(["https://example.com/product1"])
+
+        mock_crawler = AsyncMock()
+        mock_config = MagicMock()
+        mock_config.clone = MagicMock(return_value=mock_config)
+
+        start_result = MagicMock()
+        start_result.url = "https://example.com"
+        start_result.success = True
+        start_result.links = {
+            "internal": [
+                {"href": "https://example.com/product1"},
+                {"href": "https://example.com/category"},
+            ],
+            "external": [],
+        }
+        category_result = MagicMock()
+        category_result.url = "https://example.com/category"
+        category_result.success = True
+        category_result.links = {"internal": [], "external": []}
+
+        mock_crawler.arun_many = AsyncMock(
+            side_effect=[[start_result], [category_result]]
+        )
+
+        await strategy._arun_batch("https://example.com", mock_crawler, mock_config)
+
+        calls = mock_crawler.arun_many.call_args_list
+        assert calls[1][1]["urls"] == ["https://example.com/category"]
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_dispatcher_factory_is_used_per_level(self):
+        """Every BFS level gets its own dispatcher from the factory."""
+        from unittest.mock import AsyncMock, MagicMock
+
+        dispatchers = []
+
+        def factory():
+            dispatchers.append(MagicMock())
+            return dispatchers[-1]
+
+        strategy = BFSNoCycleDeepCrawlStrategy(max_depth=2, dispatcher_factory=factory)
+
+        mock_crawler = AsyncMock()
+        mock_config = MagicMock()
+        mock_config.clone = MagicMock(return_value=mock_config)
+
+        start_result = MagicMock()
+        start_result.url = "https://example.com"
+        start_result.success = True
+        start_result.links = {
+            "internal": [{"href": "https://example.com/page1"}],
+            "external": [],
+        }
+        page_result = MagicMock()
+        page_result.url = "https://example.com/page1"
+        page_result.success = True
+        page_result.links = {"internal": [], "external": []}
+
+        mock_crawler.arun_many = AsyncMock(side_effect=[[start_result], [page_result]])
+
+        await strategy._arun_batch("https://example.com", mock_crawler, mock_config)
+
+        calls = mock_crawler.arun_many.call_args_list
+        assert [c[1]["dispatcher"] for c in calls] == dispatchers
+        assert len(dispatchers) == 2
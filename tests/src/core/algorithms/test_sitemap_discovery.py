@@ -0,0 +1,112 @@
+import gzip
+
+import pytest
+from aioresponses import aioresponses
+
+from src.core.algorithms.sitemap_discovery import SitemapDiscovery
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-products.xml.gz</loc></sitemap>
+  <sitemap><loc>https://example.com/sitemap-pages.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+PRODUCTS_SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/product/1</loc></url>
+  <url><loc>https://www.example.com/product/2</loc></url>
+  <url><loc>https://other-shop.com/product/3</loc></url>
+</urlset>
+"""
+
+PAGES_SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/about</loc></url>
+  <url><loc>https://example.com/product/1</loc></url>
+</urlset>
+"""
+
+
+async def collect(discovery: SitemapDiscovery, start_url: str) -> list:
+    return [url async for url in discovery.discover(start_url)]
+
+
+class TestSitemapDiscovery:
+    @pytest.mark.parametrize(
+        "robots,expected",
+        [
+            (
+                "User-agent: *\nSitemap: https://example.com/a.xml\n",
+                ["https://example.com/a.xml"],
+            ),
+            ("sitemap: /relative.xml # comment", ["https://example.com/relative.xml"]),
+            (
+                "Sitemap: https://example.com/a.xml\nSitemap: /a.xml",
+                ["https://example.com/a.xml"],
+            ),
+            ("User-agent: *\nDisallow: /cart", []),
+            ("", []),
+        ],
+    )
+    def test_parse_robots_sitemaps(self, robots, expected):
+        assert (
+            SitemapDiscovery.parse_robots_sitemaps(robots, "https://example.com")
+            == expected
+        )
+
+    @pytest.mark.asyncio
+    async def test_discover_follows_index_and_gzip(self):
+        """Index entries are followed, gzip is decoded, URLs are deduplicated and host-filtered."""
+        with aioresponses() as mocked:
+            mocked.get(
+                "https://example.com/robots.txt",
+                body="Sitemap: https://example.com/sitemap_index.xml",
+            )
+            mocked.get("https://example.com/sitemap_index.xml", body=SITEMAP_INDEX)
+            mocked.get(
+                "https://example.com/sitemap-products.xml.gz",
+                body=gzip.compress(PRODUCTS_SITEMAP),
+            )
+            mocked.get("https://example.com/sitemap-pages.xml", body=PAGES_SITEMAP)
+
+            urls = await collect(SitemapDiscovery(), "https://example.com")
+
+        assert urls == [
+            "https://example.com/product/1",
+            "https://www.example.com/product/2",
+            "https://example.com/about",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_discover_falls_back_to_default_sitemap(self):
+        """Without robots.txt, the conventional /sitemap.xml location is used."""
+        with aioresponses() as mocked:
+            mocked.get("https://example.com/robots.txt", status=404)
+            mocked.get("https://example.com/sitemap.xml", body=PAGES_SITEMAP)
+            mocked.get("https://example.com/sitemap_index.xml", status=404)
+
+            urls = await collect(SitemapDiscovery(), "https://example.com")
+
+        assert urls == ["https://example.com/about", "https://example.com/product/1"]
+
+    @pytest.mark.asyncio
+    async def test_discover_respects_max_urls(self):
+        with aioresponses() as mocked:
+            mocked.get("https://example.com/robots.txt", status=404)
+            mocked.get("https://example.com/sitemap.xml", body=PAGES_SITEMAP)
+
+            urls = await collect(SitemapDiscovery(max_urls=1), "https://example.com")
+
+        assert urls == ["https://example.com/about"]
+
+    @pytest.mark.asyncio
+    async def test_discover_ignores_broken_sitemap(self):
+        with aioresponses() as mocked:
+            mocked.get("https://example.com/robots.txt", status=404)
+            mocked.get("https://example.com/sitemap.xml", body=b"not xml at all")
+            mocked.get("https://example.com/sitemap_index.xml", status=500)
+
+            urls = await collect(SitemapDiscovery(), "https://example.com")
+
+        assert urls == []
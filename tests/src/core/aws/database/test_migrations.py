@@ -90,3 +90,26 @@ class TestTableConfiguration:
             g for g in kwargs["GlobalSecondaryIndexes"] if g["IndexName"] == "GSI2"
         )
         assert gsi2["Projection"]["ProjectionType"] == "INCLUDE"
+
+    def test_enables_time_to_live_for_leases(self, mock_dynamo, mock_env):
+        mock_dynamo.describe_table.return_value = {"Table": {"TableName": mock_env}}
+        mock_dynamo.describe_time_to_live.return_value = {
+            "TimeToLiveDescription": {"TimeToLiveStatus": "DISABLED"}
+        }
+
+        create_tables()
+
+        mock_dynamo.update_time_to_live.assert_called_once_with(
+            TableName=mock_env,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": "expires_at"},
+        )
+
+    def test_keeps_enabled_time_to_live(self, mock_dynamo, mock_env):
+        mock_dynamo.describe_table.return_value = {"Table": {"TableName": mock_env}}
+        mock_dynamo.describe_time_to_live.return_value = {
+            "TimeToLiveDescription": {"TimeToLiveStatus": "ENABLED"}
+        }
+
+        create_tables()
+
+        mock_dynamo.update_time_to_live.assert_not_called()
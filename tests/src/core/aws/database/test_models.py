@@ -216,6 +216,53 @@ class TestURLEntry:
         assert item["gsi1_pk"]["S"] == "SHOP#example.com"
         assert item["gsi1_sk"]["S"] == "product"
 
+    def test_validators_round_trip(self):
+        """HTTP validators survive conversion to and from DynamoDB."""
+        url_entry = URLEntry(
+            domain="example.com",
+            url="https://example.com/product",
+            etag='W/"abc"',
+            last_modified="Wed, 21 Oct 2026 07:28:00 GMT",
+            content_length=1234,
+        )
+
+        item = url_entry.to_dynamodb_item()
+        restored = URLEntry.from_dynamodb_item(item)
+
+        assert item["content_length"] == {"N": "1234"}
+        assert restored.etag == 'W/"abc"'
+        assert restored.last_modified == "Wed, 21 Oct 2026 07:28:00 GMT"
+        assert restored.content_length == 1234
+        assert restored.has_validators()
+
+    def test_product_fingerprint_round_trip(self):
+        """The product fingerprint is stored next to the markdown hash."""
+        url_entry = URLEntry(
+            domain="example.com",
+            url="https://example.com/product",
+            hash="markdown_hash",
+            product_fingerprint="fingerprint",
+        )
+
+        item = url_entry.to_dynamodb_item()
+        restored = URLEntry.from_dynamodb_item(item)
+
+        assert item["product_fingerprint"] == {"S": "fingerprint"}
+        assert restored.product_fingerprint == "fingerprint"
+        assert (
+            "product_fingerprint"
+            not in URLEntry(
+                domain="example.com", url="https://example.com/p"
+            ).to_dynamodb_item()
+        )
+
+    def test_no_validators_by_default(self):
+        """Entries without ETag or Last-Modified cannot be revalidated."""
+        url_entry = URLEntry(domain="example.com", url="https://example.com/p")
+
+        assert not url_entry.has_validators()
+        assert "etag" not in url_entry.to_dynamodb_item()
+
 
 class TestURLEntryHashing:
     """Tests for URLEntry hash calculation."""
@@ -266,3 +313,44 @@ class TestURLEntryHashing:
             hash_result = URLEntry.calculate_hash(markdown)
             assert len(hash_result) == 64
             assert all(c in "0123456789abcdef" for c in hash_result)
+
+
+class TestProductFingerprint:
+    """Tests for URLEntry product fingerprints."""
+
+    PRODUCT = {
+        "shopsProductId": "SKU-1",
+        "title": {"text": "Jugendstil Vase", "language": "de"},
+        "state": "AVAILABLE",
+        "url": "https://example.com/vase",
+        "description": {"text": "Aufgerufen: 12 mal", "language": "de"},
+        "price": {"amount": 12000, "currency": "EUR"},
+        "images": ["https://example.com/1.jpg"],
+        "auctionStart": None,
+        "auctionEnd": None,
+    }
+
+    def test_ignores_key_order_and_other_fields(self):
+        """Only the tracked fields, not their order, make the fingerprint."""
+        reordered = dict(reversed(list(self.PRODUCT.items())))
+        reordered["description"] = {"text": "Aufgerufen: 13 mal", "language": "de"}
+
+        assert URLEntry.calculate_product_fingerprint(
+            reordered
+        ) == URLEntry.calculate_product_fingerprint(self.PRODUCT)
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            {"price": {"amount": 9900, "currency": "EUR"}},
+            {"state": "SOLD"},
+            {"title": {"text": "Jugendstil-Vase", "language": "de"}},
+            {"images": ["https://example.com/2.jpg"]},
+            {"auctionEnd": "2026-01-20T18:00:00Z"},
+        ],
+    )
+    def test_changes_with_tracked_fields(self, change):
+        """A change of price, state, title, images or auction dates shows."""
+        assert URLEntry.calculate_product_fingerprint(
+            {**self.PRODUCT, **change}
+        ) != URLEntry.calculate_product_fingerprint(self.PRODUCT)
@@ -334,6 +334,152 @@ class TestUpdateUrlHash:
             db_ops.update_url_hash("shop.com", "https://shop.com/p", "h")
 
 
+class TestUpdateProductFingerprint:
+    def test_sets_fingerprint(self, db_ops, mock_boto_client):
+        mock_boto_client.update_item.return_value = {
+            "Attributes": {"product_fingerprint": {"S": "fp"}}
+        }
+
+        result = db_ops.update_product_fingerprint(
+            "shop.com", "https://shop.com/p", "fp"
+        )
+
+        assert result == {"product_fingerprint": {"S": "fp"}}
+        called_kwargs = mock_boto_client.update_item.call_args.kwargs
+        assert called_kwargs["Key"] == {
+            "pk": {"S": "SHOP#shop.com"},
+            "sk": {"S": "URL#https://shop.com/p"},
+        }
+        assert called_kwargs["UpdateExpression"] == "SET #fp = :fingerprint"
+        assert called_kwargs["ExpressionAttributeNames"] == {
+            "#fp": "product_fingerprint"
+        }
+        assert called_kwargs["ExpressionAttributeValues"] == {
+            ":fingerprint": {"S": "fp"}
+        }
+
+    def test_propagates_client_error(self, db_ops, mock_boto_client):
+        mock_boto_client.update_item.side_effect = ClientError(
+            cast(Any, _client_error_response("Update failed")),
+            "UpdateItem",
+        )
+
+        with pytest.raises(ClientError):
+            db_ops.update_product_fingerprint("shop.com", "https://shop.com/p", "fp")
+
+
+class TestUpdateUrlValidators:
+    def test_sets_present_and_removes_missing_validators(
+        self, db_ops, mock_boto_client
+    ):
+        mock_boto_client.update_item.return_value = {"Attributes": {}}
+
+        db_ops.update_url_validators(
+            "shop.com", "https://shop.com/p", etag='"v1"', content_length=10
+        )
+
+        called_kwargs = mock_boto_client.update_item.call_args.kwargs
+        assert called_kwargs["Key"] == {
+            "pk": {"S": "SHOP#shop.com"},
+            "sk": {"S": "URL#https://shop.com/p"},
+        }
+        assert called_kwargs["UpdateExpression"] == (
+            "SET #etag = :etag, #content_length = :content_length REMOVE #last_modified"
+        )
+        assert called_kwargs["ExpressionAttributeValues"] == {
+            ":etag": {"S": '"v1"'},
+            ":content_length": {"N": "10"},
+        }
+
+
+class TestLeases:
+    def test_acquire_lease_conditional_put(self, db_ops, mock_boto_client):
+        assert db_ops.acquire_lease("shop.com", "BOILERPLATE", "me", 60) is True
+
+        called_kwargs = mock_boto_client.put_item.call_args.kwargs
+        assert called_kwargs["Item"]["sk"] == {"S": "LEASE#BOILERPLATE"}
+        assert called_kwargs["Item"]["owner"] == {"S": "me"}
+        assert "attribute_not_exists(pk)" in called_kwargs["ConditionExpression"]
+        assert called_kwargs["ExpressionAttributeValues"][":owner"] == {"S": "me"}
+
+    def test_acquire_lease_held_by_other(self, db_ops, mock_boto_client):
+        mock_boto_client.put_item.side_effect = ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException", "Message": "held"}},
+            "PutItem",
+        )
+
+        assert db_ops.acquire_lease("shop.com", "BOILERPLATE", "me", 60) is False
+
+    def test_acquire_lease_reraises_other_errors(self, db_ops, mock_boto_client):
+        mock_boto_client.put_item.side_effect = ClientError(
+            _client_error_response("boom"), "PutItem"
+        )
+
+        with pytest.raises(ClientError):
+            db_ops.acquire_lease("shop.com", "BOILERPLATE", "me", 60)
+
+    def test_renew_lease_lost(self, db_ops, mock_boto_client):
+        mock_boto_client.update_item.side_effect = ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException", "Message": "x"}},
+            "UpdateItem",
+        )
+
+        assert db_ops.renew_lease("shop.com", "BOILERPLATE", "me", 60) is False
+
+    def test_release_lease_only_by_owner(self, db_ops, mock_boto_client):
+        mock_boto_client.delete_item.side_effect = ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException", "Message": "x"}},
+            "DeleteItem",
+        )
+
+        db_ops.release_lease("shop.com", "BOILERPLATE", "me")
+
+        called_kwargs = mock_boto_client.delete_item.call_args.kwargs
+        assert called_kwargs["ConditionExpression"] == "#owner = :owner"
+
+
+class TestBatchGetUrlEntries:
+    def test_returns_entries_by_url(self, db_ops, mock_boto_client):
+        mock_boto_client.batch_get_item.return_value = {
+            "Responses": {
+                db_ops.table_name: [
+                    {
+                        "pk": {"S": "SHOP#shop.com"},
+                        "sk": {"S": "URL#https://shop.com/a"},
+                        "url": {"S": "https://shop.com/a"},
+                        "etag": {"S": '"e"'},
+                    }
+                ]
+            },
+            "UnprocessedKeys": {},
+        }
+
+        entries = db_ops.batch_get_url_entries(
+            "shop.com", ["https://shop.com/a", "https://shop.com/b"]
+        )
+
+        assert list(entries) == ["https://shop.com/a"]
+        assert entries["https://shop.com/a"].etag == '"e"'
+        keys = mock_boto_client.batch_get_item.call_args.kwargs["RequestItems"][
+            db_ops.table_name
+        ]["Keys"]
+        assert len(keys) == 2
+
+    def test_retries_unprocessed_keys(self, db_ops, mock_boto_client):
+        unprocessed = {db_ops.table_name: {"Keys": [{"pk": {"S": "x"}}]}}
+        mock_boto_client.batch_get_item.side_effect = [
+            {"Responses": {}, "UnprocessedKeys": unprocessed},
+            {"Responses": {}, "UnprocessedKeys": {}},
+        ]
+
+        with patch("src.core.aws.database.operations.time.sleep"):
+            db_ops.batch_get_url_entries("shop.com", ["https://shop.com/a"])
+
+        assert mock_boto_client.batch_get_item.call_count == 2
+        second_call = mock_boto_client.batch_get_item.call_args_list[1]
+        assert second_call.kwargs["RequestItems"] == unprocessed
+
+
 class TestUpsertShopMetadata:
     def test_sets_country_from_dns_lookup(self, db_ops, mock_boto_client):
         metadata = ShopMetadata(domain="shop.com", shop_country=None)
@@ -111,6 +111,67 @@ class TestS3Operations:
 
         assert result is None
 
+    @patch("src.core.aws.s3.boto3.client")
+    def test_download_json_if_changed_sends_etag(self, mock_boto_client):
+        mock_client = MagicMock()
+        mock_boto_client.return_value = mock_client
+        mock_client.get_object.return_value = {
+            "Body": MagicMock(read=MagicMock(return_value=b'{"blocks": []}')),
+            "ETag": '"v2"',
+        }
+
+        s3_ops = S3Operations(bucket_name="test-bucket")
+        result = s3_ops.download_json_if_changed("test/file.json", '"v1"')
+
+        assert result == ({"blocks": []}, '"v2"', True)
+        assert mock_client.get_object.call_args.kwargs["IfNoneMatch"] == '"v1"'
+
+    @patch("src.core.aws.s3.boto3.client")
+    def test_download_json_if_changed_not_modified(self, mock_boto_client):
+        mock_client = MagicMock()
+        mock_boto_client.return_value = mock_client
+        mock_client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject"
+        )
+
+        s3_ops = S3Operations(bucket_name="test-bucket")
+
+        assert s3_ops.download_json_if_changed("test/file.json", '"v1"') == (
+            None,
+            '"v1"',
+            False,
+        )
+
+    @patch("src.core.aws.s3.boto3.client")
+    def test_download_json_if_changed_missing_key(self, mock_boto_client):
+        mock_client = MagicMock()
+        mock_boto_client.return_value = mock_client
+        mock_client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey"}}, "GetObject"
+        )
+
+        s3_ops = S3Operations(bucket_name="test-bucket")
+
+        assert s3_ops.download_json_if_changed("missing.json") == (None, None, True)
+        assert "IfNoneMatch" not in mock_client.get_object.call_args.kwargs
+
+    @patch("src.core.aws.s3.boto3.client")
+    def test_upload_and_download_bytes(self, mock_boto_client):
+        mock_client = MagicMock()
+        mock_boto_client.return_value = mock_client
+        mock_client.get_object.return_value = {
+            "Body": MagicMock(read=MagicMock(return_value=b"\x00\x01")),
+            "ETag": '"b1"',
+        }
+
+        s3_ops = S3Operations(bucket_name="test-bucket")
+        s3_ops.upload_bytes("a.bin", b"\x00\x01")
+
+        call_kwargs = mock_client.put_object.call_args.kwargs
+        assert call_kwargs["Body"] == b"\x00\x01"
+        assert call_kwargs["ContentType"] == "application/octet-stream"
+        assert s3_ops.download_bytes_if_changed("a.bin") == (b"\x00\x01", '"b1"', True)
+
     @patch("src.core.aws.s3.boto3.client")
     def test_list_objects_returns_keys(self, mock_boto_client):
         """Test that list_objects returns object keys."""
@@ -243,3 +304,35 @@ class TestS3Operations:
 
         with pytest.raises(ClientError):
             s3_ops.ensure_bucket_exists()
+
+    @patch("src.core.aws.s3.boto3.client")
+    def test_object_exists(self, mock_boto_client):
+        mock_client = MagicMock()
+        mock_boto_client.return_value = mock_client
+        s3_ops = S3Operations(bucket_name="test-bucket")
+
+        assert s3_ops.object_exists("present") is True
+        mock_client.head_object.assert_called_with(Bucket="test-bucket", Key="present")
+
+        mock_client.head_object.side_effect = ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+        assert s3_ops.object_exists("missing") is False
+
+        mock_client.head_object.side_effect = ClientError(
+            {"Error": {"Code": "403"}}, "HeadObject"
+        )
+        with pytest.raises(ClientError):
+            s3_ops.object_exists("forbidden")
+
+    @patch("src.core.aws.s3.boto3.client")
+    def test_delete_object(self, mock_boto_client):
+        mock_client = MagicMock()
+        mock_boto_client.return_value = mock_client
+        s3_ops = S3Operations(bucket_name="test-bucket")
+
+        s3_ops.delete_object("old.json")
+
+        mock_client.delete_object.assert_called_once_with(
+            Bucket="test-bucket", Key="old.json"
+        )
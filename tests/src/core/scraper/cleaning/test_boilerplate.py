@@ -1,8 +1,11 @@
 from unittest.mock import MagicMock, AsyncMock
 import pytest
 import asyncio
+import time
+from types import SimpleNamespace
 from unittest.mock import patch
 from src.core.scraper.cleaning.boilerplate_discovery import BoilerplateDiscovery
+from src.core.scraper.cleaning.boilerplate_matcher import BoilerplateMatcher
 from src.core.scraper.cleaning.boilerplate_remover import BoilerplateRemover
 
 
@@ -10,13 +13,10 @@ from src.core.scraper.cleaning.boilerplate_remover import BoilerplateRemover
 @patch("src.core.scraper.cleaning.boilerplate_discovery.S3Operations")
 class TestBoilerplateDiscovery:
     @pytest.mark.asyncio
-    @patch(
-        "src.core.scraper.cleaning.boilerplate_discovery.get_markdown",
-        new_callable=AsyncMock,
-    )
+    @patch("src.core.scraper.cleaning.boilerplate_discovery.stream_pages")
     @patch("src.core.scraper.qwen.extract", new_callable=AsyncMock)
     async def test_get_valid_product_markdowns_integrated(
-        self, mock_extract, mock_markdown, mock_s3, mock_db
+        self, mock_extract, mock_stream, mock_s3, mock_db
     ):
         """Solid test verifying the filtering and validation flow for product markdowns."""
         discovery = BoilerplateDiscovery()
@@ -25,16 +25,18 @@ class TestBoilerplateDiscovery:
         )
 
         # 1. Too short, 2. Valid Product, 3. Valid but Not a Product
-        # AsyncMock with iterable side_effect automatically wraps values in coroutines
-        mock_markdown.side_effect = [
-            "short",
-            "md_valid_prod" * 100,
-            "md_not_prod" * 100,
-        ]
+        async def pages(urls):
+            for url, markdown in zip(
+                urls, ["short", "md_valid_prod" * 100, "md_not_prod" * 100]
+            ):
+                yield SimpleNamespace(url=url, markdown=markdown, html="")
+
+        mock_stream.side_effect = pages
+
+        async def verify(markdown):
+            return MagicMock(is_product=markdown.startswith("md_valid_prod"))
 
-        product_mock = MagicMock()
-        product_mock.is_product = True
-        mock_extract.side_effect = [product_mock, MagicMock(is_product=False)]
+        mock_extract.side_effect = verify
 
         valid = await discovery.get_valid_product_markdowns("test.com", target_count=2)
 
@@ -43,6 +45,85 @@ class TestBoilerplateDiscovery:
         assert valid[0] == "md_valid_prod" * 100
         assert mock_extract.call_count == 2
 
+    @pytest.mark.asyncio
+    @patch("src.core.scraper.cleaning.boilerplate_discovery.stream_pages")
+    @patch("src.core.scraper.qwen.extract", new_callable=AsyncMock)
+    async def test_get_valid_product_markdowns_stops_at_target(
+        self, mock_extract, mock_stream, mock_s3, mock_db
+    ):
+        """Verification overlaps fetching, and remaining work is cancelled at target."""
+        discovery = BoilerplateDiscovery(verify_concurrency=2)
+        urls = [f"http://shop.com/{i}" for i in range(10)]
+        discovery.db.get_product_urls_by_domain = MagicMock(return_value=(urls, None))
+        closed = asyncio.Event()
+        fetched = []
+
+        async def pages(urls):
+            try:
+                for url in urls:
+                    await asyncio.sleep(0.01)
+                    fetched.append(url)
+                    yield SimpleNamespace(
+                        url=url, markdown=f"product page {url} " * 50, html=""
+                    )
+            finally:
+                closed.set()
+
+        mock_stream.side_effect = pages
+        in_flight = 0
+        max_in_flight = 0
+
+        async def verify(markdown):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                await asyncio.sleep(0.02)
+            finally:
+                in_flight -= 1
+            return MagicMock(is_product=True)
+
+        mock_extract.side_effect = verify
+
+        valid = await discovery.get_valid_product_markdowns("shop.com", target_count=2)
+
+        assert len(valid) == 2
+        assert len(fetched) < len(urls)
+        assert max_in_flight <= 2
+        assert in_flight == 0
+        assert closed.is_set()
+
+    @pytest.mark.asyncio
+    @patch("src.core.scraper.cleaning.boilerplate_discovery.stream_pages")
+    @patch("src.core.scraper.qwen.extract", new_callable=AsyncMock)
+    async def test_get_valid_product_markdowns_uses_structured_data(
+        self, mock_extract, mock_stream, mock_s3, mock_db
+    ):
+        """Pages with product structured data are accepted without the LLM."""
+        discovery = BoilerplateDiscovery()
+        discovery.db.get_product_urls_by_domain = MagicMock(
+            return_value=(["http://a.com", "http://b.com"], None)
+        )
+        product_html = (
+            '<html><head><script type="application/ld+json">'
+            '{"@context": "https://schema.org", "@type": "Product", "name": "Vase"}'
+            "</script></head><body></body></html>"
+        )
+
+        async def pages(urls):
+            yield SimpleNamespace(
+                url=urls[0], markdown="ld_prod" * 100, html=product_html
+            )
+            yield SimpleNamespace(url=urls[1], markdown="llm_prod" * 100, html="")
+
+        mock_stream.side_effect = pages
+        mock_extract.return_value = MagicMock(is_product=True)
+
+        valid = await discovery.get_valid_product_markdowns("test.com", target_count=2)
+
+        assert sorted(valid) == sorted(["ld_prod" * 100, "llm_prod" * 100])
+        mock_extract.assert_awaited_once_with(markdown=("llm_prod" * 100)[:10000])
+
     @pytest.mark.parametrize(
         "line,expected_safe",
         [
@@ -111,6 +192,46 @@ class TestBoilerplateDiscovery:
         assert ["Common Header Block Text"] in blocks
         assert ["Common Footer Block Text"] in blocks
 
+    def test_find_common_blocks_detailed_frequency_voting(self, mock_s3, mock_db):
+        """Blocks must occur in at least min_fraction of the samples."""
+        discovery = BoilerplateDiscovery(min_fraction=0.6)
+        header = "Welcome to our antique shop online"
+        footer = ["Opening hours are Monday to Friday", "", "Call us any time today"]
+        rare = "Only two of five pages have this line"
+
+        markdowns = [
+            "\n".join([header, f"Unique product text {i}", *footer]) for i in range(3)
+        ] + [
+            "\n".join([header, rare, "Another product"]),
+            "\n".join([rare, "Yet another product", *footer]),
+        ]
+
+        blocks = discovery.find_common_blocks_detailed(markdowns)
+
+        assert blocks == [[header], footer]
+
+    def test_find_common_blocks_detailed_falls_back_to_paragraphs(
+        self, mock_s3, mock_db
+    ):
+        """A run that is not shared as a whole contributes its shared paragraphs."""
+        discovery = BoilerplateDiscovery(min_fraction=1.0)
+        shared = "Shipping is free for all orders above fifty"
+        markdowns = [
+            f"{shared}\n\nFirst additional common info line",
+            f"Intro\n\nFirst additional common info line\n\n{shared}\n\nEnd",
+            f"{shared}\n\nFirst additional common info line\nEnd",
+        ]
+
+        blocks = discovery.find_common_blocks_detailed(markdowns)
+
+        assert [shared] in blocks
+        assert ["First additional common info line"] in blocks
+        assert [shared, "", "First additional common info line"] not in blocks
+
+    def test_find_common_blocks_detailed_single_document(self, mock_s3, mock_db):
+        discovery = BoilerplateDiscovery()
+        assert discovery.find_common_blocks_detailed(["only one"]) == []
+
     @pytest.mark.asyncio
     async def test_discover_and_save_locking_behavior(self, mock_s3, mock_db):
         """
@@ -176,46 +297,220 @@ class TestBoilerplateDiscovery:
 
         assert discovery.find_common_blocks_detailed.call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_discover_and_save_lease_lost_returns_no_blocks(
+        self, mock_s3, mock_db
+    ):
+        """Another process holds the lease: no discovery, noise-only cleaning."""
+        discovery = BoilerplateDiscovery(lease_wait=0)
+        discovery.db.acquire_lease = MagicMock(return_value=False)
+        discovery.s3.download_json = MagicMock(return_value=None)
+        discovery.get_valid_product_markdowns = AsyncMock()
+
+        blocks = await discovery.discover_and_save("busy.com")
+
+        assert blocks == []
+        discovery.get_valid_product_markdowns.assert_not_called()
+        discovery.db.release_lease.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_discover_and_save_lease_lost_waits_for_result(
+        self, mock_s3, mock_db
+    ):
+        """A loser that waits picks up the blocks the lease holder saved."""
+        discovery = BoilerplateDiscovery(lease_wait=1, poll_interval=0.01)
+        discovery.db.acquire_lease = MagicMock(return_value=False)
+        discovery.s3.download_json = MagicMock(
+            side_effect=[None, None, None, {"blocks": [["shared"]]}]
+        )
+        discovery.get_valid_product_markdowns = AsyncMock()
+
+        blocks = await discovery.discover_and_save("busy.com")
+
+        assert blocks == [["shared"]]
+        discovery.get_valid_product_markdowns.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_discover_and_save_renews_and_releases_lease(self, mock_s3, mock_db):
+        """The lease is renewed during discovery and released afterwards."""
+        discovery = BoilerplateDiscovery(lease_ttl=0.03)
+        discovery.db.acquire_lease = MagicMock(return_value=True)
+        discovery.db.renew_lease = MagicMock(return_value=True)
+        discovery.s3.download_json = MagicMock(return_value=None)
+
+        async def slow_markdowns(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return []
+
+        discovery.get_valid_product_markdowns = slow_markdowns
+
+        blocks = await discovery.discover_and_save("free.com")
+
+        assert blocks == []
+        assert discovery.db.renew_lease.call_count >= 1
+        discovery.db.release_lease.assert_called_once_with(
+            "free.com", "BOILERPLATE", discovery.owner
+        )
+        discovery.s3.upload_json.assert_called_once_with(
+            "boilerplate/free.com.json", {"blocks": []}
+        )
+        key, artifact = discovery.s3.upload_bytes.call_args.args
+        assert key == "boilerplate/free.com.bin"
+        assert BoilerplateMatcher.from_bytes(artifact).metadata["domain"] == "free.com"
+
+
+def json_only_remover(**kwargs) -> BoilerplateRemover:
+    """Remover for a shop that has only the JSON form of its blocks in S3."""
+    remover = BoilerplateRemover(**kwargs)
+    remover.s3.download_bytes_if_changed.return_value = (None, None, True)
+    return remover
+
 
 @patch("src.core.scraper.cleaning.boilerplate_remover.S3Operations")
 class TestBoilerplateRemover:
     @pytest.mark.asyncio
     async def test_load_for_shop_with_caching(self, mock_s3):
         """Solid test for S3 loading vs Cache hits."""
-        remover = BoilerplateRemover(cache_ttl=60)
+        remover = json_only_remover(cache_ttl=60)
         domain = "test.com"
-        mock_data = {"blocks": [["s3_block"]]}
-
-        with patch(
-            "src.core.scraper.cleaning.boilerplate_remover.asyncio.to_thread",
-            return_value=mock_data,
-        ) as mock_thread:
-            # 1. First call -> S3
-            blocks1 = await remover.load_for_shop(domain)
-            assert blocks1 == [["s3_block"]]
-            assert mock_thread.call_count == 1
-
-            # 2. Second call -> Cache hit
-            blocks2 = await remover.load_for_shop(domain)
-            assert blocks2 == [["s3_block"]]
-            assert mock_thread.call_count == 1  # No extra call
-
-            # 3. Third call -> Force refresh
-            blocks3 = await remover.load_for_shop(domain, force_refresh=True)
-            assert blocks3 == [["s3_block"]]
-            assert mock_thread.call_count == 2
+        download = remover.s3.download_json_if_changed
+        download.return_value = ({"blocks": [["s3_block"]]}, '"v1"', True)
+
+        # 1. First call -> S3
+        blocks1 = await remover.load_for_shop(domain)
+        assert blocks1 == [["s3_block"]]
+        assert download.call_count == 1
+
+        # 2. Second call -> Cache hit
+        blocks2 = await remover.load_for_shop(domain)
+        assert blocks2 == [["s3_block"]]
+        assert download.call_count == 1  # No extra call
+
+        # 3. Third call -> Force refresh, unconditional
+        blocks3 = await remover.load_for_shop(domain, force_refresh=True)
+        assert blocks3 == [["s3_block"]]
+        assert download.call_count == 2
+        download.assert_called_with("boilerplate/test.com.json", None)
 
     @pytest.mark.asyncio
     async def test_load_for_shop_missing_data(self, mock_s3):
-        """Verify load_for_shop returns None when S3 data is missing."""
+        """Verify load_for_shop returns None when S3 data is missing, and caches the miss."""
+        remover = json_only_remover(negative_ttl=60)
+        download = remover.s3.download_json_if_changed
+        download.return_value = (None, None, True)
+
+        blocks = await remover.load_for_shop("missing.com")
+        assert blocks is None
+
+        assert await remover.load_for_shop("missing.com") is None
+        assert download.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_load_for_shop_negative_ttl_expires(self, mock_s3):
+        remover = json_only_remover(negative_ttl=0)
+        download = remover.s3.download_json_if_changed
+        download.side_effect = [
+            (None, None, True),
+            ({"blocks": [["late"]]}, '"v1"', True),
+        ]
+
+        assert await remover.load_for_shop("late.com") is None
+        assert await remover.load_for_shop("late.com") == [["late"]]
+
+    @pytest.mark.asyncio
+    async def test_remembered_empty_discovery_uses_negative_ttl(self, mock_s3):
+        remover = json_only_remover(cache_ttl=3600, negative_ttl=0)
+        download = remover.s3.download_json_if_changed
+        download.return_value = ({"blocks": [["found"]]}, '"v1"', True)
+
+        remover.remember("busy.com", [])
+        remover.remember("done.com", [["done"]])
+
+        assert await remover.load_for_shop("done.com") == [["done"]]
+        assert await remover.load_for_shop("busy.com") == [["found"]]
+        assert download.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_load_for_shop_revalidates_with_etag(self, mock_s3):
+        """An expired entry is revalidated and kept (with its matcher) on 304."""
+        remover = json_only_remover(cache_ttl=0)
+        download = remover.s3.download_json_if_changed
+        download.side_effect = [
+            ({"blocks": [["block"]]}, '"v1"', True),
+            (None, '"v1"', False),
+        ]
+
+        blocks = await remover.load_for_shop("shop.com")
+        matcher = remover.matcher_for("shop.com", blocks)
+
+        assert await remover.load_for_shop("shop.com") is blocks
+        download.assert_called_with("boilerplate/shop.com.json", '"v1"')
+        assert remover.matcher_for("shop.com", blocks) is matcher
+
+    @pytest.mark.asyncio
+    async def test_load_for_shop_single_flight(self, mock_s3):
+        """Concurrent loads of one shop share a single S3 request."""
+        remover = json_only_remover()
+        calls = 0
+
+        def slow_download(key, etag):
+            nonlocal calls
+            calls += 1
+            time.sleep(0.05)
+            return {"blocks": [["block"]]}, '"v1"', True
+
+        remover.s3.download_json_if_changed = slow_download
+
+        results = await asyncio.gather(
+            *(remover.load_for_shop("shop.com") for _ in range(5))
+        )
+
+        assert calls == 1
+        assert all(result == [["block"]] for result in results)
+
+    @pytest.mark.asyncio
+    async def test_load_for_shop_prefers_artifact(self, mock_s3):
+        """The compiled artifact is used directly, without touching the JSON."""
+        remover = BoilerplateRemover(cache_ttl=0)
+        artifact = BoilerplateMatcher([["Cart", "Wishlist"]]).to_bytes()
+        remover.s3.download_bytes_if_changed.side_effect = [
+            (artifact, '"bin1"', True),
+            (None, '"bin1"', False),
+        ]
+
+        blocks = await remover.load_for_shop("shop.com")
+        assert blocks == [["Cart", "Wishlist"]]
+        assert (
+            remover.matcher_for("shop.com", blocks)
+            is remover.cache["shop.com"]["matcher"]
+        )
+
+        assert await remover.load_for_shop("shop.com") is blocks
+        remover.s3.download_bytes_if_changed.assert_called_with(
+            "boilerplate/shop.com.bin", '"bin1"'
+        )
+        remover.s3.download_json_if_changed.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_load_for_shop_corrupt_artifact_falls_back_to_json(self, mock_s3):
         remover = BoilerplateRemover()
+        remover.s3.download_bytes_if_changed.return_value = (b"junk", '"x"', True)
+        remover.s3.download_json_if_changed.return_value = (
+            {"blocks": [["json"]]},
+            '"j"',
+            True,
+        )
+
+        assert await remover.load_for_shop("shop.com") == [["json"]]
+
+    def test_cache_is_bounded_lru(self, mock_s3):
+        remover = BoilerplateRemover(max_entries=2)
+        remover._save_to_cache("a.com", [["a"]])
+        remover._save_to_cache("b.com", [["b"]])
+        remover._get_from_cache("a.com")
+        remover._save_to_cache("c.com", [["c"]])
 
-        with patch(
-            "src.core.scraper.cleaning.boilerplate_remover.asyncio.to_thread",
-            return_value=None,
-        ):
-            blocks = await remover.load_for_shop("missing.com")
-            assert blocks is None
+        assert list(remover.cache) == ["a.com", "c.com"]
 
     def test_clean_exact_output(self, mock_s3):
         """Verify boilerplate removal preserves content integrity and removes exact blocks."""
@@ -236,6 +531,28 @@ class TestBoilerplateRemover:
         expected = "KEEP THIS LINE\nMIDDLE CONTENT\nEND CONTENT"
         assert cleaned == expected
 
+    @pytest.mark.asyncio
+    async def test_matcher_for_reuses_compiled_matcher(self, mock_s3):
+        """The matcher compiled on load is reused until the blocks change."""
+        remover = json_only_remover()
+
+        remover.s3.download_json_if_changed.return_value = (
+            {"blocks": [["Cart", "Wishlist"]]},
+            '"v1"',
+            True,
+        )
+        blocks = await remover.load_for_shop("test.com")
+
+        matcher = remover.matcher_for("test.com", blocks)
+        assert matcher is remover.matcher_for("test.com", blocks)
+        assert remover.clean("Item\nCart\nWishlist", matcher, remove_noise=False) == (
+            "Item"
+        )
+
+        new_matcher = remover.matcher_for("test.com", [["Item"]])
+        assert new_matcher is not matcher
+        assert new_matcher.blocks == [["Item"]]
+
     @pytest.mark.parametrize(
         "markdown,expected_contains,expected_not_contains",
         [
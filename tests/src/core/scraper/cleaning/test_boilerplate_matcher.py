@@ -0,0 +1,76 @@
+import pytest
+
+from src.core.scraper.cleaning.boilerplate_matcher import (
+    BoilerplateMatcher,
+    hash_lines,
+    line_hash,
+)
+
+
+class TestBoilerplateMatcher:
+    def test_line_hash_is_stable_64_bit(self):
+        assert line_hash("Warenkorb") == line_hash("Warenkorb")
+        assert line_hash("Warenkorb") != line_hash("Merkzettel")
+        assert 0 <= line_hash("Warenkorb") < 2**64
+
+    def test_hash_lines_strips_whitespace(self):
+        assert hash_lines(["  Menu  ", "Menu"]) == [line_hash("Menu")] * 2
+
+    def test_find_occurrences_all_blocks_single_pass(self):
+        matcher = BoilerplateMatcher([["A", "B"], ["A", "B", "C"], ["X"], []])
+        lines = ["A", "B", "C", "noise", "X", "A", "B"]
+
+        occurrences = matcher.find_occurrences(hash_lines(lines))
+
+        assert occurrences == [(0, 2), (0, 3), (4, 1), (5, 2)]
+        assert len(matcher) == 3
+
+    def test_block_longer_than_remaining_lines_is_ignored(self):
+        matcher = BoilerplateMatcher([["A", "B", "C"]])
+        assert matcher.find_occurrences(hash_lines(["x", "A", "B"])) == []
+
+    def test_remove_merges_overlapping_occurrences(self):
+        matcher = BoilerplateMatcher([["A", "B"], ["B", "C"]])
+        lines = ["keep", "  A", "B  ", "C", "keep too"]
+
+        assert matcher.remove(lines) == ["keep", "keep too"]
+
+    def test_remove_without_match_returns_lines_unchanged(self):
+        matcher = BoilerplateMatcher([["A", "B"]])
+        lines = ["A", "x", "B"]
+
+        assert matcher.remove(lines) is lines
+
+    def test_artifact_round_trip(self):
+        matcher = BoilerplateMatcher(
+            [["Über uns", "Kontakt"], ["Newsletter"]], metadata={"domain": "a.de"}
+        )
+
+        loaded = BoilerplateMatcher.from_bytes(matcher.to_bytes())
+
+        assert loaded.blocks == matcher.blocks
+        assert loaded.metadata == {"domain": "a.de"}
+        lines = ["x", "Über uns", "Kontakt", "Newsletter", "y"]
+        assert loaded.find_occurrences(hash_lines(lines)) == matcher.find_occurrences(
+            hash_lines(lines)
+        )
+
+    def test_artifact_uses_stored_hashes(self, monkeypatch):
+        artifact = BoilerplateMatcher([["A", "B"]]).to_bytes()
+
+        def fail(line):
+            raise AssertionError("lines must not be rehashed")
+
+        monkeypatch.setattr(
+            "src.core.scraper.cleaning.boilerplate_matcher.line_hash", fail
+        )
+
+        assert len(BoilerplateMatcher.from_bytes(artifact)) == 1
+
+    @pytest.mark.parametrize(
+        "data",
+        [b"", b"JSON{}", b"BPLM\x00\x02\x00\x00\x00\x00", b"BPLM\x00\x01\x00"],
+    )
+    def test_from_bytes_rejects_invalid_artifacts(self, data):
+        with pytest.raises(ValueError):
+            BoilerplateMatcher.from_bytes(data)
@@ -0,0 +1,83 @@
+import logging
+
+import pytest
+
+from src.core.scraper.cleaning.boilerplate_matcher import BoilerplateMatcher
+from src.core.scraper.cleaning.cleaning_executor import (
+    CleaningExecutor,
+    clean_markdown,
+)
+from src.core.scraper.cleaning.noise_filter import NoiseFilter
+
+PAGE = "# Vase\nBlue vase\nCart\nWishlist\n## Newsletter\nSign up\n## Details\nMing"
+
+
+class TestCleanMarkdown:
+    def test_removes_noise_blocks_and_truncates(self):
+        matcher = BoilerplateMatcher([["Cart", "Wishlist"]])
+
+        cleaned = clean_markdown(PAGE, NoiseFilter(["newsletter"]), matcher, 1000)
+
+        assert cleaned == "# Vase\nBlue vase\n## Details\nMing"
+        assert clean_markdown(PAGE, NoiseFilter([]), None, 6) == "# Vase"
+
+
+class TestCleaningExecutor:
+    @pytest.mark.asyncio
+    async def test_inline_clean_many(self):
+        executor = CleaningExecutor(max_workers=0)
+        matcher = BoilerplateMatcher([["Cart", "Wishlist"]])
+
+        cleaned = await executor.clean_many(
+            "shop.com", [PAGE, "Cart\nWishlist"], matcher
+        )
+
+        assert cleaned == ["# Vase\nBlue vase\n## Details\nMing", ""]
+        assert await executor.clean_many("shop.com", []) == []
+
+    def test_artifact_is_serialized_once_per_matcher(self):
+        executor = CleaningExecutor(max_workers=0)
+        matcher = BoilerplateMatcher([["Cart", "Wishlist"]])
+
+        token, data = executor._artifact(matcher)
+
+        assert executor._artifact(matcher) == (token, data)
+        assert executor._artifact(BoilerplateMatcher([["Other"]]))[0] != token
+
+    @pytest.mark.asyncio
+    async def test_process_pool_matches_inline(self):
+        executor = CleaningExecutor(max_workers=1)
+        matcher = BoilerplateMatcher([["Cart", "Wishlist"]])
+        try:
+            first = await executor.clean_many("shop.com", [PAGE], matcher)
+            second = await executor.clean("shop.com", PAGE)
+        finally:
+            executor.close()
+
+        inline = CleaningExecutor(max_workers=0)
+        assert first == await inline.clean_many("shop.com", [PAGE], matcher)
+        assert second == await inline.clean("shop.com", PAGE)
+        assert executor._pool is None
+
+    @pytest.mark.asyncio
+    async def test_fired_triggers_are_aggregated_from_the_processes(self):
+        executor = CleaningExecutor(max_workers=1)
+        try:
+            await executor.clean_many("shop.com", [PAGE, PAGE])
+            await executor.clean("shop.com", PAGE)
+        finally:
+            executor.close()
+
+        assert executor.trigger_counts == {"newsletter": 3}
+        assert executor.cleaned_pages == 3
+
+    @pytest.mark.asyncio
+    async def test_fired_triggers_are_reported(self, caplog):
+        executor = CleaningExecutor(max_workers=0, report_pages=2)
+
+        with caplog.at_level(logging.INFO):
+            await executor.clean("shop.com", PAGE)
+            assert "Noise triggers" not in caplog.text
+            await executor.clean("shop.com", PAGE)
+
+        assert "Noise triggers fired in 2 cleaned pages: newsletter=2" in caplog.text
@@ -0,0 +1,78 @@
+import json
+
+from src.core.scraper.cleaning.noise_filter import (
+    DEFAULT_NOISE_TRIGGERS,
+    NoiseFilter,
+    NoiseFilters,
+    load_noise_config,
+)
+
+
+class TestNoiseFilter:
+    def test_remove_skips_section_until_same_level_header(self):
+        noise_filter = NoiseFilter()
+        markdown = (
+            "## Info\nKeep\n## Versand & Lieferung\nDrop\n### Sub\nDrop\n# Top\nKeep"
+        )
+
+        assert noise_filter.remove(markdown) == "## Info\nKeep\n# Top\nKeep"
+
+    def test_counts_fired_triggers(self):
+        noise_filter = NoiseFilter(["newsletter", "social media", "social"])
+        noise_filter.remove("## Newsletter\nx\n## Social Media\ny\n## Social\nz")
+
+        assert noise_filter.trigger_counts == {
+            "newsletter": 1,
+            "social media": 1,
+            "social": 1,
+        }
+
+    def test_keywords_outside_headers_are_kept(self):
+        noise_filter = NoiseFilter()
+        text = "Free versand on related products."
+
+        assert noise_filter.remove(text) == text
+
+    def test_empty_trigger_list_keeps_everything(self):
+        noise_filter = NoiseFilter([])
+
+        assert noise_filter.remove("## Newsletter\nx") == "## Newsletter\nx"
+
+    def test_iter_lines_is_lazy(self):
+        noise_filter = NoiseFilter(["agb"])
+        lines = iter(["keep", "## AGB", "drop"])
+
+        result = noise_filter.iter_lines(lines)
+
+        assert next(result) == "keep"
+        assert list(result) == []
+
+
+class TestNoiseFilters:
+    def test_load_noise_config_without_path_uses_defaults(self):
+        assert load_noise_config(None) == {"": list(DEFAULT_NOISE_TRIGGERS)}
+
+    def test_load_noise_config_with_domain_overrides(self, tmp_path):
+        path = tmp_path / "noise.json"
+        path.write_text(
+            json.dumps({"default": ["agb"], "domains": {"Shop.de": ["zubehör"]}})
+        )
+
+        config = load_noise_config(str(path))
+
+        assert config == {"": ["agb"], "shop.de": ["agb", "zubehör"]}
+
+    def test_load_noise_config_invalid_file_falls_back(self, tmp_path):
+        path = tmp_path / "noise.json"
+        path.write_text("{not json")
+
+        assert load_noise_config(str(path)) == {"": list(DEFAULT_NOISE_TRIGGERS)}
+
+    def test_for_domain_selects_override(self):
+        filters = NoiseFilters({"": ["agb"], "shop.de": ["agb", "zubehör"]})
+        markdown = "## Zubehör\nx\n## AGB\ny"
+
+        assert filters.for_domain("SHOP.DE").remove(markdown) == ""
+        assert filters.for_domain("other.de").remove(markdown) == "## Zubehör\nx"
+        assert filters.for_domain(None) is filters.default
+        assert filters.trigger_counts() == {"agb": 2, "zubehör": 1}
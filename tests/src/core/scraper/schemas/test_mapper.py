@@ -1,9 +1,15 @@
+import pytest
+
+from aura_historia_backend_api_client.models import PutProductData
 from src.core.scraper.schemas.extracted_product import (
     ExtractedProduct,
     LocalizedText,
     MonetaryValue,
 )
-from src.core.scraper.schemas.mapper import map_extracted_product_to_api
+from src.core.scraper.schemas.mapper import (
+    map_extracted_product_to_api,
+    product_to_wire,
+)
 
 
 def make_extracted_product(**overrides: object) -> ExtractedProduct:
@@ -69,3 +75,29 @@ def test_maps_full_product_payload() -> None:
     assert result.state.value == "SOLD"
     assert result.auction_start == "2025-01-10T09:00:00Z"
     assert result.auction_end == "2025-01-20T18:00:00Z"
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"images": []},
+        {
+            "description": LocalizedText(text="Originalbeschreibung", language="de"),
+            "price": MonetaryValue(amount=19900, currency="EUR"),
+            "auctionStart": "2025-01-10T09:00:00Z",
+            "auctionEnd": "2025-01-20T18:00:00Z",
+            "state": "SOLD",
+        },
+    ],
+)
+def test_wire_dict_matches_api_model(overrides: dict) -> None:
+    product = make_extracted_product(**overrides)
+    url = "https://shop.test/product/sku-123"
+
+    wire = product_to_wire(product, url=url)
+    expected = map_extracted_product_to_api(product, url=url).to_dict()
+
+    assert wire == expected
+    # The backend model parses it like the generated payload
+    parsed = PutProductData.from_dict(wire).to_dict()
+    assert parsed == PutProductData.from_dict(expected).to_dict()
@@ -192,6 +192,46 @@ class TestPerformanceStatsProgress:
         assert progress == pytest.approx(0.0)
 
 
+class TestPerformanceStatsStages:
+    """Tests for the gate and full extraction stage metrics."""
+
+    def test_stage_latencies(self):
+        stats = PerformanceStats(
+            gate_calls=10, gate_seconds=2.0, llm_extractions=4, extraction_seconds=8.0
+        )
+
+        assert stats.gate_latency() == pytest.approx(0.2)
+        assert stats.extraction_latency() == pytest.approx(2.0)
+
+    def test_gate_precision(self):
+        stats = PerformanceStats(
+            gate_calls=10,
+            gate_rejections=4,
+            gate_passes=4,
+            gate_errors=2,
+            gate_false_positives=1,
+        )
+
+        # Pages the gate failed on are not positives
+        assert stats.gate_precision() == pytest.approx(75.0)
+
+    def test_stage_metrics_without_calls_are_zero(self):
+        stats = PerformanceStats()
+
+        assert stats.gate_latency() == 0.0
+        assert stats.extraction_latency() == 0.0
+        assert stats.gate_precision() == 0.0
+
+    def test_report_shows_gate_only_when_used(self, capsys):
+        PerformanceStats().report()
+        assert "Gate Calls" not in capsys.readouterr().out
+
+        PerformanceStats(gate_calls=2, gate_rejections=1).report()
+        out = capsys.readouterr().out
+        assert "Gate Calls:           2" in out
+        assert "Gate Rejected:        1" in out
+
+
 class TestPerformanceStatsReport:
     """Tests for report output."""
 
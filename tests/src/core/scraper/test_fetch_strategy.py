@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from src.core.scraper.fetch_strategy import (
+    MODE_BROWSER,
+    MODE_HTTP,
+    HybridFetcher,
+    has_js_rendering_markers,
+    has_product_signals,
+)
+
+PRODUCT_MARKDOWN = (
+    "# Antique Oak Chest\n\n"
+    + "Solid oak, 19th century. " * 10
+    + "\n\nPrice: 1.250,00 €"
+)
+PRODUCT_HTML = "<html><body><h1>Antique Oak Chest</h1></body></html>"
+SPA_HTML = (
+    '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+)
+
+
+class FakeResult:
+    def __init__(self, url, success=True, markdown=PRODUCT_MARKDOWN, html=PRODUCT_HTML):
+        self.url = url
+        self.success = success
+        self.markdown = markdown
+        self.html = html
+
+
+class FakeCrawler:
+    """Crawler stub returning canned results and recording requested URLs."""
+
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.calls = []
+        self.started = False
+
+    async def start(self):
+        self.started = True
+
+    async def close(self):
+        self.started = False
+
+    async def arun_many(self, urls, **_kwargs):
+        self.calls.append(list(urls))
+        # Completion order differs from request order on purpose
+        return [self.results.get(url, FakeResult(url)) for url in reversed(urls)]
+
+
+class TestSignals:
+    def test_json_ld_product_is_a_product_signal(self):
+        html = '<script type="application/ld+json">{"@type": "Product"}</script>'
+        assert has_product_signals(html, "no price here")
+
+    def test_open_graph_product_is_a_product_signal(self):
+        html = '<meta property="og:type" content="product">'
+        assert has_product_signals(html, "")
+
+    def test_price_in_markdown_is_a_product_signal(self):
+        assert has_product_signals("", "Only EUR 300 today")
+
+    def test_plain_page_has_no_product_signals(self):
+        assert not has_product_signals("<p>About us</p>", "# About us")
+
+    def test_empty_app_root_is_a_js_marker(self):
+        assert has_js_rendering_markers(SPA_HTML)
+
+    def test_noscript_hint_is_a_js_marker(self):
+        html = "<noscript>Please enable JavaScript to view this shop.</noscript>"
+        assert has_js_rendering_markers(html)
+
+    def test_server_rendered_page_has_no_js_marker(self):
+        assert not has_js_rendering_markers(PRODUCT_HTML)
+
+
+class TestHybridFetcher:
+    @pytest.mark.asyncio
+    async def test_static_domain_uses_http_only(self):
+        http = FakeCrawler()
+        browser = FakeCrawler()
+        fetcher = HybridFetcher(http_crawler=http)
+        urls = ["https://shop.com/1", "https://shop.com/2"]
+
+        results = await fetcher.fetch_many(browser, urls, "shop.com", run_config={})
+
+        assert [r.url for r in results] == urls
+        assert browser.calls == []
+        assert http.started
+        assert fetcher.mode_for("shop.com") == MODE_HTTP
+
+    @pytest.mark.asyncio
+    async def test_unusable_pages_fall_back_to_browser(self):
+        http = FakeCrawler(
+            results={
+                "https://shop.com/2": FakeResult("https://shop.com/2", html=SPA_HTML),
+                "https://shop.com/3": FakeResult("https://shop.com/3", success=False),
+            }
+        )
+        browser = FakeCrawler()
+        fetcher = HybridFetcher(http_crawler=http, min_static_ratio=0.3)
+        urls = ["https://shop.com/1", "https://shop.com/2", "https://shop.com/3"]
+
+        results = await fetcher.fetch_many(browser, urls, "shop.com", run_config={})
+
+        assert [r.url for r in results] == urls
+        assert browser.calls == [["https://shop.com/2", "https://shop.com/3"]]
+        assert fetcher.mode_for("shop.com") == MODE_HTTP
+
+    @pytest.mark.asyncio
+    async def test_js_domain_is_remembered_as_browser(self):
+        spa = {
+            f"https://spa.com/{i}": FakeResult(f"https://spa.com/{i}", html=SPA_HTML)
+            for i in range(4)
+        }
+        http = FakeCrawler(results=spa)
+        browser = FakeCrawler()
+        fetcher = HybridFetcher(http_crawler=http)
+
+        await fetcher.fetch_many(
+            browser, ["https://spa.com/0", "https://spa.com/1"], "spa.com", {}
+        )
+        assert fetcher.mode_for("spa.com") == MODE_BROWSER
+
+        await fetcher.fetch_many(
+            browser, ["https://spa.com/2", "https://spa.com/3"], "spa.com", {}
+        )
+
+        # The second chunk skips the HTTP attempt entirely
+        assert len(http.calls) == 1
+        assert browser.calls[-1] == ["https://spa.com/2", "https://spa.com/3"]
+
+    @pytest.mark.asyncio
+    async def test_short_markdown_is_not_usable(self):
+        fetcher = HybridFetcher(http_crawler=FakeCrawler())
+        assert not fetcher.is_usable(FakeResult("https://shop.com", markdown="€ 5"))
+
+    @pytest.mark.asyncio
+    async def test_close_stops_http_crawler(self):
+        http = FakeCrawler()
+        async with HybridFetcher(http_crawler=http):
+            assert http.started
+        assert not http.started
+
+    @pytest.mark.asyncio
+    async def test_concurrent_starts_start_http_crawler_once(self):
+        http = FakeCrawler()
+        starts = []
+
+        async def slow_start():
+            starts.append(True)
+            await asyncio.sleep(0.01)
+            http.started = True
+
+        http.start = slow_start
+        fetcher = HybridFetcher(http_crawler=http)
+
+        await asyncio.gather(*(fetcher.start() for _ in range(5)))
+
+        assert len(starts) == 1
@@ -0,0 +1,190 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError
+
+from src.core.scraper.llm_pool import LLMEndpointPool
+
+
+def connection_error():
+    return APIConnectionError(request=httpx.Request("POST", "http://llm"))
+
+
+def mock_pool(n=2, **kwargs):
+    return LLMEndpointPool(
+        [f"http://llm-{i}/v1" for i in range(n)],
+        client_factory=lambda url: Mock(close=AsyncMock()),
+        **kwargs,
+    )
+
+
+class StubServer:
+    """Minimal OpenAI-compatible server answering with a fixed message."""
+
+    def __init__(self, content, status=200):
+        self.content = content
+        self.status = status
+        self.requests = 0
+        self.url = None
+        self._runner = None
+
+    async def chat(self, request):
+        self.requests += 1
+        if self.status != 200:
+            return web.json_response({"error": "overloaded"}, status=self.status)
+        body = await request.json()
+        return web.json_response(
+            {
+                "id": "cmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": self.content},
+                    }
+                ],
+            }
+        )
+
+    async def models(self, request):
+        if self.status != 200:
+            return web.json_response({"error": "down"}, status=self.status)
+        return web.json_response({"object": "list", "data": []})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat)
+        app.router.add_get("/v1/models", self.models)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def stub_servers():
+    servers = [StubServer('{"ok": 1}'), StubServer('{"ok": 2}', status=503)]
+    for server in servers:
+        await server.start()
+    yield servers
+    for server in servers:
+        await server.stop()
+
+
+async def complete(pool):
+    async with pool.lease() as endpoint:
+        response = await endpoint.client.chat.completions.create(
+            model=pool.model, messages=[{"role": "user", "content": "hi"}]
+        )
+    return json.loads(response.choices[0].message.content)["ok"]
+
+
+@pytest.mark.asyncio
+async def test_lease_picks_least_outstanding_endpoint():
+    pool = mock_pool(3)
+
+    async with pool.lease() as first:
+        async with pool.lease() as second:
+            async with pool.lease() as third:
+                assert len({first.base_url, second.base_url, third.base_url}) == 3
+                assert [e.in_flight for e in pool.endpoints] == [1, 1, 1]
+
+    assert [e.in_flight for e in pool.endpoints] == [0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_consecutive_failures():
+    pool = mock_pool(2, failure_threshold=2, cooldown=60)
+    broken = pool.endpoints[0]
+
+    for _ in range(2):
+        with pytest.raises(APIConnectionError):
+            async with pool.lease() as endpoint:
+                assert endpoint is broken
+                raise connection_error()
+
+    assert pool.metrics()[broken.base_url]["open"] is True
+    for _ in range(3):
+        async with pool.lease() as endpoint:
+            assert endpoint is pool.endpoints[1]
+
+
+@pytest.mark.asyncio
+async def test_request_errors_do_not_count_against_endpoint():
+    pool = mock_pool(1, failure_threshold=1)
+
+    with pytest.raises(ValueError):
+        async with pool.lease():
+            raise ValueError("bad request")
+
+    endpoint = pool.endpoints[0]
+    assert endpoint.consecutive_failures == 0
+    assert not endpoint.is_open(0)
+
+
+@pytest.mark.asyncio
+async def test_all_circuits_open_falls_back_to_oldest():
+    pool = mock_pool(2, failure_threshold=1, cooldown=60)
+    for endpoint in pool.endpoints:
+        pool._record_failure(endpoint, connection_error())
+        await asyncio.sleep(0.001)
+
+    async with pool.lease() as endpoint:
+        assert endpoint is pool.endpoints[0]
+
+
+@pytest.mark.asyncio
+async def test_health_check_closes_recovered_circuit():
+    pool = mock_pool(1, failure_threshold=1, cooldown=60)
+    endpoint = pool.endpoints[0]
+    endpoint.client.models.list = AsyncMock(side_effect=[connection_error(), []])
+    pool._record_failure(endpoint, connection_error())
+
+    await pool.check_health()
+    assert pool.metrics()[endpoint.base_url]["open"] is True
+
+    await pool.check_health()
+    assert pool.metrics()[endpoint.base_url]["open"] is False
+
+
+@pytest.mark.asyncio
+async def test_fails_over_between_stub_servers(stub_servers):
+    healthy, overloaded = stub_servers
+    pool = LLMEndpointPool(
+        [overloaded.url, healthy.url],
+        failure_threshold=1,
+        cooldown=60,
+        health_interval=0,
+        client_factory=lambda url: AsyncOpenAI(
+            base_url=url, api_key="dummy", max_retries=0
+        ),
+    )
+
+    with pytest.raises(InternalServerError):
+        await complete(pool)
+    answers = [await complete(pool) for _ in range(3)]
+
+    assert answers == [1, 1, 1]
+    assert overloaded.requests == 1
+    metrics = pool.metrics()
+    assert metrics[overloaded.url]["open"] is True
+    assert metrics[healthy.url]["requests"] == 3
+    assert metrics[healthy.url]["avg_latency_s"] > 0
+
+    overloaded.status = 200
+    await pool.check_health()
+    assert pool.metrics()[overloaded.url]["open"] is False
+    await pool.close()
@@ -0,0 +1,127 @@
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+from openai import (
+    APIConnectionError,
+    BadRequestError,
+    InternalServerError,
+    LengthFinishReasonError,
+)
+
+from src.core.scraper.llm_errors import (
+    LLMError,
+    LLMRequestError,
+    LLMTransientError,
+    LLMTruncatedError,
+    classify_error,
+)
+from src.core.scraper.llm_retry import RetryBudget, RetryPolicy
+
+REQUEST = httpx.Request("POST", "http://llm/v1/chat/completions")
+
+
+def status_error(cls, status):
+    return cls("error", response=httpx.Response(status, request=REQUEST), body=None)
+
+
+def length_error():
+    return LengthFinishReasonError(completion=Mock(usage=None))
+
+
+@pytest.mark.parametrize(
+    "error,expected",
+    [
+        (APIConnectionError(request=REQUEST), LLMTransientError),
+        (status_error(InternalServerError, 503), LLMTransientError),
+        (status_error(BadRequestError, 400), LLMRequestError),
+        (length_error(), LLMTruncatedError),
+        (ValueError("boom"), LLMError),
+    ],
+)
+def test_classify_error(error, expected):
+    typed = classify_error(error)
+    assert type(typed) is expected
+    assert typed.__cause__ is error
+
+
+def policy(**kwargs):
+    kwargs.setdefault("base_delay", 0)
+    return RetryPolicy(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_with_backoff():
+    request = AsyncMock(side_effect=[APIConnectionError(request=REQUEST), "{}"])
+
+    result = await policy().run(request, 2500, RetryBudget(), "shop.com")
+
+    assert result == "{}"
+    assert request.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_stop_after_max_attempts():
+    request = AsyncMock(side_effect=status_error(InternalServerError, 503))
+
+    with pytest.raises(LLMTransientError):
+        await policy(max_attempts=3).run(request, 2500, RetryBudget(), "shop.com")
+
+    assert request.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_truncation_is_retried_once_with_more_tokens():
+    request = AsyncMock(side_effect=[length_error(), length_error()])
+
+    with pytest.raises(LLMTruncatedError):
+        await policy().run(request, 2500, RetryBudget(), truncation_max_tokens=5000)
+
+    assert [c.args[0] for c in request.await_args_list] == [2500, 5000]
+
+
+@pytest.mark.asyncio
+async def test_truncation_is_not_retried_without_a_limit():
+    request = AsyncMock(side_effect=length_error())
+
+    with pytest.raises(LLMTruncatedError):
+        await policy().run(request, 10, RetryBudget())
+
+    assert request.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_request_errors_are_not_retried():
+    request = AsyncMock(side_effect=status_error(BadRequestError, 400))
+
+    with pytest.raises(LLMRequestError):
+        await policy().run(request, 2500, RetryBudget())
+
+    assert request.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_is_per_domain():
+    budget = RetryBudget(ratio=0.0, reserve=1)
+    failing = AsyncMock(side_effect=APIConnectionError(request=REQUEST))
+
+    with pytest.raises(LLMTransientError):
+        await policy(max_attempts=5).run(failing, 2500, budget, "a.com")
+    # One reserve retry, then the budget of a.com is used up
+    assert failing.await_count == 2
+
+    with pytest.raises(LLMTransientError):
+        await policy(max_attempts=5).run(failing, 2500, budget, "a.com")
+    assert failing.await_count == 3
+
+    assert budget.withdraw("b.com") is True
+
+
+def test_retry_budget_refills_with_requests():
+    budget = RetryBudget(ratio=0.5, reserve=1)
+    assert budget.withdraw("a.com") is True
+    assert budget.withdraw("a.com") is False
+
+    budget.deposit("a.com")
+    budget.deposit("a.com")
+    assert budget.withdraw("a.com") is True
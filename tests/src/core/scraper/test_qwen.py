@@ -3,16 +3,60 @@ import pytest
 from unittest.mock import AsyncMock, Mock, patch
 
 from src.core.scraper.qwen import (
+    JsonObjectScanner,
     chat_completion,
+    decode_product,
     _find_balanced_brace_object,
-    _parse_llm_response,
     extract,
+    gate_product,
     _apply_boilerplate_removal,
 )
-from src.core.scraper.base import get_markdown
+from src.core.scraper.base import (
+    get_markdown,
+    stream_chat_completion,
+    stream_pages,
+)
+from src.core.scraper.cleaning.boilerplate_remover import BoilerplateRemover
+from src.core.scraper.llm_errors import (
+    LLMError,
+    LLMTransientError,
+    LLMTruncatedError,
+)
+from src.core.scraper.llm_retry import RetryBudget, RetryPolicy
 from src.core.scraper.schemas.extracted_product import ExtractedProduct
 
 
+PRODUCT = {
+    "is_product": True,
+    "shopsProductId": "LOT123",
+    "title": {"text": "Möbel", "language": "de"},
+    "description": {"text": "Fancy chair", "language": "en"},
+    "state": "AVAILABLE",
+}
+
+
+def fake_stream(chunks, closed=None):
+    async def stream(system_prompt, prompt, max_tokens=2500):
+        try:
+            for chunk in chunks:
+                yield chunk
+        finally:
+            if closed is not None:
+                closed.append(True)
+
+    return stream
+
+
+def llm_client():
+    """Replace the client of the (single) pooled endpoint with a mock."""
+    from src.core.scraper.base import llm_pool
+
+    client = Mock()
+    client.beta.chat.completions.parse = AsyncMock()
+    client.chat.completions.create = AsyncMock()
+    return patch.object(llm_pool.endpoints[0], "client", client), client
+
+
 class TestChatCompletion:
     @pytest.mark.asyncio
     async def test_chat_completion_success(self):
@@ -20,42 +64,74 @@ class TestChatCompletion:
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = '{"test": "value"}'
 
-        with patch(
-            "src.core.scraper.base.client.beta.chat.completions.parse",
-            new_callable=AsyncMock,
-            return_value=mock_response,
-        ):
+        patcher, client = llm_client()
+        client.beta.chat.completions.parse.return_value = mock_response
+        with patcher:
             result = await chat_completion("system", "user prompts")
 
         assert result == '{"test": "value"}'
 
     @pytest.mark.asyncio
-    async def test_chat_completion_error_returns_empty_json(self):
-        with patch(
-            "src.core.scraper.base.client.beta.chat.completions.parse",
-            new_callable=AsyncMock,
-            side_effect=Exception("API Error"),
-        ):
-            result = await chat_completion("system", "user prompts")
+    async def test_chat_completion_error_raises_typed_error(self):
+        patcher, client = llm_client()
+        client.beta.chat.completions.parse.side_effect = Exception("API Error")
+        with patcher, pytest.raises(LLMError):
+            await chat_completion("system", "user prompts")
+
+        # Unknown errors are not retried
+        assert client.beta.chat.completions.parse.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_chat_completion_yields_deltas_and_closes(self):
+        chunks = [
+            Mock(choices=[Mock(delta=Mock(content=c))]) for c in ['{"a"', None, ": 1}"]
+        ]
+
+        class FakeStream:
+            def __init__(self):
+                self.close = AsyncMock()
+
+            async def __aiter__(self):
+                for chunk in chunks:
+                    yield chunk
 
-        assert result == "{}"
+        fake = FakeStream()
+        patcher, client = llm_client()
+        client.chat.completions.create.return_value = fake
+        mock_create = client.chat.completions.create
+        with patcher:
+            deltas = [d async for d in stream_chat_completion("system", "user")]
+
+        assert deltas == ['{"a"', ": 1}"]
+        assert mock_create.call_args.kwargs["stream"] is True
+        fake.close.assert_awaited_once()
 
 
 class TestLlmResponseParsing:
     @pytest.mark.parametrize(
-        "input_text,expected_json",
+        "template",
         [
-            ('{"key": "value"}', '{"key": "value"}'),
-            ('Pre-text {"key": "value"} Post-text', '{"key": "value"}'),
-            ('```json\n{"nested": {"id": 1}}\n```', '{"nested": {"id": 1}}'),
-            ('{"title": "Möbel"}', '{"title": "Möbel"}'),  # Unicode
-            ("Invalid text", "{}"),
-            ("", "{}"),
+            "{product}",
+            "Pre-text {product} Post-text",
+            "```json\n{product}\n```",
         ],
     )
-    def test_parse_llm_response_parametrized(self, input_text, expected_json):
-        result = _parse_llm_response(input_text)
-        assert result == expected_json
+    def test_decode_product_parametrized(self, template):
+        text = template.replace("{product}", json.dumps(PRODUCT, ensure_ascii=False))
+        product = decode_product(text)
+        assert product.shopsProductId == "LOT123"
+        assert product.title.text == "Möbel"
+
+    def test_decode_product_sanitizes_raw_newlines(self):
+        text = json.dumps(PRODUCT).replace("Fancy chair", "Fancy\nchair")
+        assert "\n" in text
+        assert decode_product(text).description.text == "Fancy chair"
+
+    @pytest.mark.parametrize(
+        "text", ["Invalid text", "", "{}", '{"title": "Möbel"}', '{"a": 1']
+    )
+    def test_decode_product_invalid(self, text):
+        assert decode_product(text) is None
 
     @pytest.mark.parametrize(
         "text,expected",
@@ -65,11 +141,19 @@ class TestLlmResponseParsing:
             ('{"a": 1} {"b": 2}', '{"a": 1}'),
             ('{"a": 1', None),  # Unbalanced
             ("", None),
+            ('{"a": "}{", "b": "\\"}"}', '{"a": "}{", "b": "\\"}"}'),  # In strings
         ],
     )
     def test_find_balanced_brace_object(self, text, expected):
         assert _find_balanced_brace_object(text) == expected
 
+    def test_scanner_feeds_chunks(self):
+        text = 'x {"a": "\\\\", "b": {"c": "}"}} tail'
+        scanner = JsonObjectScanner()
+        ends = [scanner.feed(text[i : i + 3]) for i in range(0, len(text), 3)]
+        end = next(e for e in ends if e is not None)
+        assert text[scanner.start : end] == '{"a": "\\\\", "b": {"c": "}"}}'
+
 
 class TestExtractFlow:
     @pytest.mark.asyncio
@@ -130,6 +214,128 @@ class TestExtractFlow:
             assert result is None
 
 
+class TestGateProduct:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "response,expected",
+        [
+            ('{"is_product": true}', True),
+            ('{"is_product": false}', False),
+            ("{}", None),
+            ("garbage", None),
+        ],
+    )
+    async def test_gate_product(self, response, expected):
+        with patch(
+            "src.core.scraper.qwen.chat_completion",
+            new_callable=AsyncMock,
+            return_value=response,
+        ) as mock_chat:
+            assert await gate_product("x" * 10000) is expected
+
+        _, prompt = mock_chat.call_args.args
+        assert len(prompt) < 10000
+        assert mock_chat.call_args.kwargs["max_tokens"] <= 10
+        assert mock_chat.call_args.kwargs["truncation_max_tokens"] is None
+
+    @pytest.mark.asyncio
+    async def test_truncated_gate_answer_is_undecided(self):
+        with patch(
+            "src.core.scraper.qwen.chat_completion",
+            new_callable=AsyncMock,
+            side_effect=LLMTruncatedError("length"),
+        ):
+            assert await gate_product("x" * 100) is None
+
+
+class TestStreamingExtract:
+    @pytest.mark.asyncio
+    async def test_stream_stops_when_object_closes(self):
+        text = json.dumps(PRODUCT)
+        chunks = [text[i : i + 7] for i in range(0, len(text), 7)]
+        consumed = []
+
+        async def stream(system_prompt, prompt, max_tokens=2500):
+            for chunk in chunks + ["trailing garbage"]:
+                consumed.append(chunk)
+                yield chunk
+
+        with (
+            patch("src.core.scraper.qwen.LLM_STREAMING", True),
+            patch("src.core.scraper.qwen.stream_chat_completion", new=stream),
+        ):
+            result = await extract("markdown")
+
+        assert result.shopsProductId == "LOT123"
+        assert "trailing garbage" not in consumed
+
+    @pytest.mark.asyncio
+    async def test_stream_aborts_on_non_product(self):
+        closed = []
+        chunks = ['{"is_', 'product": false,', ' "shopsProductId": "', "never"]
+
+        with (
+            patch("src.core.scraper.qwen.LLM_STREAMING", True),
+            patch(
+                "src.core.scraper.qwen.stream_chat_completion",
+                new=fake_stream(chunks, closed),
+            ),
+        ):
+            result = await extract("markdown")
+
+        assert result.is_product is False
+        assert closed == [True]
+
+    @pytest.mark.asyncio
+    async def test_stream_error_propagates_after_retries(self):
+        attempts = []
+
+        async def stream(system_prompt, prompt, max_tokens=2500):
+            attempts.append(max_tokens)
+            yield '{"is_product": true'
+            raise LLMTransientError("connection reset")
+
+        with (
+            patch("src.core.scraper.qwen.LLM_STREAMING", True),
+            patch("src.core.scraper.qwen.stream_chat_completion", new=stream),
+            patch("src.core.scraper.qwen.retry_policy", RetryPolicy(base_delay=0)),
+            pytest.raises(LLMTransientError),
+        ):
+            await extract("markdown")
+
+        assert len(attempts) == RetryPolicy().max_attempts
+
+    @pytest.mark.asyncio
+    async def test_failed_stream_is_restarted_within_the_domain_budget(self):
+        text = json.dumps(PRODUCT)
+        attempts = []
+
+        async def stream(system_prompt, prompt, max_tokens=2500):
+            attempts.append(max_tokens)
+            if len(attempts) == 1:
+                raise LLMTransientError("connection reset")
+            yield text
+
+        budget = RetryBudget(ratio=0, reserve=1)
+        with (
+            patch("src.core.scraper.qwen.LLM_STREAMING", True),
+            patch("src.core.scraper.qwen.stream_chat_completion", new=stream),
+            patch("src.core.scraper.qwen.retry_policy", RetryPolicy(base_delay=0)),
+            patch("src.core.scraper.qwen.retry_budget", budget),
+            patch(
+                "src.core.scraper.qwen._apply_boilerplate_removal",
+                new=AsyncMock(side_effect=lambda md, domain: md),
+            ),
+        ):
+            result = await extract("markdown", "shop.com")
+
+        assert result.shopsProductId == "LOT123"
+        assert len(attempts) == 2
+        # The retry was charged to the domain
+        assert not budget.withdraw("shop.com")
+        assert budget.withdraw("other.com")
+
+
 class TestBoilerplateIntegration:
     @pytest.mark.asyncio
     async def test_apply_boilerplate_removal_integrated(self):
@@ -158,6 +364,26 @@ class TestBoilerplateIntegration:
             result = await _apply_boilerplate_removal("some markdown", "fail.com")
             assert result == "some markdown"
 
+    @pytest.mark.asyncio
+    async def test_undiscovered_shop_is_discovered_once(self):
+        """Pages of a shop without blocks do not each trigger a discovery."""
+        with patch("src.core.scraper.cleaning.boilerplate_remover.S3Operations"):
+            remover = BoilerplateRemover()
+        remover.s3.download_bytes_if_changed.return_value = (None, None, True)
+        remover.s3.download_json_if_changed.return_value = (None, None, True)
+        discovery = Mock(discover_and_save=AsyncMock(return_value=[]))
+
+        with (
+            patch("src.core.scraper.qwen.boilerplate_remover", remover),
+            patch("src.core.scraper.qwen.boilerplate_discovery", discovery),
+        ):
+            for _ in range(5):
+                await _apply_boilerplate_removal("Product Info", "new.com")
+
+        discovery.discover_and_save.assert_awaited_once_with("new.com")
+        remover.s3.download_bytes_if_changed.assert_called_once()
+        remover.s3.download_json_if_changed.assert_called_once()
+
 
 class TestGetMarkdown:
     @pytest.mark.asyncio
@@ -184,3 +410,21 @@ class TestGetMarkdown:
         with patch("src.core.scraper.base.AsyncWebCrawler", return_value=mock_crawler):
             result = await get_markdown("http://test.com")
             assert result == ""
+
+    @pytest.mark.asyncio
+    async def test_stream_pages_yields_successful_pages(self):
+        page = Mock(success=True, url="http://a.com", markdown="A")
+
+        async def results():
+            yield page
+            yield Mock(success=False, url="http://b.com", error_message="Failed")
+
+        mock_crawler = AsyncMock()
+        mock_crawler.arun_many.return_value = results()
+        mock_crawler.__aenter__.return_value = mock_crawler
+
+        with patch("src.core.scraper.base.AsyncWebCrawler", return_value=mock_crawler):
+            pages = [p async for p in stream_pages(["http://a.com", "x"])]
+
+        assert pages == [page]
+        assert mock_crawler.arun_many.call_args.kwargs["config"].stream is True
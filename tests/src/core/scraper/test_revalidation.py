@@ -0,0 +1,179 @@
+import pytest
+from aioresponses import aioresponses
+from unittest.mock import Mock
+
+from src.core.aws.database.models import URLEntry
+from src.core.scraper.revalidation import (
+    CHANGED,
+    UNCHANGED,
+    UNKNOWN,
+    Revalidator,
+    validators_from_headers,
+)
+from src.core.utils.politeness import PolitenessScheduler
+
+URL = "https://shop.com/p/1"
+
+
+def make_revalidator(entries=None):
+    db = Mock()
+    db.batch_get_url_entries = Mock(return_value=entries or {})
+    db.update_url_validators = Mock()
+    limiter = PolitenessScheduler(
+        requests_per_second=1000, burst=100, respect_crawl_delay=False
+    )
+    return Revalidator(db, rate_limiter=limiter), db
+
+
+def entry(url=URL, **kwargs):
+    kwargs.setdefault("hash", "h")
+    return URLEntry(domain="shop.com", url=url, **kwargs)
+
+
+def test_validators_from_headers_is_case_insensitive():
+    headers = {"etag": '"x"', "last-modified": "Mon", "content-length": "42"}
+    assert validators_from_headers(headers) == ('"x"', "Mon", 42)
+
+
+def test_validators_from_missing_headers():
+    assert validators_from_headers(None) == (None, None, None)
+
+
+class TestRevalidate:
+    @pytest.mark.asyncio
+    async def test_not_modified_is_unchanged(self):
+        revalidator, _ = make_revalidator()
+        with aioresponses() as mocked:
+            mocked.head(URL, status=304)
+            result = await revalidator.revalidate(entry(etag='"v1"'))
+            request = list(mocked.requests.values())[0][0]
+        await revalidator.close()
+
+        assert result == UNCHANGED
+        assert request.kwargs["headers"]["If-None-Match"] == '"v1"'
+
+    @pytest.mark.asyncio
+    async def test_identical_etag_is_unchanged(self):
+        revalidator, _ = make_revalidator()
+        with aioresponses() as mocked:
+            mocked.head(URL, status=200, headers={"ETag": 'W/"v1"'})
+            result = await revalidator.revalidate(entry(etag='"v1"'))
+        await revalidator.close()
+
+        assert result == UNCHANGED
+
+    @pytest.mark.asyncio
+    async def test_new_last_modified_is_changed(self):
+        revalidator, _ = make_revalidator()
+        with aioresponses() as mocked:
+            mocked.head(URL, status=200, headers={"Last-Modified": "Tue"})
+            result = await revalidator.revalidate(entry(last_modified="Mon"))
+        await revalidator.close()
+
+        assert result == CHANGED
+
+    @pytest.mark.asyncio
+    async def test_same_last_modified_with_other_length_is_changed(self):
+        revalidator, _ = make_revalidator()
+        with aioresponses() as mocked:
+            mocked.head(
+                URL,
+                status=200,
+                headers={"Last-Modified": "Mon", "Content-Length": "20"},
+            )
+            result = await revalidator.revalidate(
+                entry(last_modified="Mon", content_length=10)
+            )
+        await revalidator.close()
+
+        assert result == CHANGED
+
+    @pytest.mark.asyncio
+    async def test_errors_are_unknown(self):
+        revalidator, _ = make_revalidator()
+        with aioresponses() as mocked:
+            mocked.head(URL, status=405)
+            result = await revalidator.revalidate(entry(etag='"v1"'))
+        await revalidator.close()
+
+        assert result == UNKNOWN
+
+
+class TestFilterChanged:
+    @pytest.mark.asyncio
+    async def test_only_unchanged_urls_are_skipped(self):
+        other = "https://shop.com/p/2"
+        new = "https://shop.com/p/3"
+        entries = {
+            URL: entry(etag='"v1"'),
+            other: entry(url=other, etag='"v1"'),
+        }
+        revalidator, db = make_revalidator(entries)
+
+        with aioresponses() as mocked:
+            mocked.head(URL, status=304)
+            mocked.head(other, status=200, headers={"ETag": '"v2"'})
+            to_render, unchanged = await revalidator.filter_changed(
+                "shop.com", [URL, other, new]
+            )
+        await revalidator.close()
+
+        assert to_render == [other, new]
+        assert unchanged == [URL]
+        db.batch_get_url_entries.assert_called_once_with("shop.com", [URL, other, new])
+
+    @pytest.mark.asyncio
+    async def test_uses_loaded_entries(self):
+        revalidator, db = make_revalidator({URL: entry(etag='"v1"')})
+        entries = await revalidator.load_entries("shop.com", [URL])
+
+        with aioresponses() as mocked:
+            mocked.head(URL, status=304)
+            _, unchanged = await revalidator.filter_changed("shop.com", [URL], entries)
+        await revalidator.close()
+
+        assert unchanged == [URL]
+        db.batch_get_url_entries.assert_called_once_with("shop.com", [URL])
+
+    @pytest.mark.asyncio
+    async def test_entries_without_hash_are_rendered(self):
+        revalidator, _ = make_revalidator({URL: entry(etag='"v1"', hash=None)})
+
+        with aioresponses():
+            to_render, unchanged = await revalidator.filter_changed("shop.com", [URL])
+
+        assert to_render == [URL]
+        assert unchanged == []
+
+
+class TestRecord:
+    @pytest.mark.asyncio
+    async def test_stores_new_validators(self):
+        revalidator, db = make_revalidator()
+        result = Mock(url=URL, response_headers={"etag": '"v2"'})
+
+        await revalidator.record("shop.com", result)
+
+        db.update_url_validators.assert_called_once_with(
+            "shop.com", URL, '"v2"', None, None
+        )
+
+    @pytest.mark.asyncio
+    async def test_skips_write_for_identical_validators(self):
+        revalidator, db = make_revalidator({URL: entry(etag='"v1"', hash=None)})
+        with aioresponses():
+            await revalidator.filter_changed("shop.com", [URL])
+
+        await revalidator.record(
+            "shop.com", Mock(url=URL, response_headers={"ETag": '"v1"'})
+        )
+
+        db.update_url_validators.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_pages_without_validators_are_not_stored(self):
+        revalidator, db = make_revalidator()
+
+        await revalidator.record("shop.com", Mock(url=URL, response_headers={}))
+
+        db.update_url_validators.assert_not_called()
@@ -0,0 +1,114 @@
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from src.core.scraper import snapshot_store
+from src.core.scraper.snapshot_store import SnapshotStore, content_hash
+from src.core.utils import object_store
+from src.core.utils.object_store import S3Backend
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore.from_uri(str(tmp_path / "snapshots"))
+
+
+def object_keys(store):
+    return store.backend.list("objects")
+
+
+def test_save_and_load_pages(store):
+    written = store.save(
+        "shop.com", ["https://shop.com/1", "https://shop.com/2"], ["# One", "# Two"]
+    )
+
+    assert written == 2
+    assert store.load(content_hash("# One")) == "# One"
+    assert sorted(store.load_pages(), key=lambda p: p["url"]) == [
+        {"url": "https://shop.com/1", "domain": "shop.com", "markdown": "# One"},
+        {"url": "https://shop.com/2", "domain": "shop.com", "markdown": "# Two"},
+    ]
+
+
+def test_identical_markdown_is_stored_once(store):
+    store.save("shop.com", ["https://shop.com/1"], ["# Same"])
+    # A fresh store (e.g. another worker) still finds the existing object
+    again = SnapshotStore(store.backend)
+    written = again.save("shop.com", ["https://shop.com/2"], ["# Same"])
+
+    assert written == 0
+    assert len(object_keys(store)) == 1
+    assert {p["url"] for p in store.load_pages()} == {
+        "https://shop.com/1",
+        "https://shop.com/2",
+    }
+
+
+def test_latest_snapshot_of_a_url_wins(store):
+    store.save("shop.com", ["https://shop.com/1"], ["# Old"])
+    store.save("shop.com", ["https://shop.com/1"], ["# New"])
+
+    assert store.load_pages() == [
+        {"url": "https://shop.com/1", "domain": "shop.com", "markdown": "# New"}
+    ]
+
+
+def test_load_pages_filters_domains(store):
+    store.save("a.com", ["https://a.com/1"], ["# A"])
+    store.save("b.com", ["https://b.com/1"], ["# B"])
+
+    assert store.domains() == ["a.com", "b.com"]
+    assert [p["url"] for p in store.load_pages(["b.com"])] == ["https://b.com/1"]
+
+
+def test_gzip_is_used_without_zstandard(store):
+    with patch.object(snapshot_store, "zstandard", None):
+        store.save("shop.com", ["https://shop.com/1"], ["# Gzip"])
+        (key,) = object_keys(store)
+
+        assert key.endswith(".md.gz")
+        assert gzip.decompress(store.backend.get(key)) == b"# Gzip"
+        assert store.load(content_hash("# Gzip")) == "# Gzip"
+
+
+@pytest.mark.asyncio
+async def test_save_async_logs_failures(store):
+    with patch.object(store.backend, "put", side_effect=OSError("disk full")):
+        assert await store.save_async("shop.com", ["u"], ["# x"]) == 0
+
+
+def test_s3_backend_keys_are_prefixed():
+    objects = {}
+
+    class FakeS3:
+        def __init__(self, bucket_name):
+            pass
+
+        def object_exists(self, key):
+            return key in objects
+
+        def upload_bytes(self, key, data):
+            objects[key] = data
+
+        def download_bytes_if_changed(self, key, etag=None):
+            return objects.get(key), None, True
+
+        def list_objects(self, prefix=""):
+            return [k for k in objects if k.startswith(prefix)]
+
+    with patch.object(object_store, "S3Operations", FakeS3):
+        store = SnapshotStore.from_uri("s3://bucket/snapshots/")
+        assert isinstance(store.backend, S3Backend)
+        store.save("shop.com", ["https://shop.com/1"], ["# S3"])
+
+    assert all(key.startswith("snapshots/") for key in objects)
+    assert store.load_pages() == [
+        {"url": "https://shop.com/1", "domain": "shop.com", "markdown": "# S3"}
+    ]
+
+    # Prefix listings must not mix up shop.com and shop.com.au
+    with patch.object(object_store, "S3Operations", FakeS3):
+        store.save("shop.com.au", ["https://shop.com.au/1"], ["# AU"])
+    assert store.domains() == ["shop.com", "shop.com.au"]
+    assert [p["url"] for p in store.load_pages(["shop.com"])] == ["https://shop.com/1"]
@@ -0,0 +1,187 @@
+import pytest
+
+from src.core.scraper.schemas.extracted_product import (
+    ExtractedProduct,
+    LocalizedText,
+)
+from src.core.scraper.structured_data import (
+    _amount_in_cents,
+    extract_structured_data,
+    fill_gaps,
+    find_products,
+    is_product_page,
+    page_product,
+    product_fields,
+    product_from_fields,
+)
+
+URL = "https://shop.com/p/1"
+
+JSON_LD_GRAPH = """
+<html><head><script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "WebSite", "name": "Shop"},
+  {"@type": ["Product", "Thing"], "name": "Vase",
+   "offers": {"@type": "Offer", "price": "12.50", "priceCurrency": "EUR"}}
+]}
+</script></head><body></body></html>
+"""
+
+MICRODATA = """
+<html><body><div itemscope itemtype="https://schema.org/Product">
+  <span itemprop="name">Chair</span>
+  <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+    <meta itemprop="price" content="99.00">
+  </div>
+</div></body></html>
+"""
+
+OPENGRAPH = """
+<html prefix="og: http://ogp.me/ns#"><head>
+<meta property="og:type" content="product" />
+<meta property="og:title" content="Lamp" />
+</head><body></body></html>
+"""
+
+ORGANIZATION_ONLY = """
+<html><head><script type="application/ld+json">
+{"@context": "https://schema.org", "@type": "Organization", "name": "Shop"}
+</script></head><body></body></html>
+"""
+
+
+def test_find_products_flattens_graph_and_type_lists():
+    products = find_products(extract_structured_data(JSON_LD_GRAPH, URL))
+    assert [p["name"] for p in products] == ["Vase"]
+
+
+@pytest.mark.parametrize("html", [JSON_LD_GRAPH, MICRODATA, OPENGRAPH])
+def test_is_product_page_detects_product_markup(html):
+    assert is_product_page(html, URL) is True
+
+
+@pytest.mark.parametrize("html", [ORGANIZATION_ONLY, "<html></html>", "", "<<<"])
+def test_is_product_page_is_undecided_without_product_markup(html):
+    assert is_product_page(html, URL) is None
+
+
+def test_product_fields_map_json_ld_offer():
+    html = JSON_LD_GRAPH.replace(
+        '"name": "Vase",',
+        '"name": "Vase", "sku": "V-1", "image": ["/v.jpg", {"url": "https://cdn.com/v2.png"}],',
+    ).replace(
+        '"priceCurrency": "EUR"',
+        '"priceCurrency": "EUR", "availability": "https://schema.org/SoldOut"',
+    )
+    html = html.replace("<html>", '<html lang="en-GB">')
+
+    fields = product_fields(html, URL)
+
+    assert fields == {
+        "is_product": True,
+        "shopsProductId": "V-1",
+        "title": {"text": "Vase", "language": "en"},
+        "price": {"amount": 1250, "currency": "EUR"},
+        "state": "SOLD",
+        "images": ["https://shop.com/v.jpg", "https://cdn.com/v2.png"],
+    }
+    product = product_from_fields(fields)
+    assert product.shopsProductId == "V-1"
+    assert product.price.amount == 1250
+
+
+def json_ld(*items):
+    blocks = "".join(
+        f'<script type="application/ld+json">{item}</script>' for item in items
+    )
+    return f"<html><head>{blocks}</head><body></body></html>"
+
+
+ITEM_LIST = """{"@context": "https://schema.org", "@type": "ItemList",
+ "itemListElement": [
+   {"@type": "ListItem", "item": {"@type": "Product", "name": "A", "sku": "A"}},
+   {"@type": "ListItem", "item": {"@type": "Product", "name": "B", "sku": "B"}}
+ ]}"""
+
+
+def product_json(name, url=None):
+    link = f', "url": "{url}"' if url else ""
+    return f'{{"@context": "https://schema.org", "@type": "Product", "name": "{name}"{link}}}'
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        json_ld(ITEM_LIST),
+        json_ld(product_json("A"), product_json("B")),
+        json_ld(product_json("Other", "https://shop.com/p/2")),
+    ],
+    ids=["item-list", "several-products", "other-page"],
+)
+def test_no_page_product_on_listing_or_foreign_markup(html):
+    assert page_product(extract_structured_data(html, URL), URL) is None
+    assert product_fields(html, URL) == {}
+    assert is_product_page(html, URL) is None
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        # Related products next to the page's product
+        json_ld(
+            product_json("Vase"),
+            product_json("Related", "https://shop.com/p/2"),
+        ),
+        # Several products, one of them is this page's
+        json_ld(product_json("Other"), product_json("Vase", "/p/1/")),
+        json_ld(ITEM_LIST, product_json("Vase", "https://shop.com/p/1#product")),
+    ],
+)
+def test_page_product_is_the_one_naming_the_page(html):
+    node = page_product(extract_structured_data(html, URL), URL)
+
+    assert node["name"] == "Vase"
+
+
+@pytest.mark.parametrize(
+    "value,cents",
+    [
+        ("12.50", 1250),
+        (12.5, 1250),
+        ("1.234,50", 123450),
+        ("1,234.50", 123450),
+        ("abc", None),
+    ],
+)
+def test_amount_in_cents(value, cents):
+    assert _amount_in_cents(value) == cents
+
+
+def test_product_from_fields_requires_core_fields():
+    # Microdata without sku, language or availability is left to the LLM
+    fields = product_fields(MICRODATA, URL)
+    assert fields["is_product"] is True
+    assert product_from_fields(fields) is None
+    assert product_fields(ORGANIZATION_ONLY, URL) == {}
+
+
+def test_fill_gaps_keeps_llm_values():
+    llm = ExtractedProduct(
+        is_product=True,
+        shopsProductId="LLM-1",
+        title=LocalizedText(text="Vase", language="de"),
+        state="UNKNOWN",
+    )
+    fields = {
+        "is_product": True,
+        "shopsProductId": "V-1",
+        "price": {"amount": 1250, "currency": "EUR"},
+        "images": ["https://shop.com/v.jpg"],
+    }
+
+    filled = fill_gaps(llm, fields)
+
+    assert filled.shopsProductId == "LLM-1"
+    assert filled.price.amount == 1250
+    assert [str(i) for i in filled.images] == ["https://shop.com/v.jpg"]
+    assert fill_gaps(llm, {}) is llm
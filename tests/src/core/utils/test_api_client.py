@@ -2,6 +2,10 @@ import os
 from unittest.mock import patch
 import importlib
 
+import httpx
+import pytest
+from aiohttp import web
+
 
 def test_api_client_initialization():
     with patch.dict(
@@ -21,3 +25,68 @@ def test_api_client_missing_base_url():
 
         importlib.reload(api_client)
         assert api_client.api_client is None
+
+
+def test_factory_configures_pooled_client():
+    from src.core.utils.api_client import ApiClientFactory
+
+    factory = ApiClientFactory(
+        "https://api.test.com", "secret", timeout=10, connect_timeout=2
+    )
+    client = factory.client()
+    http = client.get_async_httpx_client()
+
+    assert factory.client() is client
+    assert http.headers["X-API-Key"] == "secret"
+    assert http.timeout == httpx.Timeout(10, connect=2)
+    assert client.get_httpx_client().headers["X-API-Key"] == "secret"
+
+
+def test_factory_without_api_key_or_h2():
+    from src.core.utils.api_client import ApiClientFactory
+
+    with patch("importlib.util.find_spec", return_value=None):
+        factory = ApiClientFactory("https://api.test.com", None, http2=True)
+
+    assert factory.http2 is False
+    assert "X-API-Key" not in factory.client().get_async_httpx_client().headers
+    assert ApiClientFactory(None).client() is None
+
+
+@pytest.mark.asyncio
+async def test_factory_reuses_connections():
+    from src.core.utils.api_client import ApiClientFactory
+
+    async def ok(request):
+        return web.json_response({"key": request.headers.get("X-API-Key")})
+
+    app = web.Application()
+    app.router.add_get("/ping", ok)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    try:
+        factory = ApiClientFactory(f"http://127.0.0.1:{port}", "k", http2=False)
+        http = factory.client().get_async_httpx_client()
+        for _ in range(3):
+            response = await http.get("/ping")
+            assert response.json() == {"key": "k"}
+
+        assert factory.stats() == {
+            "requests": 3,
+            "connections": 1,
+            "tls_handshakes": 0,
+            "reuse_ratio": 0.667,
+        }
+
+        # Closing keeps the API client usable with a fresh pool
+        await factory.aclose()
+        response = await factory.client().get_async_httpx_client().get("/ping")
+        assert response.status_code == 200
+        assert factory.stats()["connections"] == 2
+        await factory.aclose()
+    finally:
+        await runner.cleanup()
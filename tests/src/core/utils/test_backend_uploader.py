@@ -0,0 +1,305 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from aura_historia_backend_api_client.client import Client
+from aura_historia_backend_api_client.models import (
+    ApiError,
+    LanguageData,
+    LocalizedTextData,
+    ProductStateData,
+    PutProductData,
+    PutProductsResponse,
+)
+from src.core.utils import backend_uploader
+from src.core.utils.backend_uploader import (
+    BackendUploader,
+    DeadLetterStore,
+    encode_batch,
+    encode_product,
+    send_products,
+)
+
+
+def product(i: int) -> PutProductData:
+    return PutProductData(
+        shops_product_id=f"P-{i}",
+        title=LocalizedTextData(text=f"Product {i}", language=LanguageData("en")),
+        state=ProductStateData("AVAILABLE"),
+        url=f"https://shop.com/{i}",
+    )
+
+
+class FakeBackend:
+    """Records batches; answers with queued responses, then success."""
+
+    def __init__(self, *responses, delay: float = 0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, body):
+        self.batches.append([i["shopsProductId"] for i in json.loads(body)["items"]])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            response = self.responses.pop(0) if self.responses else None
+            if isinstance(response, Exception):
+                raise response
+            return response or PutProductsResponse(skipped=0)
+        finally:
+            self.in_flight -= 1
+
+
+def uploader(send, **kwargs) -> BackendUploader:
+    kwargs.setdefault("max_age", 0)
+    kwargs.setdefault("base_delay", 0)
+    return BackendUploader(send=send, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_flushes_by_count_and_on_close():
+    send = FakeBackend()
+    async with uploader(send, batch_size=2) as up:
+        for i in range(5):
+            await up.add(product(i))
+
+    assert send.batches == [["P-0", "P-1"], ["P-2", "P-3"], ["P-4"]]
+    assert up.sent == 5
+
+
+@pytest.mark.asyncio
+async def test_flushes_by_size():
+    send = FakeBackend()
+    async with uploader(send, batch_size=100, max_bytes=1) as up:
+        await up.add(product(0))
+        await up.add(product(1))
+
+    assert send.batches == [["P-0"], ["P-1"]]
+
+
+@pytest.mark.asyncio
+async def test_flushes_by_age():
+    send = FakeBackend()
+    async with uploader(send, batch_size=100, max_age=0.02) as up:
+        await up.add(product(0))
+        await asyncio.sleep(0.1)
+        # Sent by the timer, before the uploader is closed
+        assert send.batches == [["P-0"]]
+
+
+@pytest.mark.asyncio
+async def test_uploads_run_concurrently_up_to_the_limit():
+    send = FakeBackend(delay=0.02)
+    async with uploader(send, batch_size=1, concurrency=2) as up:
+        for i in range(6):
+            await up.add(product(i))
+
+    assert len(send.batches) == 6
+    assert send.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    error = ApiError(status=500, title="Internal Server Error", error="INTERNAL")
+    send = FakeBackend(httpx.ConnectError("refused"), error)
+    async with uploader(send, batch_size=2) as up:
+        await up.add(product(0))
+        await up.add(product(1))
+
+    assert len(send.batches) == 3
+    assert up.sent == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [401, 404, 413, 422])
+async def test_permanent_client_errors_are_not_retried(status):
+    error = ApiError(status=status, title="Client Error", error="REJECTED")
+    send = FakeBackend(error)
+    async with uploader(send, batch_size=1) as up:
+        await up.add(product(0))
+
+    assert len(send.batches) == 1
+    assert up.sent == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [408, 429, 502, 503])
+async def test_throttling_and_server_errors_are_retried(status):
+    error = ApiError(status=status, title="Try Again", error="UNAVAILABLE")
+    send = FakeBackend(error)
+    async with uploader(send, batch_size=1) as up:
+        await up.add(product(0))
+
+    assert len(send.batches) == 2
+    assert up.sent == 1
+
+
+@pytest.mark.asyncio
+async def test_only_unprocessed_products_are_retried():
+    send = FakeBackend(
+        PutProductsResponse(skipped=0, unprocessed=["https://shop.com/1"])
+    )
+    async with uploader(send, batch_size=2) as up:
+        await up.add(product(0))
+        await up.add(product(1))
+
+    assert send.batches == [["P-0", "P-1"], ["P-1"]]
+
+
+@pytest.mark.asyncio
+async def test_on_sent_gets_the_urls_that_were_not_dead_lettered():
+    sent_urls = []
+
+    async def on_sent(urls):
+        sent_urls.extend(urls)
+
+    send = FakeBackend(
+        PutProductsResponse(skipped=0, unprocessed=["https://shop.com/1"])
+    )
+    async with uploader(send, batch_size=2, max_attempts=1, on_sent=on_sent) as up:
+        await up.add(product(0))
+        await up.add(product(1))
+
+    assert sent_urls == ["https://shop.com/0"]
+
+
+@pytest.mark.asyncio
+async def test_rejected_products_are_dead_lettered_not_reported_as_sent(tmp_path):
+    dead_letter = DeadLetterStore.from_uri(str(tmp_path))
+    sent_urls = []
+
+    async def on_sent(urls):
+        sent_urls.extend(urls)
+
+    send = FakeBackend(
+        PutProductsResponse.from_dict(
+            {"skipped": 0, "failed": {"https://shop.com/1": "MONETARY_AMOUNT_OVERFLOW"}}
+        )
+    )
+    async with uploader(
+        send, batch_size=2, dead_letter=dead_letter, on_sent=on_sent
+    ) as up:
+        await up.add(product(0))
+        await up.add(product(1))
+
+    # A rejection is permanent, so it is not retried
+    assert send.batches == [["P-0", "P-1"]]
+    assert up.sent == 1
+    assert sent_urls == ["https://shop.com/0"]
+    assert up.dead_lettered == 1
+    (restored,) = dead_letter.get(dead_letter.keys()[0])
+    assert restored[0] == "https://shop.com/1"
+
+
+@pytest.mark.asyncio
+async def test_persistent_failures_are_dead_lettered_and_replayed(tmp_path):
+    dead_letter = DeadLetterStore.from_uri(str(tmp_path))
+    bad_request = ApiError(status=400, title="Bad Request", error="BAD_PARAMETER")
+    down = FakeBackend(bad_request, *[httpx.ConnectError("refused")] * 3)
+
+    async with uploader(
+        down, batch_size=2, max_attempts=3, dead_letter=dead_letter
+    ) as up:
+        for i in range(4):
+            await up.add(product(i))
+
+    # The 400 is not retried, the connection errors are
+    assert len(down.batches) == 4
+    assert up.sent == 0
+    assert up.dead_lettered == 4
+    assert len(dead_letter.keys()) == 2
+
+    up = uploader(FakeBackend(), dead_letter=dead_letter)
+    assert await up.replay_dead_letters() == 4
+    assert dead_letter.keys() == []
+
+
+@pytest.mark.asyncio
+async def test_failed_replays_stay_in_the_dead_letter_store(tmp_path):
+    dead_letter = DeadLetterStore.from_uri(str(tmp_path))
+    dead_letter.put([encode_product(product(0))], "boom")
+
+    up = uploader(FakeBackend(httpx.ConnectError("refused")), max_attempts=1)
+    up.dead_letter = dead_letter
+
+    assert await up.replay_dead_letters() == 0
+    assert len(dead_letter.keys()) == 1
+    (restored,) = dead_letter.get(dead_letter.keys()[0])
+    assert restored[0] == "https://shop.com/0"
+    assert json.loads(restored[1]) == product(0).to_dict()
+
+
+def test_encode_batch_is_the_put_products_body():
+    wire = product(0).to_dict()
+    wire["title"]["text"] = 'Vase "Ära" / 1900'
+    body = encode_batch([encode_product(wire), encode_product(product(1))])
+
+    assert json.loads(body) == {"items": [wire, product(1).to_dict()]}
+    assert "Ära".encode("utf-8") in body
+
+
+@pytest.mark.asyncio
+async def test_send_products_puts_the_encoded_body(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"skipped": 1, "unprocessed": ["u"]})
+
+    client = Client(base_url="https://backend.test")
+    client.set_async_httpx_client(
+        httpx.AsyncClient(
+            base_url="https://backend.test", transport=httpx.MockTransport(handler)
+        )
+    )
+    monkeypatch.setattr(backend_uploader, "api_client", client)
+    body = encode_batch([encode_product(product(0))])
+
+    response = await send_products(body)
+
+    assert isinstance(response, PutProductsResponse)
+    assert response.unprocessed == ["u"]
+    (request,) = requests
+    assert request.method == "PUT"
+    assert request.url.path == "/api/v1/products"
+    assert request.content == body
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status, content, error",
+    [
+        (404, b"<html>Not Found</html>", "UNEXPECTED_RESPONSE"),
+        (503, b"", "UNEXPECTED_RESPONSE"),
+        (
+            422,
+            b'{"status": 400, "title": "Unprocessable", "error": "BAD_PARAMETER"}',
+            "BAD_PARAMETER",
+        ),
+    ],
+)
+async def test_send_products_returns_every_failure_as_api_error(
+    monkeypatch, status, content, error
+):
+    def handler(request):
+        return httpx.Response(status, content=content)
+
+    client = Client(base_url="https://backend.test")
+    client.set_async_httpx_client(
+        httpx.AsyncClient(
+            base_url="https://backend.test", transport=httpx.MockTransport(handler)
+        )
+    )
+    monkeypatch.setattr(backend_uploader, "api_client", client)
+
+    response = await send_products(encode_batch([encode_product(product(0))]))
+
+    assert isinstance(response, ApiError)
+    assert response.status == status
+    assert response.error == error
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.core.utils.browser_pool import BrowserPool, PooledBrowser, browser_memory_mb
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+
+class FakeBrowserManager:
+    def __init__(self):
+        self.browser = FakeBrowser()
+        self.contexts_by_config = {}
+
+
+class FakeStrategy:
+    def __init__(self):
+        self.browser_manager = FakeBrowserManager()
+        self.hooks = {}
+
+    def set_hook(self, hook_type, hook):
+        self.hooks[hook_type] = hook
+
+    async def render_page(self):
+        await self.hooks["on_page_context_created"]("page", context=None)
+
+
+class FakeCrawler:
+    def __init__(self, config=None):
+        self.config = config
+        self.crawler_strategy = FakeStrategy()
+        self.ready = False
+        self.closed = False
+
+    async def start(self):
+        self.ready = True
+
+    async def close(self):
+        self.ready = False
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory(config):
+        created.append(FakeCrawler(config))
+        return created[-1]
+
+    kwargs.setdefault("memory_probe", lambda browser: 0.0)
+    pool = BrowserPool(browser_config=None, crawler_factory=factory, **kwargs)
+    return pool, created
+
+
+@pytest.mark.asyncio
+async def test_browser_is_reused_across_leases():
+    pool, created = make_pool()
+
+    async with pool.lease() as first:
+        assert first.ready
+    async with pool.lease() as second:
+        pass
+
+    assert first is second
+    assert len(created) == 1
+    assert not first.closed
+
+
+@pytest.mark.asyncio
+async def test_contexts_are_closed_between_leases():
+    pool, _ = make_pool()
+
+    async with pool.lease() as crawler:
+        context = FakeContext()
+        crawler.crawler_strategy.browser_manager.contexts_by_config["sig"] = context
+
+    assert context.closed
+    assert crawler.crawler_strategy.browser_manager.contexts_by_config == {}
+
+
+@pytest.mark.asyncio
+async def test_browser_is_recycled_after_page_limit():
+    pool, created = make_pool(max_pages=2)
+
+    async with pool.lease() as crawler:
+        await crawler.crawler_strategy.render_page()
+        await crawler.crawler_strategy.render_page()
+
+    assert crawler.closed
+    async with pool.lease() as replacement:
+        assert replacement is not crawler
+    assert len(created) == 2
+
+
+@pytest.mark.asyncio
+async def test_browser_is_recycled_above_memory_threshold():
+    pool, _ = make_pool(max_memory_mb=100, memory_probe=lambda browser: 500.0)
+
+    async with pool.lease() as crawler:
+        pass
+
+    assert crawler.closed
+
+
+@pytest.mark.asyncio
+async def test_memory_is_checked_per_browser():
+    heavy = []
+    pool, created = make_pool(
+        size=2,
+        max_memory_mb=100,
+        memory_probe=lambda browser: 500.0 if browser.crawler in heavy else 50.0,
+    )
+
+    async with pool.lease() as first, pool.lease() as second:
+        heavy.append(second)
+
+    assert not first.closed
+    assert second.closed
+
+
+def test_browser_memory_covers_only_its_process_tree():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        own = browser_memory_mb(PooledBrowser(crawler=None, pids={os.getpid()}))
+        other = browser_memory_mb(PooledBrowser(crawler=None, pids={child.pid}))
+    finally:
+        child.kill()
+        child.wait()
+
+    # The tree of this process includes the child
+    assert own > other > 0
+    assert browser_memory_mb(PooledBrowser(crawler=None)) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_disconnected_browser_is_replaced_on_lease():
+    pool, created = make_pool()
+
+    async with pool.lease() as crawler:
+        pass
+    crawler.crawler_strategy.browser_manager.browser.connected = False
+
+    async with pool.lease() as replacement:
+        assert replacement is not crawler
+    assert crawler.closed
+    assert len(created) == 2
+
+
+@pytest.mark.asyncio
+async def test_leases_wait_when_pool_is_exhausted():
+    pool, created = make_pool(size=1)
+    order = []
+
+    async def job(name):
+        async with pool.lease():
+            order.append(f"{name}-start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}-end")
+
+    await asyncio.gather(job("a"), job("b"))
+
+    assert order == ["a-start", "a-end", "b-start", "b-end"]
+    assert len(created) == 1
+
+
+@pytest.mark.asyncio
+async def test_close_shuts_down_idle_browsers():
+    pool, _ = make_pool()
+
+    async with pool.lease() as crawler:
+        pass
+    await pool.close()
+
+    assert crawler.closed
+    with pytest.raises(RuntimeError):
+        async with pool.lease():
+            pass
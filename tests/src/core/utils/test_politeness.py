@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.core.utils.politeness import PolitenessScheduler, parse_crawl_delay
+
+
+def make_scheduler(**kwargs) -> PolitenessScheduler:
+    kwargs.setdefault("respect_crawl_delay", False)
+    return PolitenessScheduler(**kwargs)
+
+
+def test_parse_crawl_delay():
+    robots = "User-agent: *\nCrawl-delay: 5\nDisallow: /cart\n"
+    assert parse_crawl_delay(robots) == 5.0
+
+
+def test_parse_crawl_delay_missing():
+    assert parse_crawl_delay("User-agent: *\nDisallow:\n") is None
+
+
+@pytest.mark.asyncio
+async def test_burst_is_served_without_waiting():
+    scheduler = make_scheduler(requests_per_second=1.0, burst=3)
+
+    start = time.monotonic()
+    for _ in range(3):
+        await scheduler.wait_if_needed("https://shop.com/p")
+
+    assert time.monotonic() - start < 0.1
+
+
+@pytest.mark.asyncio
+async def test_empty_bucket_waits_for_refill():
+    scheduler = make_scheduler(requests_per_second=20.0, burst=1)
+
+    await scheduler.wait_if_needed("https://shop.com/1")
+    start = time.monotonic()
+    await scheduler.wait_if_needed("https://shop.com/2")
+
+    assert time.monotonic() - start >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_hosts_have_independent_buckets():
+    scheduler = make_scheduler(requests_per_second=0.1, burst=1)
+
+    await scheduler.wait_if_needed("https://a.com/")
+    start = time.monotonic()
+    await scheduler.wait_if_needed("https://b.com/")
+
+    assert time.monotonic() - start < 0.1
+
+
+def test_crawl_delay_lowers_rate():
+    scheduler = make_scheduler(requests_per_second=2.0, burst=4)
+
+    scheduler.set_crawl_delay("shop.com", 10)
+
+    state = scheduler.hosts["shop.com"]
+    assert state.rate == pytest.approx(0.1)
+    assert state.capacity == 1.0
+
+
+@pytest.mark.asyncio
+async def test_crawl_delay_is_loaded_once_per_host():
+    scheduler = make_scheduler(respect_crawl_delay=True, burst=5)
+
+    with patch.object(
+        scheduler, "_load_crawl_delay", new_callable=AsyncMock
+    ) as mock_load:
+        mock_load.side_effect = lambda url, host: scheduler.set_crawl_delay(host, None)
+        await scheduler.wait_if_needed("https://shop.com/1")
+        await scheduler.wait_if_needed("https://shop.com/2")
+
+    mock_load.assert_awaited_once()
+
+
+def test_rate_limit_status_backs_off():
+    scheduler = make_scheduler(requests_per_second=1.0, max_retries=2)
+
+    assert scheduler.update_delay("https://shop.com/p", 429) is True
+    state = scheduler.hosts["shop.com"]
+    first_delay = state.backoff_delay
+    assert state.backoff_until > time.monotonic()
+    assert state.tokens == 0.0
+
+    assert scheduler.update_delay("https://shop.com/p", 503) is True
+    assert state.backoff_delay > first_delay
+
+    assert scheduler.update_delay("https://shop.com/p", 429) is False
+
+
+def test_success_resets_failures():
+    scheduler = make_scheduler()
+
+    scheduler.update_delay("https://shop.com/p", 429)
+    scheduler.update_delay("https://shop.com/p", 200)
+
+    assert scheduler.hosts["shop.com"].fail_count == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_counts_waiters():
+    scheduler = make_scheduler(requests_per_second=10.0, burst=1)
+
+    tasks = [
+        asyncio.create_task(scheduler.wait_if_needed(f"https://shop.com/{i}"))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    assert scheduler.queue_depth("shop.com") == 2
+    assert scheduler.queue_depths() == {"shop.com": 2}
+
+    await asyncio.gather(*tasks)
+    assert scheduler.queue_depth("shop.com") == 0
@@ -0,0 +1,86 @@
+from unittest.mock import Mock
+
+import pytest
+
+from src.core.aws.database.models import URLEntry
+from src.core.utils.product_fingerprints import ProductFingerprints
+
+
+def product(i: int, price: int = 1000) -> dict:
+    return {
+        "shopsProductId": f"P-{i}",
+        "title": {"text": f"Product {i}", "language": "en"},
+        "state": "AVAILABLE",
+        "url": f"https://shop.com/{i}",
+        "price": {"amount": price, "currency": "EUR"},
+    }
+
+
+def make_db(entries=None) -> Mock:
+    db = Mock()
+    db.batch_get_url_entries = Mock(return_value=entries or {})
+    return db
+
+
+def stored(p: dict) -> URLEntry:
+    return URLEntry(
+        domain="shop.com",
+        url=p["url"],
+        product_fingerprint=URLEntry.calculate_product_fingerprint(p),
+    )
+
+
+@pytest.mark.asyncio
+async def test_unchanged_products_are_skipped():
+    db = make_db(
+        {
+            "https://shop.com/0": stored(product(0)),
+            "https://shop.com/1": stored(product(1, price=900)),
+        }
+    )
+    fingerprints = ProductFingerprints(db)
+
+    changed = await fingerprints.filter_changed(
+        "shop.com", [product(0), product(1), product(2)]
+    )
+
+    assert changed == [product(1), product(2)]
+    assert fingerprints.skipped == 1
+    db.batch_get_url_entries.assert_called_once_with(
+        "shop.com", ["https://shop.com/0", "https://shop.com/1", "https://shop.com/2"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_fingerprints_are_recorded_only_for_sent_products():
+    db = make_db()
+    fingerprints = ProductFingerprints(db)
+    await fingerprints.filter_changed("shop.com", [product(0), product(1)])
+
+    await fingerprints.record("shop.com", ["https://shop.com/1"])
+
+    db.update_product_fingerprint.assert_called_once_with(
+        "shop.com",
+        "https://shop.com/1",
+        URLEntry.calculate_product_fingerprint(product(1)),
+    )
+
+
+@pytest.mark.asyncio
+async def test_lookup_errors_keep_every_product():
+    db = make_db()
+    db.batch_get_url_entries.side_effect = RuntimeError("throttled")
+
+    changed = await ProductFingerprints(db).filter_changed("shop.com", [product(0)])
+
+    assert changed == [product(0)]
+
+
+@pytest.mark.asyncio
+async def test_write_errors_are_logged():
+    db = make_db()
+    db.update_product_fingerprint.side_effect = RuntimeError("throttled")
+    fingerprints = ProductFingerprints(db)
+    await fingerprints.filter_changed("shop.com", [product(0)])
+
+    await fingerprints.record("shop.com", ["https://shop.com/0"])
@@ -57,3 +57,13 @@ def test_crawl_dispatcher_settings():
     )
     assert hasattr(dispatcher, "rate_limiter")
     assert getattr(dispatcher, "rate_limiter") is not None
+
+
+def test_crawl_dispatchers_share_politeness_scheduler():
+    """Every dispatcher uses the same process-wide rate limiter."""
+    first = configs.crawl_dispatcher()
+    second = configs.crawl_dispatcher()
+
+    assert first is not second
+    assert first.rate_limiter is second.rate_limiter
+    assert first.rate_limiter is configs.politeness_scheduler
@@ -0,0 +1,249 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.core.scraper.schemas.extracted_product import ExtractedProduct
+from src.core.scraper.snapshot_store import SnapshotStore
+from src.core.utils import backend_uploader
+from src.core.worker import bulk_extractor
+from src.core.worker.bulk_extractor import (
+    collect_batch,
+    prepare_batch,
+    read_jsonl,
+    reextract,
+    replay,
+    run_offline,
+    schedule_by_length,
+    write_jsonl,
+)
+
+PRODUCT = {
+    "is_product": True,
+    "shopsProductId": "A-1",
+    "title": {"text": "Jugendstil Vase", "language": "de"},
+    "price": {"amount": 12000, "currency": "EUR"},
+    "state": "AVAILABLE",
+}
+
+
+class FakeEngine:
+    """Answers every conversation with the same product JSON."""
+
+    def __init__(self, answer=json.dumps(PRODUCT)):
+        self.answer = answer
+        self.batches = []
+
+    def generate(self, conversations):
+        self.batches.append(conversations)
+        return [self.answer for _ in conversations]
+
+
+@pytest.fixture
+def pages(tmp_path):
+    path = tmp_path / "pages.jsonl"
+    write_jsonl(
+        str(path),
+        [
+            {"url": "https://a.com/1", "domain": "a.com", "markdown": "short"},
+            {"url": "https://a.com/2", "domain": "a.com", "markdown": "x" * 50},
+            {"url": "https://b.com/1", "domain": "b.com", "markdown": "medium text"},
+            {"url": "https://b.com/2", "domain": "b.com", "markdown": ""},
+        ],
+    )
+    return str(path)
+
+
+def test_schedule_by_length_batches_longest_first():
+    records = [{"markdown": "x" * n} for n in (3, 10, 1, 7, 5)]
+
+    batches = list(schedule_by_length(records, 2))
+
+    assert [[len(r["markdown"]) for r in b] for b in batches] == [[10, 7], [5, 3], [1]]
+
+
+def test_jsonl_roundtrip_through_s3():
+    stored = {}
+
+    class FakeS3:
+        def __init__(self, bucket_name):
+            self.bucket_name = bucket_name
+
+        def upload_bytes(self, key, data, content_type=None):
+            stored[(self.bucket_name, key)] = data
+
+        def download_bytes_if_changed(self, key, etag=None):
+            return stored[(self.bucket_name, key)], "etag", True
+
+    with patch.object(bulk_extractor, "S3Operations", FakeS3):
+        write_jsonl("s3://bucket/runs/pages.jsonl", [{"url": "u", "markdown": "ä"}])
+        assert read_jsonl("s3://bucket/runs/pages.jsonl") == [
+            {"url": "u", "markdown": "ä"}
+        ]
+    assert ("bucket", "runs/pages.jsonl") in stored
+
+
+@pytest.mark.asyncio
+async def test_run_offline_writes_one_result_per_page(pages, tmp_path):
+    engine = FakeEngine()
+    target = str(tmp_path / "results.jsonl")
+
+    results = await run_offline(pages, target, batch_size=2, engine=engine, clean=False)
+
+    # Empty pages are skipped, the rest is batched by length
+    assert [len(b) for b in engine.batches] == [2, 1]
+    assert "x" * 50 in engine.batches[0][0][1]["content"]
+    assert engine.batches[0][0][0]["role"] == "system"
+    assert {r["url"] for r in results} == {
+        "https://a.com/1",
+        "https://a.com/2",
+        "https://b.com/1",
+    }
+    assert all(r["product"]["shopsProductId"] == "A-1" for r in results)
+    assert all(r["error"] is None for r in results)
+    assert read_jsonl(target) == results
+
+
+@pytest.mark.asyncio
+async def test_run_offline_records_undecodable_answers_and_failed_batches(
+    pages, tmp_path
+):
+    engine = FakeEngine(answer="not json")
+    results = await run_offline(
+        pages, str(tmp_path / "out.jsonl"), engine=engine, clean=False
+    )
+    assert all(r["product"] is None and r["error"] for r in results)
+
+    class BrokenEngine:
+        def generate(self, conversations):
+            raise RuntimeError("CUDA out of memory")
+
+    results = await run_offline(
+        pages, str(tmp_path / "out.jsonl"), engine=BrokenEngine(), clean=False
+    )
+    assert all(r["error"] == "CUDA out of memory" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_run_offline_cleans_per_domain(pages, tmp_path):
+    with (
+        patch.object(
+            bulk_extractor.boilerplate_remover,
+            "load_for_shop",
+            AsyncMock(return_value=[]),
+        ) as load_for_shop,
+        patch.object(
+            bulk_extractor.cleaning_executor,
+            "clean_many",
+            AsyncMock(
+                side_effect=lambda domain, mds, matcher: [f"clean {domain}"] * len(mds)
+            ),
+        ),
+    ):
+        engine = FakeEngine()
+        await run_offline(pages, str(tmp_path / "out.jsonl"), engine=engine)
+
+    assert {c.args[0] for c in load_for_shop.await_args_list} == {"a.com", "b.com"}
+    prompts = [conv[1]["content"] for batch in engine.batches for conv in batch]
+    assert sum("clean a.com" in p for p in prompts) == 2
+    assert sum("clean b.com" in p for p in prompts) == 1
+
+
+@pytest.mark.asyncio
+async def test_reextract_runs_snapshots_without_cleaning(tmp_path):
+    store = str(tmp_path / "snapshots")
+    SnapshotStore.from_uri(store).save(
+        "a.com", ["https://a.com/1", "https://a.com/2"], ["# Cleaned 1", "# Long 2"]
+    )
+    SnapshotStore.from_uri(store).save("b.com", ["https://b.com/1"], ["# B"])
+
+    engine = FakeEngine()
+    results = await reextract(
+        store, str(tmp_path / "out.jsonl"), domains=["a.com"], engine=engine
+    )
+
+    prompts = [conv[1]["content"] for conv in engine.batches[0]]
+    assert any("# Cleaned 1" in p for p in prompts)
+    assert {r["url"] for r in results} == {"https://a.com/1", "https://a.com/2"}
+
+    product = ExtractedProduct.model_validate(PRODUCT)
+    with patch.object(
+        bulk_extractor, "extract", AsyncMock(side_effect=[product, RuntimeError("x")])
+    ) as mock_extract:
+        results = await reextract(
+            store, str(tmp_path / "out.jsonl"), domains=["a.com"], online=True
+        )
+
+    # Longest page first, sent without a second cleaning pass
+    assert mock_extract.await_args_list[0].args == ("# Cleaned 1", "a.com")
+    assert mock_extract.await_args_list[0].kwargs == {"clean": False}
+    assert results[0]["product"]["shopsProductId"] == "A-1"
+    assert results[1]["error"] == "x"
+
+
+@pytest.mark.asyncio
+async def test_batch_file_roundtrip(pages, tmp_path):
+    requests_path = str(tmp_path / "requests.jsonl")
+    requests = await prepare_batch(pages, requests_path, model="m", clean=False)
+
+    assert [r["custom_id"] for r in requests] == [
+        "https://a.com/2",
+        "https://b.com/1",
+        "https://a.com/1",
+    ]
+    body = requests[0]["body"]
+    assert requests[0]["url"] == "/v1/chat/completions"
+    assert body["model"] == "m"
+    assert body["response_format"]["type"] == "json_schema"
+
+    output_path = str(tmp_path / "output.jsonl")
+    write_jsonl(
+        output_path,
+        [
+            {
+                "custom_id": "https://a.com/2",
+                "response": {
+                    "status_code": 200,
+                    "body": {
+                        "choices": [{"message": {"content": json.dumps(PRODUCT)}}]
+                    },
+                },
+                "error": None,
+            },
+            {
+                "custom_id": "https://b.com/1",
+                "response": {"status_code": 500, "body": {}},
+                "error": None,
+            },
+        ],
+    )
+    results = collect_batch(pages, output_path, str(tmp_path / "results.jsonl"))
+
+    assert results[0]["domain"] == "a.com"
+    assert results[0]["product"]["title"]["text"] == "Jugendstil Vase"
+    assert results[1]["product"] is None
+    assert results[1]["error"] == "HTTP 500"
+
+
+@pytest.mark.asyncio
+async def test_replay_sends_products_in_batches(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    write_jsonl(
+        path,
+        [
+            {"url": f"https://a.com/{i}", "domain": "a.com", "product": PRODUCT}
+            for i in range(3)
+        ]
+        + [
+            {"url": "https://a.com/x", "product": {**PRODUCT, "is_product": False}},
+            {"url": "https://a.com/y", "product": None, "error": "boom"},
+        ],
+    )
+
+    with patch.object(backend_uploader, "send_products", AsyncMock()) as send:
+        sent = await replay(path, batch_size=2)
+
+    assert sent == 3
+    batches = [json.loads(c.args[0])["items"] for c in send.await_args_list]
+    assert [len(b) for b in batches] == [2, 1]
+    assert batches[0][0]["url"] == "https://a.com/0"
@@ -4,6 +4,10 @@ import pytest
 from unittest.mock import AsyncMock, Mock, patch
 from typing import cast
 from crawl4ai import AsyncWebCrawler
+from aura_historia_backend_api_client.models import PutProductsResponse
+from src.core.aws.database.models import URLEntry
+from src.core.scraper.schemas.perfomance_tracker import PerformanceStats
+from src.core.utils.product_fingerprints import ProductFingerprints
 from src.core.worker import product_scraper
 
 from src.core.worker.product_scraper import (
@@ -102,16 +106,31 @@ def mock_qwen_extract():
         yield mock_extract
 
 
+def wire_product(i):
+    """A put_products item as queued for the backend."""
+    return {
+        "shopsProductId": f"P-{i}",
+        "title": {"text": f"Product {i}", "language": "en"},
+        "state": "AVAILABLE",
+        "url": f"https://example.com/{i}",
+    }
+
+
+def sent_items(call):
+    """The products of one send_products call."""
+    return json.loads(call.args[0])["items"]
+
+
 @pytest.fixture
 def mock_put_products():
-    """Mock put_products.asyncio function."""
+    """Mock send_products, which receives each encoded batch."""
 
-    async def mock_side_effect(client, body):
+    async def mock_side_effect(body):
         await asyncio.sleep(0)
-        return body
+        return PutProductsResponse(skipped=0)
 
     with patch(
-        "src.core.worker.product_scraper.put_products.asyncio",
+        "src.core.utils.backend_uploader.send_products",
         new_callable=AsyncMock,
         side_effect=mock_side_effect,
     ) as mock:
@@ -212,37 +231,33 @@ class TestBatchSender:
         """Test batch sender with items filling exactly one batch."""
         q = asyncio.Queue()
 
-        await q.put(Mock(spec=product_scraper.ScrapedData))
-        await q.put(Mock(spec=product_scraper.ScrapedData))
+        await q.put(wire_product(1))
+        await q.put(wire_product(2))
         await q.put(None)
 
         await batch_sender(q, batch_size=2)
 
         mock_put_products.assert_called_once()
-        call_args = mock_put_products.call_args[1]
-        assert "body" in call_args
-        collection = call_args["body"]
-        assert len(collection.items) == 2
+        assert sent_items(mock_put_products.call_args) == [
+            wire_product(1),
+            wire_product(2),
+        ]
 
     @pytest.mark.asyncio
     async def test_batch_sender_multiple_batches(self, mock_put_products):
         """Test batch sender with items requiring multiple batches."""
         q = asyncio.Queue()
 
-        for _ in range(5):
-            await q.put(Mock(spec=product_scraper.ScrapedData))
+        for i in range(5):
+            await q.put(wire_product(i))
         await q.put(None)
 
         await batch_sender(q, batch_size=2)
 
         # With 5 items and batch_size=2, we expect 3 sends: [2, 2, 1]
         assert mock_put_products.call_count == 3
-        first_call = mock_put_products.call_args_list[0][1]["body"]
-        second_call = mock_put_products.call_args_list[1][1]["body"]
-        third_call = mock_put_products.call_args_list[2][1]["body"]
-        assert len(first_call.items) == 2
-        assert len(second_call.items) == 2
-        assert len(third_call.items) == 1
+        sizes = [len(sent_items(c)) for c in mock_put_products.call_args_list]
+        assert sizes == [2, 2, 1]
 
     @pytest.mark.asyncio
     async def test_batch_sender_empty_queue(self, mock_put_products):
@@ -254,6 +269,31 @@ class TestBatchSender:
 
         assert mock_put_products.call_count == 0
 
+    @pytest.mark.asyncio
+    async def test_batch_sender_skips_unchanged_products(self, mock_put_products):
+        """Products with a stored, equal fingerprint are not sent."""
+        unchanged = URLEntry(
+            domain="example.com",
+            url="https://example.com/1",
+            product_fingerprint=URLEntry.calculate_product_fingerprint(wire_product(1)),
+        )
+        db = Mock()
+        db.batch_get_url_entries.return_value = {unchanged.url: unchanged}
+        fingerprints = ProductFingerprints(db)
+        q = asyncio.Queue()
+        for i in range(3):
+            await q.put(wire_product(i))
+        await q.put(None)
+
+        await batch_sender(q, 10, "example.com", fingerprints)
+
+        assert sent_items(mock_put_products.call_args) == [
+            wire_product(0),
+            wire_product(2),
+        ]
+        stored = {c.args[1] for c in db.update_product_fingerprint.call_args_list}
+        assert stored == {"https://example.com/0", "https://example.com/2"}
+
 
 class TestProcessSingleUrl:
     """Tests for _process_single_url function."""
@@ -440,6 +480,282 @@ class TestScrape:
         assert count == 0
         assert mock_put_products.call_count == 0
 
+    @pytest.mark.asyncio
+    async def test_scrape_uses_fetcher(
+        self, mock_qwen_extract, mock_put_products, mock_update_hash
+    ):
+        """Chunks are fetched through the fetcher when one is given."""
+        crawler = FakeCrawler()
+        fetcher = Mock()
+        fetcher.fetch_many = AsyncMock(
+            return_value=[FakeResult(url="https://example.com/1", markdown="# P1")]
+        )
+
+        count = await scrape(
+            cast(AsyncWebCrawler, cast(object, crawler)),
+            "example.com",
+            ["https://example.com/1"],
+            asyncio.Event(),
+            run_config={},
+            vllm_batch_size=10,
+            backend_batch_size=10,
+            fetcher=fetcher,
+        )
+
+        assert count == 1
+        fetcher.fetch_many.assert_awaited_once_with(
+            crawler,
+            ["https://example.com/1"],
+            "example.com",
+            {},
+            dispatcher_factory=product_scraper.crawl_dispatcher,
+        )
+        assert mock_qwen_extract.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_scrape_cleans_chunk_with_cleaner(
+        self, mock_qwen_extract, mock_put_products, mock_update_hash
+    ):
+        """With a cleaner, the chunk is cleaned in one call before extraction."""
+        crawler = FakeCrawler(
+            results=[
+                FakeResult(url="https://example.com/1", markdown="# P1"),
+                FakeResult(url="https://example.com/2", markdown="# P2"),
+            ]
+        )
+        cleaner = Mock()
+
+        with patch(
+            "src.core.worker.product_scraper.clean_for_extraction",
+            new=AsyncMock(return_value=["clean 1", "clean 2"]),
+        ) as mock_clean:
+            await scrape(
+                cast(AsyncWebCrawler, cast(object, crawler)),
+                "example.com",
+                ["https://example.com/1", "https://example.com/2"],
+                asyncio.Event(),
+                run_config={},
+                vllm_batch_size=2,
+                backend_batch_size=10,
+                cleaner=cleaner,
+            )
+
+        mock_clean.assert_awaited_once_with(["# P1", "# P2"], "example.com", cleaner)
+        assert [c.args for c in mock_qwen_extract.call_args_list] == [
+            ("clean 1", "example.com"),
+            ("clean 2", "example.com"),
+        ]
+        assert all(
+            c.kwargs == {"clean": False} for c in mock_qwen_extract.call_args_list
+        )
+
+    @pytest.mark.asyncio
+    async def test_scrape_skips_revalidated_urls(
+        self, mock_qwen_extract, mock_put_products, mock_update_hash
+    ):
+        """URLs reported unchanged by the revalidator are never rendered."""
+        crawler = FakeCrawler()
+        crawler.arun_many = AsyncMock(
+            return_value=[FakeResult(url="https://example.com/2", markdown="# P2")]
+        )
+        entries = {"https://example.com/2": Mock(hash=None)}
+        revalidator = Mock()
+        revalidator.load_entries = AsyncMock(return_value=entries)
+        revalidator.filter_changed = AsyncMock(
+            return_value=(["https://example.com/2"], ["https://example.com/1"])
+        )
+        revalidator.record = AsyncMock()
+
+        count = await scrape(
+            cast(AsyncWebCrawler, cast(object, crawler)),
+            "example.com",
+            ["https://example.com/1", "https://example.com/2"],
+            asyncio.Event(),
+            run_config={},
+            vllm_batch_size=10,
+            backend_batch_size=10,
+            revalidator=revalidator,
+        )
+
+        assert count == 2
+        assert crawler.arun_many.call_args[0][0] == ["https://example.com/2"]
+        revalidator.record.assert_awaited_once()
+        assert revalidator.filter_changed.call_args[0][2] is entries
+        mock_update_hash.assert_awaited_once_with(
+            "# P2", "example.com", "https://example.com/2", entries
+        )
+        assert mock_qwen_extract.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_scrape_uses_structured_data_before_llm(
+        self, mock_qwen_extract, mock_put_products, mock_update_hash
+    ):
+        """Pages with complete schema.org data are never sent to the LLM."""
+        product_html = (
+            '<html lang="de"><head><script type="application/ld+json">'
+            '{"@type": "Product", "name": "Vase", "sku": "V-1", "offers": '
+            '{"price": "12.50", "priceCurrency": "EUR", '
+            '"availability": "https://schema.org/InStock"}}'
+            "</script></head><body></body></html>"
+        )
+        crawler = FakeCrawler(
+            results=[
+                FakeResult(url="https://example.com/1", html=product_html),
+                FakeResult(url="https://example.com/2", markdown="# P2"),
+            ]
+        )
+
+        with patch.object(product_scraper, "STRUCTURED_DATA_ENABLED", True):
+            await scrape(
+                cast(AsyncWebCrawler, cast(object, crawler)),
+                "example.com",
+                ["https://example.com/1", "https://example.com/2"],
+                asyncio.Event(),
+                run_config={},
+                vllm_batch_size=2,
+                backend_batch_size=10,
+            )
+
+        assert [c.args for c in mock_qwen_extract.call_args_list] == [
+            ("# P2", "example.com")
+        ]
+        items = sent_items(mock_put_products.call_args)
+        assert {item["shopsProductId"] for item in items} == {"V-1", "test-123"}
+
+    @pytest.mark.asyncio
+    async def test_scrape_gates_pages_before_full_extraction(
+        self, mock_qwen_extract, mock_put_products, mock_update_hash
+    ):
+        """Only pages the gate does not reject get the full extraction."""
+        crawler = FakeCrawler(
+            results=[
+                FakeResult(url="https://example.com/1", markdown="# List"),
+                FakeResult(url="https://example.com/2", markdown="# P2"),
+                FakeResult(url="https://example.com/3", markdown="# P3"),
+            ]
+        )
+        verdicts = {"# List": False, "# P2": True, "# P3": None}
+
+        with (
+            patch.object(product_scraper, "LLM_GATE_ENABLED", True),
+            patch(
+                "src.core.worker.product_scraper.clean_for_extraction",
+                new=AsyncMock(side_effect=lambda mds, domain, cleaner: mds),
+            ),
+            patch(
+                "src.core.worker.product_scraper.gate_product",
+                new=AsyncMock(side_effect=lambda md, domain: verdicts[md]),
+            ) as mock_gate,
+        ):
+            await scrape(
+                cast(AsyncWebCrawler, cast(object, crawler)),
+                "example.com",
+                [f"https://example.com/{i}" for i in (1, 2, 3)],
+                asyncio.Event(),
+                run_config={},
+                vllm_batch_size=3,
+                backend_batch_size=10,
+            )
+
+        assert mock_gate.await_count == 3
+        # Gate errors fall through to the full extraction
+        assert [c.args for c in mock_qwen_extract.call_args_list] == [
+            ("# P2", "example.com"),
+            ("# P3", "example.com"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_gate_errors_are_not_false_positives(
+        self, mock_put_products, mock_update_hash
+    ):
+        """Only pages the gate called a product count against its precision."""
+        crawler = FakeCrawler(
+            results=[
+                FakeResult(url="https://example.com/1", markdown="# P1"),
+                FakeResult(url="https://example.com/2", markdown="# P2"),
+            ]
+        )
+        verdicts = {"# P1": True, "# P2": RuntimeError("gate down")}
+        not_a_product = Mock(is_product=False)
+        stats = []
+
+        def track(**kwargs):
+            stats.append(PerformanceStats(**kwargs))
+            return stats[-1]
+
+        with (
+            patch.object(product_scraper, "LLM_GATE_ENABLED", True),
+            patch.object(product_scraper, "PerformanceStats", side_effect=track),
+            patch(
+                "src.core.worker.product_scraper.clean_for_extraction",
+                new=AsyncMock(side_effect=lambda mds, domain, cleaner: mds),
+            ),
+            patch(
+                "src.core.worker.product_scraper.gate_product",
+                new=AsyncMock(side_effect=lambda md, domain: verdicts[md]),
+            ),
+            patch(
+                "src.core.worker.product_scraper.extract",
+                new=AsyncMock(return_value=not_a_product),
+            ),
+        ):
+            await scrape(
+                cast(AsyncWebCrawler, cast(object, crawler)),
+                "example.com",
+                ["https://example.com/1", "https://example.com/2"],
+                asyncio.Event(),
+                run_config={},
+                vllm_batch_size=2,
+                backend_batch_size=10,
+            )
+
+        (result,) = stats
+        assert result.gate_passes == 1
+        assert result.gate_errors == 1
+        assert result.gate_false_positives == 1
+        assert result.gate_precision() == 0.0
+
+    @pytest.mark.asyncio
+    async def test_scrape_saves_cleaned_snapshots(
+        self, mock_qwen_extract, mock_put_products, mock_update_hash
+    ):
+        """With a snapshot store, the cleaned markdown of every page is kept."""
+        crawler = FakeCrawler(
+            results=[
+                FakeResult(url="https://example.com/1", markdown="# P1"),
+                FakeResult(url="https://example.com/2", markdown="# P2"),
+            ]
+        )
+        snapshots = Mock()
+        snapshots.save_async = AsyncMock(return_value=2)
+
+        with patch(
+            "src.core.worker.product_scraper.clean_for_extraction",
+            new=AsyncMock(
+                side_effect=lambda mds, domain, cleaner: ["c" + m for m in mds]
+            ),
+        ):
+            await scrape(
+                cast(AsyncWebCrawler, cast(object, crawler)),
+                "example.com",
+                ["https://example.com/1", "https://example.com/2"],
+                asyncio.Event(),
+                run_config={},
+                vllm_batch_size=2,
+                backend_batch_size=10,
+                snapshots=snapshots,
+            )
+
+        snapshots.save_async.assert_awaited_once_with(
+            "example.com",
+            ["https://example.com/1", "https://example.com/2"],
+            ["c# P1", "c# P2"],
+        )
+        assert [c.args[0] for c in mock_qwen_extract.call_args_list] == [
+            "c# P1",
+            "c# P2",
+        ]
+
 
 class TestHandleDomainMessage:
     """Tests for handle_domain_message function."""
@@ -509,6 +825,64 @@ class TestHandleDomainMessage:
             assert db.update_shop_metadata.call_count == 2
             mock_delete.assert_called_once_with(message)
 
+    @pytest.mark.asyncio
+    async def test_handle_domain_message_leases_from_browser_pool(
+        self, mock_qwen_extract, mock_put_products, mock_update_hash
+    ):
+        """A given browser pool is used instead of launching a new browser."""
+        from contextlib import asynccontextmanager
+
+        message = Mock()
+        db = Mock()
+        db.get_all_product_urls_by_domain = Mock(
+            return_value=["https://example.com/product1"]
+        )
+        leases = []
+
+        class FakePool:
+            @asynccontextmanager
+            async def lease(self):
+                leases.append(1)
+                yield FakeCrawler()
+
+        with (
+            patch(
+                "src.core.worker.product_scraper.visibility_heartbeat",
+                return_value=asyncio.create_task(asyncio.sleep(0)),
+            ),
+            patch(
+                "src.core.worker.product_scraper.parse_message_body",
+                return_value=("example.com", None),
+            ),
+            patch("src.core.worker.product_scraper.delete_message") as mock_delete,
+            patch(
+                "src.core.worker.product_scraper.build_product_scraper_components",
+                return_value=({}, {}),
+            ),
+            patch("src.core.worker.product_scraper.AsyncWebCrawler") as mock_crawler,
+            patch(
+                "src.core.worker.product_scraper.asyncio.to_thread",
+                new_callable=AsyncMock,
+            ) as mock_thread,
+        ):
+            mock_thread.side_effect = lambda func, *args, **kwargs: func(
+                *args, **kwargs
+            )
+
+            await handle_domain_message(
+                message,
+                db,
+                asyncio.Event(),
+                Mock(),
+                backend_batch_size=10,
+                vllm_batch_size=4,
+                browser_pool=FakePool(),
+            )
+
+            assert leases == [1]
+            mock_crawler.assert_not_called()
+            mock_delete.assert_called_once_with(message)
+
     @pytest.mark.asyncio
     async def test_handle_domain_message_no_domain(self):
         """Test handling message without domain."""
@@ -633,6 +1007,10 @@ class TestMain:
                 new_callable=AsyncMock,
                 side_effect=fake_run_worker_pool,
             ) as mock_run_pool,
+            patch(
+                "src.core.worker.product_scraper.llm_pool",
+                Mock(close=AsyncMock()),
+            ) as mock_llm_pool,
         ):
             import src.core.worker.product_scraper as ps
 
@@ -649,6 +1027,8 @@ class TestMain:
             assert call_kwargs["n_workers"] == 2
             assert call_kwargs["shutdown_event"] == ps.shutdown_event
             assert call_kwargs["shutdown_timeout"] == 90
+            mock_llm_pool.start.assert_called_once()
+            mock_llm_pool.close.assert_awaited_once()
 
 
 class TestUpdateHash:
@@ -748,6 +1128,28 @@ class TestUpdateHash:
         )
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_update_hash_uses_preloaded_entries(self, monkeypatch):
+        """Preloaded entries replace the per-URL lookup."""
+        from src.core.worker import product_scraper
+
+        db_ops = Mock()
+        db_ops.get_url_entry.side_effect = AssertionError("Should not be called")
+        monkeypatch.setattr(product_scraper, "db_operations", db_ops)
+
+        markdown = "# Test Product\nPrice: 9.99\nState: in_stock"
+        url = "https://example.com/1"
+        entries = {url: Mock(hash=product_scraper.URLEntry.calculate_hash(markdown))}
+
+        assert not await product_scraper.update_hash(
+            markdown, "example.com", url, entries
+        )
+        assert await product_scraper.update_hash(
+            markdown, "example.com", "https://example.com/2", entries
+        )
+        db_ops.update_url_hash.assert_called_once()
+        db_ops.get_url_entry.assert_not_called()
+
 
 class TestWorker:
     """Tests for worker function using generic_worker."""
@@ -7,6 +7,7 @@ import pytest
 from src.core.worker.product_spider import (
     parse_shop_message,
     crawl_and_classify_urls,
+    discover_sitemap_urls,
     handle_shop_message,
     worker,
 )
@@ -263,6 +264,77 @@ class TestCrawlAndClassifyUrls:
         assert processed == 5
         assert db.batch_write_url_entries.call_count == 3
 
+    @pytest.mark.asyncio
+    async def test_sitemap_stage_runs_before_bfs(self):
+        """Sitemap URLs are classified in batches and product URLs skip the BFS crawl."""
+        crawler = Mock()
+        crawler.arun = setup_mock_arun(
+            [Mock(success=True, url="https://example.com/category")]
+        )
+
+        async def fake_discover(_start_url):
+            for url in ["https://example.com/p1", "https://example.com/about"]:
+                yield url
+
+        sitemap_discovery = Mock()
+        sitemap_discovery.discover = fake_discover
+
+        classifier = Mock()
+        classifier.classify_urls_batch = Mock(return_value=[(True, 0.9), (False, 0.8)])
+        classifier.classify_url = Mock(return_value=(False, 0.7))
+
+        db = Mock()
+        run_config = Mock()
+
+        processed = await crawl_and_classify_urls(
+            crawler=crawler,
+            start_url="https://example.com",
+            domain="example.com",
+            classifier=classifier,
+            db=db,
+            shutdown_event=asyncio.Event(),
+            run_config=run_config,
+            batch_size=10,
+            sitemap_discovery=sitemap_discovery,
+        )
+
+        assert processed == 3
+        classifier.classify_urls_batch.assert_called_once_with(
+            ["https://example.com/p1", "https://example.com/about"], 10
+        )
+        run_config.deep_crawl_strategy.add_known_urls.assert_called_once_with(
+            ["https://example.com/p1"]
+        )
+        sitemap_entries = db.batch_write_url_entries.call_args_list[0][0][0]
+        assert [entry.type for entry in sitemap_entries] == ["product", None]
+
+    @pytest.mark.asyncio
+    async def test_sitemap_stream_is_closed_on_shutdown(self):
+        """Stopping early closes the sitemap stream instead of leaving it to GC."""
+        closed = []
+
+        async def fake_discover(_start_url):
+            try:
+                for i in range(10):
+                    yield f"https://example.com/p{i}"
+            finally:
+                closed.append(True)
+
+        shutdown_event = asyncio.Event()
+        shutdown_event.set()
+
+        processed, _ = await discover_sitemap_urls(
+            sitemap_discovery=Mock(discover=fake_discover),
+            start_url="https://example.com",
+            domain="example.com",
+            classifier=Mock(),
+            db=Mock(),
+            shutdown_event=shutdown_event,
+        )
+
+        assert processed == 0
+        assert closed == [True]
+
 
 class TestHandleShopMessage:
     """Tests for handle_shop_message function."""
@@ -558,5 +630,10 @@ class TestWorker:
             await handler_captured(message)
 
             mock_handle.assert_called_once_with(
-                message, classifier, db, mock_shutdown_event, batch_size
+                message,
+                classifier,
+                db,
+                mock_shutdown_event,
+                batch_size,
+                browser_pool=None,
             )